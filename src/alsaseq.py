@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# ALSA sequencer helpers for usage in python applications
+# Copyright (C) 2010-2013 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the COPYING file
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+import re
+from collections import OrderedDict
+from ctypes import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Load ALSA shared library (optional, only needed for announce events)
+
+try:
+    alsalib = cdll.LoadLibrary("libasound.so.2")
+except:
+    alsalib = None
+
+# ------------------------------------------------------------------------------------------------------------
+# Static Variables
+
+SEQ_CLIENTS_FILE = "/proc/asound/seq/clients"
+
+SND_SEQ_OPEN_INPUT = 2
+SND_SEQ_NONBLOCK   = 1
+
+SND_SEQ_PORT_CAP_WRITE     = 1 << 1
+SND_SEQ_PORT_CAP_NO_EXPORT = 1 << 7
+
+SND_SEQ_PORT_TYPE_APPLICATION = 1 << 20
+
+SND_SEQ_CLIENT_SYSTEM        = 0
+SND_SEQ_PORT_SYSTEM_ANNOUNCE = 1
+
+SND_SEQ_EVENT_CLIENT_START      = 60
+SND_SEQ_EVENT_PORT_UNSUBSCRIBED = 67
+
+POLLIN = 1
+EAGAIN = 11
+ENOSPC = 28
+
+_reClient = re.compile(r'^Client +(\d+) : "(.*)" \[(\w+)')
+_rePort   = re.compile(r'^  Port +(\d+) : "(.*)" \((.)(.)')
+_reAddr   = re.compile(r'^(\d+):(\d+)')
+
+# ------------------------------------------------------------------------------------------------------------
+# Sequencer graph snapshot
+
+class AlsaSeqSnapshot(object):
+    __slots__ = [
+        'clients',    # client id -> (client name, is kernel)
+        'ports',      # (client id, port id, is input) -> (client name, port name)
+        'connections' # list of ((client id, port id), (client id, port id)), output to input
+    ]
+
+    def __init__(self):
+        self.clients     = {}
+        self.ports       = OrderedDict()
+        self.connections = []
+
+# Read the whole sequencer graph from procfs, returns None if not available
+def get_seq_snapshot(ignoreClientId=-1):
+    try:
+        procFile = open(SEQ_CLIENTS_FILE, "r")
+        lines    = procFile.read().split("\n")
+        procFile.close()
+    except:
+        return None
+
+    snapshot   = AlsaSeqSnapshot()
+    clientId   = -1
+    clientName = ""
+    portAddr   = None
+
+    for line in lines:
+        if line.startswith("Client "):
+            match = _reClient.match(line)
+            portAddr = None
+
+            if match is None or int(match.group(1)) == ignoreClientId:
+                clientId = -1
+                continue
+
+            clientId   = int(match.group(1))
+            clientName = match.group(2)
+
+            # Make 'System' match JACK's 'system'
+            if clientId == SND_SEQ_CLIENT_SYSTEM and clientName == "System":
+                clientName = "system"
+
+            snapshot.clients[clientId] = (clientName, bool(match.group(3) == "Kernel"))
+
+        elif clientId < 0:
+            continue
+
+        elif line.startswith("  Port "):
+            match = _rePort.match(line)
+
+            if match is None:
+                portAddr = None
+                continue
+
+            portId   = int(match.group(1))
+            portName = match.group(2)
+            portAddr = (clientId, portId)
+
+            # Only list ports that can be subscribed to, like 'aconnect -i' and 'aconnect -o'
+            if match.group(3) == "R":
+                snapshot.ports[(clientId, portId, False)] = (clientName, portName)
+            if match.group(4) == "W":
+                snapshot.ports[(clientId, portId, True)] = (clientName, portName)
+
+        elif line.startswith("    Connecting To: ") and portAddr is not None:
+            for target in line.split(": ", 1)[1].split(", "):
+                match = _reAddr.match(target)
+                if match is not None:
+                    snapshot.connections.append((portAddr, (int(match.group(1)), int(match.group(2)))))
+
+    # Drop connections to ports we don't list
+    snapshot.connections = [(portA, portB) for portA, portB in snapshot.connections
+                            if (portA[0], portA[1], False) in snapshot.ports and (portB[0], portB[1], True) in snapshot.ports]
+
+    return snapshot
+
+# Returns (removed ports, added ports, removed connections, added connections)
+# A port whose client or port name changed is both removed and added, and so are its connections
+def diff_seq_snapshots(old, new):
+    removedPorts = [port for port, names in old.ports.items() if new.ports.get(port) != names]
+    addedPorts   = [port for port, names in new.ports.items() if old.ports.get(port) != names]
+
+    oldConnections = set(old.connections)
+    newConnections = set(new.connections)
+
+    removedSet = set(removedPorts)
+    addedSet   = set(addedPorts)
+
+    removedConnections = [(portA, portB) for portA, portB in old.connections
+                          if (portA, portB) not in newConnections or portA+(False,) in removedSet or portB+(True,) in removedSet]
+    addedConnections   = [(portA, portB) for portA, portB in new.connections
+                          if (portA, portB) not in oldConnections or portA+(False,) in addedSet or portB+(True,) in addedSet]
+
+    return (removedPorts, addedPorts, removedConnections, addedConnections)
+
+# ------------------------------------------------------------------------------------------------------------
+# Sequencer announce listener
+
+class _snd_seq_event(Structure):
+    _fields_ = [
+        ("type", c_uint8),
+        ("flags", c_uint8),
+        ("tag", c_uint8),
+        ("queue", c_uint8),
+        ("time", c_uint * 2),
+        ("source", c_uint8 * 2),
+        ("dest", c_uint8 * 2),
+        ("data", c_uint8 * 12)
+    ]
+
+class _pollfd(Structure):
+    _fields_ = [
+        ("fd", c_int),
+        ("events", c_short),
+        ("revents", c_short)
+    ]
+
+if alsalib is not None:
+    alsalib.snd_seq_open.argtypes = [POINTER(c_void_p), c_char_p, c_int, c_int]
+    alsalib.snd_seq_open.restype  = c_int
+
+    alsalib.snd_seq_close.argtypes = [c_void_p]
+    alsalib.snd_seq_close.restype  = c_int
+
+    alsalib.snd_seq_set_client_name.argtypes = [c_void_p, c_char_p]
+    alsalib.snd_seq_set_client_name.restype  = c_int
+
+    alsalib.snd_seq_client_id.argtypes = [c_void_p]
+    alsalib.snd_seq_client_id.restype  = c_int
+
+    alsalib.snd_seq_create_simple_port.argtypes = [c_void_p, c_char_p, c_uint, c_uint]
+    alsalib.snd_seq_create_simple_port.restype  = c_int
+
+    alsalib.snd_seq_connect_from.argtypes = [c_void_p, c_int, c_int, c_int]
+    alsalib.snd_seq_connect_from.restype  = c_int
+
+    alsalib.snd_seq_poll_descriptors.argtypes = [c_void_p, POINTER(_pollfd), c_uint, c_short]
+    alsalib.snd_seq_poll_descriptors.restype  = c_int
+
+    alsalib.snd_seq_event_input.argtypes = [c_void_p, POINTER(POINTER(_snd_seq_event))]
+    alsalib.snd_seq_event_input.restype  = c_int
+
+# Subscribes to 'System:Announce' and tells when clients, ports or connections change.
+# Poll 'fd' (for example with a QSocketNotifier) and call 'readEvents()' when it's readable.
+class AlsaSeqAnnouncer(object):
+    def __init__(self, clientName):
+        object.__init__(self)
+
+        self.fSeq     = None
+        self.clientId = -1
+        self.fd       = -1
+
+        if alsalib is None:
+            return
+
+        seq = c_void_p()
+        if alsalib.snd_seq_open(pointer(seq), b"default", SND_SEQ_OPEN_INPUT, SND_SEQ_NONBLOCK) < 0:
+            return
+
+        alsalib.snd_seq_set_client_name(seq, clientName.encode("utf-8"))
+
+        # Not subscribable by others, so it won't show up in the graph
+        portId = alsalib.snd_seq_create_simple_port(seq, b"Announce", SND_SEQ_PORT_CAP_WRITE|SND_SEQ_PORT_CAP_NO_EXPORT,
+                                                    SND_SEQ_PORT_TYPE_APPLICATION)
+
+        pfd = _pollfd()
+
+        if (portId < 0 or alsalib.snd_seq_connect_from(seq, portId, SND_SEQ_CLIENT_SYSTEM, SND_SEQ_PORT_SYSTEM_ANNOUNCE) < 0 or
+            alsalib.snd_seq_poll_descriptors(seq, pointer(pfd), 1, POLLIN) != 1):
+            alsalib.snd_seq_close(seq)
+            return
+
+        self.fSeq     = seq
+        self.clientId = alsalib.snd_seq_client_id(seq)
+        self.fd       = pfd.fd
+
+    def isValid(self):
+        return bool(self.fSeq is not None)
+
+    # Drains all pending events, returns True if the graph changed
+    def readEvents(self):
+        if self.fSeq is None:
+            return False
+
+        changed = False
+        event   = POINTER(_snd_seq_event)()
+
+        while True:
+            ret = alsalib.snd_seq_event_input(self.fSeq, pointer(event))
+
+            if ret == -ENOSPC:
+                # Input overrun, events were lost
+                changed = True
+                continue
+            if ret < 0:
+                break
+
+            if SND_SEQ_EVENT_CLIENT_START <= event.contents.type <= SND_SEQ_EVENT_PORT_UNSUBSCRIBED:
+                changed = True
+
+        return changed
+
+    def close(self):
+        if self.fSeq is not None:
+            alsalib.snd_seq_close(self.fSeq)
+            self.fSeq = None
+            self.fd   = -1
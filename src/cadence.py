@@ -19,7 +19,9 @@
 # ------------------------------------------------------------------------------------------------------------
 # Imports (Global)
 
+from ctypes import byref, c_float
 from platform import architecture
+from time import time
 from PyQt4.QtCore import QFileSystemWatcher, QThread
 from PyQt4.QtGui import QApplication, QDialogButtonBox, QLabel, QMainWindow, QSizePolicy
 
@@ -27,6 +29,7 @@ from PyQt4.QtGui import QApplication, QDialogButtonBox, QLabel, QMainWindow, QSi
 # Imports (Custom Stuff)
 
 import systray
+import telemetry
 import ui_cadence
 import ui_cadence_tb_jack
 import ui_cadence_tb_alsa
@@ -1170,6 +1173,9 @@ class CadenceMainW(QMainWindow, ui_cadence.Ui_CadenceMainW):
         self.connect(self.cb_wineasio_fixed_bsize, SIGNAL("clicked()"), SLOT("slot_tweaksSettingsChanged_wineasio()"))
         self.connect(self.cb_wineasio_bsizes, SIGNAL("currentIndexChanged(int)"), SLOT("slot_tweaksSettingsChanged_wineasio()"))
 
+        self.connect(self.cb_history_range, SIGNAL("currentIndexChanged(int)"), SLOT("slot_historyRangeChanged(int)"))
+        self.connect(self.b_history_clear, SIGNAL("clicked()"), SLOT("slot_historyClear()"))
+
         # org.jackaudio.JackControl
         self.connect(self, SIGNAL("DBusJackServerStartedCallback()"), SLOT("slot_DBusJackServerStartedCallback()"))
         self.connect(self, SIGNAL("DBusJackServerStoppedCallback()"), SLOT("slot_DBusJackServerStoppedCallback()"))
@@ -1182,11 +1188,29 @@ class CadenceMainW(QMainWindow, ui_cadence.Ui_CadenceMainW):
         self.connect(self, SIGNAL("DBusA2JBridgeStartedCallback()"), SLOT("slot_DBusA2JBridgeStartedCallback()"))
         self.connect(self, SIGNAL("DBusA2JBridgeStoppedCallback()"), SLOT("slot_DBusA2JBridgeStoppedCallback()"))
 
+        # JACK monitor client
+        self.connect(self, SIGNAL("XRunCallback(double)"), SLOT("slot_XRunCallback(double)"))
+        self.connect(self, SIGNAL("BufferSizeCallback(int)"), SLOT("slot_BufferSizeCallback(int)"))
+        self.connect(self, SIGNAL("SampleRateCallback(int)"), SLOT("slot_SampleRateCallback(int)"))
+        self.connect(self, SIGNAL("ShutdownCallback()"), SLOT("slot_ShutdownCallback()"))
+
         # -------------------------------------------------------------
 
         self.m_last_dsp_load = None
         self.m_last_xruns    = None
         self.m_last_buffer_size = None
+        self.m_last_sample_rate = None
+
+        self.m_telemetry = telemetry.TelemetryRecorder(os.path.join(HOME, ".local", "share", "cadence", "telemetry"))
+        self.slot_historyRangeChanged(self.cb_history_range.currentIndex())
+
+        # In-process JACK client, used to get xruns, buffer size and sample rate changes without D-Bus polling
+        self.m_monitorClient = None
+
+        self.m_systrayTemplate = "<table>%s</table>" % "".join("<tr><td align='right'>%s:</td><td>%%s</td></tr>" % label for label in
+                                                               (self.tr("JACK Status"), self.tr("Realtime"), self.tr("DSP Load"), self.tr("Xruns"),
+                                                                self.tr("Buffer Size"), self.tr("Sample Rate"), self.tr("Block Latency")))
+        self.m_systrayText = ""
 
         self.m_timer500  = None
         self.m_timer2000 = self.startTimer(2000)
@@ -1303,6 +1327,7 @@ class CadenceMainW(QMainWindow, ui_cadence.Ui_CadenceMainW):
         self.m_last_dsp_load = gDBus.jack.GetLoad()
         self.m_last_xruns    = gDBus.jack.GetXruns()
         self.m_last_buffer_size = gDBus.jack.GetBufferSize()
+        self.m_last_sample_rate = gDBus.jack.GetSampleRate()
 
         self.b_jack_start.setEnabled(False)
         self.b_jack_stop.setEnabled(True)
@@ -1323,10 +1348,12 @@ class CadenceMainW(QMainWindow, ui_cadence.Ui_CadenceMainW):
         self.label_jack_dsp.setText("%.2f%%" % self.m_last_dsp_load)
         self.label_jack_xruns.setText(str(self.m_last_xruns))
         self.label_jack_bfsize.setText("%i samples" % self.m_last_buffer_size)
-        self.label_jack_srate.setText("%i Hz" % gDBus.jack.GetSampleRate())
+        self.label_jack_srate.setText("%i Hz" % self.m_last_sample_rate)
         self.label_jack_latency.setText("%.1f ms" % gDBus.jack.GetLatency())
 
         self.m_timer500 = self.startTimer(500)
+        self.monitorStart()
+        self.recordTelemetrySample()
 
         if gDBus.a2j and not gDBus.a2j.is_started():
             self.b_a2j_start.setEnabled(True)
@@ -1340,9 +1367,14 @@ class CadenceMainW(QMainWindow, ui_cadence.Ui_CadenceMainW):
             self.killTimer(self.m_timer500)
             self.m_timer500 = None
 
+        self.monitorStop()
+
         self.m_last_dsp_load = None
         self.m_last_xruns    = None
         self.m_last_buffer_size = None
+        self.m_last_sample_rate = None
+
+        self.m_telemetry.flush()
 
         self.b_jack_start.setEnabled(True)
         self.b_jack_stop.setEnabled(False)
@@ -1504,19 +1536,87 @@ class CadenceMainW(QMainWindow, ui_cadence.Ui_CadenceMainW):
         self.label_app_name.setText(name)
         self.label_app_comment.setText(comment)
 
+    def monitorStart(self):
+        if not jacklib or self.m_monitorClient:
+            return
+
+        self.m_monitorClient = jacklib.client_open("cadence-monitor", jacklib.JackNoStartServer, None)
+
+        if not self.m_monitorClient:
+            # Keep using D-Bus polling
+            self.m_monitorClient = None
+            return
+
+        jacklib.set_xrun_callback(self.m_monitorClient, self.JackXRunCallback, None)
+        jacklib.set_buffer_size_callback(self.m_monitorClient, self.JackBufferSizeCallback, None)
+        jacklib.set_sample_rate_callback(self.m_monitorClient, self.JackSampleRateCallback, None)
+        jacklib.on_shutdown(self.m_monitorClient, self.JackShutdownCallback, None)
+
+        if jacklib.activate(self.m_monitorClient) != 0:
+            jacklib.client_close(self.m_monitorClient)
+            self.m_monitorClient = None
+
+    def monitorStop(self):
+        if self.m_monitorClient:
+            jacklib.deactivate(self.m_monitorClient)
+            jacklib.client_close(self.m_monitorClient)
+            self.m_monitorClient = None
+
+    # Deviation of the current period, as measured by JACK's timing filter, from the nominal buffer size / sample rate, in microseconds
+    def monitorJitter(self):
+        if not (self.m_monitorClient and self.m_last_buffer_size and self.m_last_sample_rate):
+            return float("nan")
+
+        currentFrames = jacklib.jack_nframes_t(0)
+        currentUsecs  = jacklib.jack_time_t(0)
+        nextUsecs     = jacklib.jack_time_t(0)
+        periodUsecs   = c_float(0.0)
+
+        if jacklib.get_cycle_times(self.m_monitorClient, byref(currentFrames), byref(currentUsecs), byref(nextUsecs), byref(periodUsecs)) != 0:
+            return float("nan")
+
+        # No cycle has run yet
+        if periodUsecs.value <= 0.0:
+            return float("nan")
+
+        return abs(periodUsecs.value - float(self.m_last_buffer_size) * 1000000.0 / self.m_last_sample_rate)
+
+    def setBufferSizeAndLatency(self):
+        self.label_jack_bfsize.setText("%i samples" % self.m_last_buffer_size)
+
+        if self.m_last_sample_rate:
+            self.label_jack_latency.setText("%.1f ms" % (float(self.m_last_buffer_size) * 1000.0 / self.m_last_sample_rate))
+        elif gDBus.jack:
+            self.label_jack_latency.setText("%.1f ms" % gDBus.jack.GetLatency())
+
+    def recordTelemetrySample(self, sampleTime=None):
+        if self.m_last_dsp_load is None:
+            return
+
+        sample = self.m_telemetry.addSample(self.m_last_dsp_load, self.m_last_xruns, self.m_last_buffer_size, self.m_last_sample_rate,
+                                            self.monitorJitter(), sampleTime)
+        self.graph_history.addSample(sample)
+
+    def updateHistoryStats(self):
+        samples = self.graph_history.samples()
+
+        if not samples:
+            self.label_history_stats.setText(self.tr("No data"))
+            return
+
+        minLoad, avgLoad, maxLoad = telemetry.get_dsp_load_stats(samples)
+        xruns = sum(count for xrunTime, count in telemetry.get_xrun_times(samples))
+
+        self.label_history_stats.setText(self.tr("DSP Load: %.2f%% min, %.2f%% average, %.2f%% max; Xruns: %i") % (minLoad, avgLoad, maxLoad, xruns))
+
     def updateSystrayTooltip(self):
-        systrayText  = "<table>"
-        #systrayText += "<tr><td align='center' colspan='2'><h4>Cadence</h4></td></tr>"
-        systrayText += "<tr><td align='right'>%s:</td><td>%s</td></tr>" % (self.tr("JACK Status"), self.label_jack_status.text())
-        systrayText += "<tr><td align='right'>%s:</td><td>%s</td></tr>" % (self.tr("Realtime"), self.label_jack_realtime.text())
-        systrayText += "<tr><td align='right'>%s:</td><td>%s</td></tr>" % (self.tr("DSP Load"), self.label_jack_dsp.text())
-        systrayText += "<tr><td align='right'>%s:</td><td>%s</td></tr>" % (self.tr("Xruns"), self.label_jack_xruns.text())
-        systrayText += "<tr><td align='right'>%s:</td><td>%s</td></tr>" % (self.tr("Buffer Size"), self.label_jack_bfsize.text())
-        systrayText += "<tr><td align='right'>%s:</td><td>%s</td></tr>" % (self.tr("Sample Rate"), self.label_jack_srate.text())
-        systrayText += "<tr><td align='right'>%s:</td><td>%s</td></tr>" % (self.tr("Block Latency"), self.label_jack_latency.text())
-        systrayText += "</table>"
-
-        self.systray.setToolTip(systrayText)
+        systrayText = self.m_systrayTemplate % (self.label_jack_status.text(), self.label_jack_realtime.text(), self.label_jack_dsp.text(),
+                                                self.label_jack_xruns.text(), self.label_jack_bfsize.text(), self.label_jack_srate.text(),
+                                                self.label_jack_latency.text())
+
+        if systrayText != self.m_systrayText:
+            self.m_systrayText = systrayText
+            self.systray.setToolTip(systrayText)
 
     def func_start_tool(self, tool):
         if sys.argv[0].endswith(".py"):
@@ -1629,6 +1729,7 @@ class CadenceMainW(QMainWindow, ui_cadence.Ui_CadenceMainW):
             self.killTimer(self.m_timer500)
             self.m_timer500 = None
 
+        self.monitorStop()
         self.saveSettings()
         ForceWaitDialog(self).exec_()
 
@@ -1657,6 +1758,11 @@ class CadenceMainW(QMainWindow, ui_cadence.Ui_CadenceMainW):
         if gDBus.jack:
             gDBus.jack.ResetXruns()
 
+            if self.m_monitorClient and self.m_last_xruns is not None:
+                self.m_last_xruns = 0
+                self.label_jack_xruns.setText("0")
+                self.updateSystrayTooltip()
+
     @pyqtSlot()
     def slot_AlsaBridgeStart(self):
         self.slot_AlsaBridgeStop()
@@ -1757,6 +1863,54 @@ class CadenceMainW(QMainWindow, ui_cadence.Ui_CadenceMainW):
     def slot_PulseAudioBridgeOptions(self):
         ToolBarPADialog(self).exec_()
 
+    @pyqtSlot(float)
+    def slot_XRunCallback(self, xrunTime):
+        if self.m_last_xruns is None:
+            return
+
+        self.m_last_xruns += 1
+        self.label_jack_xruns.setText(str(self.m_last_xruns))
+        self.updateSystrayTooltip()
+        self.recordTelemetrySample(xrunTime)
+
+    @pyqtSlot(int)
+    def slot_BufferSizeCallback(self, bufferSize):
+        if self.m_last_buffer_size is None or self.m_last_buffer_size == bufferSize:
+            return
+
+        self.m_last_buffer_size = bufferSize
+        self.setBufferSizeAndLatency()
+        self.updateSystrayTooltip()
+
+    @pyqtSlot(int)
+    def slot_SampleRateCallback(self, sampleRate):
+        if self.m_last_sample_rate is None or self.m_last_sample_rate == sampleRate:
+            return
+
+        self.m_last_sample_rate = sampleRate
+        self.label_jack_srate.setText("%i Hz" % sampleRate)
+        self.setBufferSizeAndLatency()
+        self.updateSystrayTooltip()
+
+    @pyqtSlot()
+    def slot_ShutdownCallback(self):
+        # JACK already closed the client, D-Bus will tell us when the server is stopped
+        self.m_monitorClient = None
+
+    @pyqtSlot(int)
+    def slot_historyRangeChanged(self, index):
+        timeRange = (600, 3600, 6*3600, 24*3600)[index] if index >= 0 else 600
+
+        self.graph_history.setTimeRange(timeRange)
+        self.graph_history.setSamples(self.m_telemetry.query(time() - timeRange))
+        self.updateHistoryStats()
+
+    @pyqtSlot()
+    def slot_historyClear(self):
+        self.m_telemetry.clear()
+        self.graph_history.setSamples([])
+        self.updateHistoryStats()
+
     @pyqtSlot()
     def slot_handleCrash_jack(self):
         self.DBusReconnect()
@@ -2259,7 +2413,18 @@ class CadenceMainW(QMainWindow, ui_cadence.Ui_CadenceMainW):
 
     def timerEvent(self, event):
         if event.timerId() == self.m_timer500:
-            if gDBus.jack and self.m_last_dsp_load != None:
+            if self.m_monitorClient and self.m_last_dsp_load != None:
+                # Xruns come from the callback, the load is read in-process
+                next_dsp_load = jacklib.cpu_load(self.m_monitorClient)
+
+                if self.m_last_dsp_load != next_dsp_load:
+                    self.m_last_dsp_load = next_dsp_load
+                    self.label_jack_dsp.setText("%.2f%%" % self.m_last_dsp_load)
+                    self.updateSystrayTooltip()
+
+                self.recordTelemetrySample()
+
+            elif gDBus.jack and self.m_last_dsp_load != None:
                 next_dsp_load = gDBus.jack.GetLoad()
                 next_xruns    = gDBus.jack.GetXruns()
                 needUpdateTip = False
@@ -2277,22 +2442,50 @@ class CadenceMainW(QMainWindow, ui_cadence.Ui_CadenceMainW):
                 if needUpdateTip:
                     self.updateSystrayTooltip()
 
+                self.recordTelemetrySample()
+
         elif event.timerId() == self.m_timer2000:
             if gDBus.jack and self.m_last_buffer_size != None:
-                next_buffer_size = gDBus.jack.GetBufferSize()
+                # The monitor client gets buffer size changes from JACK itself
+                if not self.m_monitorClient:
+                    next_buffer_size = gDBus.jack.GetBufferSize()
 
-                if self.m_last_buffer_size != next_buffer_size:
-                    self.m_last_buffer_size = next_buffer_size
-                    self.label_jack_bfsize.setText("%i samples" % self.m_last_buffer_size)
-                    self.label_jack_latency.setText("%.1f ms" % gDBus.jack.GetLatency())
+                    if self.m_last_buffer_size != next_buffer_size:
+                        self.m_last_buffer_size = next_buffer_size
+                        self.label_jack_bfsize.setText("%i samples" % self.m_last_buffer_size)
+                        self.label_jack_latency.setText("%.1f ms" % gDBus.jack.GetLatency())
 
             else:
                 self.update()
 
+            if self.graph_history.isVisible():
+                self.updateHistoryStats()
+
         QMainWindow.timerEvent(self, event)
 
+    def JackXRunCallback(self, arg):
+        if DEBUG: print("JackXRunCallback()")
+        self.emit(SIGNAL("XRunCallback(double)"), time())
+        return 0
+
+    def JackBufferSizeCallback(self, bufferSize, arg):
+        if DEBUG: print("JackBufferSizeCallback(%i)" % bufferSize)
+        self.emit(SIGNAL("BufferSizeCallback(int)"), bufferSize)
+        return 0
+
+    def JackSampleRateCallback(self, sampleRate, arg):
+        if DEBUG: print("JackSampleRateCallback(%i)" % sampleRate)
+        self.emit(SIGNAL("SampleRateCallback(int)"), sampleRate)
+        return 0
+
+    def JackShutdownCallback(self, arg):
+        if DEBUG: print("JackShutdownCallback()")
+        self.emit(SIGNAL("ShutdownCallback()"))
+        return 0
+
     def closeEvent(self, event):
         self.saveSettings()
+        self.m_telemetry.flush()
         self.systray.handleQtCloseEvent(event)
 
 #--------------- main ------------------
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Cadence JACK graph daemon, shares one up-to-date JACK graph with all apps over a local socket
+# Copyright (C) 2012-2013 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the COPYING file
+
+# ------------------------------------------------------------------------------------------------------------
+# Protocol
+#
+# One JSON object per line, both ways.
+# Requests:
+#   {"request": "snapshot"}  -> one "snapshot" message
+#   {"request": "subscribe"} -> one "snapshot" message, then a "diff" message after each change
+# Messages:
+#   {"type": "snapshot", "protocol": N, "serial": N, "ports": [[name, flags, type, [count, alias1, alias2]], ...],
+#    "connections": [[output name, input name], ...]}
+#   {"type": "diff", "serial": N, "renamedPorts": [[old name, new name], ...], "removedConnections": [...],
+#    "removedPorts": [name, ...], "addedPorts": [[name, flags, type, aliases], ...], "addedConnections": [...]}
+#   {"type": "reset", "serial": N} - JACK stopped, the graph is now empty
+# Diffs should be applied in the order of their fields above.
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+import json
+import os
+import select
+import socket
+import sys
+from collections import OrderedDict
+from signal import signal, SIGINT, SIGTERM
+from threading import Lock
+from time import time
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom Stuff)
+
+from jacklib_helpers import *
+
+# ------------------------------------------------------------------------------------------------------------
+# Static Variables
+
+GRAPHD_PROTOCOL_VERSION = 1
+
+GRAPHD_EVENTS_DELAY     = 0.05 # seconds, events arriving meanwhile are sent as a single diff
+GRAPHD_RECONNECT_DELAY  = 2.0  # seconds
+GRAPHD_MAX_CLIENT_QUEUE = 16*1024*1024 # bytes, slower clients get dropped
+
+# ------------------------------------------------------------------------------------------------------------
+# Socket path, per user
+
+def get_graphd_socket_path():
+    runtimeDir = os.getenv("XDG_RUNTIME_DIR")
+
+    if runtimeDir and os.path.isdir(runtimeDir):
+        return os.path.join(runtimeDir, "cadence-graphd.sock")
+
+    return "/tmp/cadence-graphd-%i.sock" % os.getuid()
+
+# ------------------------------------------------------------------------------------------------------------
+# Client side
+
+def _portToJson(portName, portInfo):
+    portFlags, portTypeStr, portAliases = portInfo
+    return [portName, portFlags, portTypeStr, list(portAliases) if portAliases else None]
+
+def _portFromJson(port):
+    portName, portFlags, portTypeStr, portAliases = port
+    return (portName, (portFlags, portTypeStr, tuple(portAliases) if portAliases else None))
+
+# Asks the daemon for the current graph, returns a JackGraphSnapshot or None if the daemon is not running.
+# Port aliases are always included.
+def get_graphd_snapshot(timeout=0.5):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+
+    try:
+        sock.connect(get_graphd_socket_path())
+        sock.sendall(b'{"request": "snapshot"}\n')
+
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                return None
+            data += chunk
+
+        message = json.loads(str(data, encoding="utf-8"))
+
+    except (socket.error, ValueError):
+        return None
+
+    finally:
+        sock.close()
+
+    if message.get("type") != "snapshot" or message.get("protocol") != GRAPHD_PROTOCOL_VERSION:
+        return None
+
+    snapshot = JackGraphSnapshot()
+    snapshot.ports = OrderedDict(_portFromJson(port) for port in message["ports"])
+    snapshot.connections = [tuple(connection) for connection in message["connections"]]
+
+    return snapshot
+
+# ------------------------------------------------------------------------------------------------------------
+# Daemon
+
+class GraphDaemonClient(object):
+    __slots__ = [
+        'sock',
+        'inData',
+        'outData',
+        'subscribed'
+    ]
+
+class GraphDaemon(object):
+    def __init__(self, socketPath):
+        object.__init__(self)
+
+        self.fSocketPath = socketPath
+        self.fRunning = True
+
+        self.fJackClient = None
+        self.fLastConnectTry = 0.0
+
+        # Graph, same model as Catia's
+        self.fPorts = OrderedDict()       # full port name -> (flags, type string, aliases)
+        self.fConnections = OrderedDict() # (output port name, input port name) -> None
+        self.fPortConnections = {}        # full port name -> set of connections
+        self.fSerial = 0
+
+        # Events come from JACK's thread, the main loop is woken up by a pipe
+        self.fEventsLock = Lock()
+        self.fEvents = JackPortEventQueue()
+        self.fEventsDeadline = None
+        self.fShutdown = False
+        self.fWakeRead, self.fWakeWrite = os.pipe()
+
+        self.fClients = []
+        self.fServer  = None
+
+    # -----------------------------------------------------------------
+    # Socket
+
+    def listen(self):
+        # Check if another daemon is running, or the socket was left behind
+        if os.path.exists(self.fSocketPath):
+            testSock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                testSock.connect(self.fSocketPath)
+                testSock.close()
+                return False
+            except socket.error:
+                testSock.close()
+                os.remove(self.fSocketPath)
+
+        self.fServer = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.fServer.bind(self.fSocketPath)
+        os.chmod(self.fSocketPath, 0o600)
+        self.fServer.listen(16)
+        self.fServer.setblocking(False)
+        return True
+
+    def acceptClient(self):
+        try:
+            sock, addr = self.fServer.accept()
+        except socket.error:
+            return
+
+        sock.setblocking(False)
+
+        client = GraphDaemonClient()
+        client.sock       = sock
+        client.inData     = b""
+        client.outData    = bytearray()
+        client.subscribed = False
+
+        self.fClients.append(client)
+
+    def dropClient(self, client):
+        if client not in self.fClients:
+            return
+
+        client.sock.close()
+        self.fClients.remove(client)
+
+    def readClient(self, client):
+        try:
+            data = client.sock.recv(4096)
+        except socket.error:
+            data = b""
+
+        if not data:
+            self.dropClient(client)
+            return
+
+        client.inData += data
+
+        while b"\n" in client.inData:
+            line, client.inData = client.inData.split(b"\n", 1)
+
+            try:
+                request = json.loads(str(line, encoding="utf-8")).get("request")
+            except (ValueError, AttributeError):
+                self.dropClient(client)
+                return
+
+            if request in ("snapshot", "subscribe"):
+                # Send what JACK has right now, not what it had when the last events arrived
+                self.handleEvents()
+
+                # Dropped if its queue got too big, either from the broadcast above or just now
+                if client in self.fClients:
+                    self.sendMessage(client, self.snapshotMessage())
+                if client not in self.fClients:
+                    return
+
+                client.subscribed = client.subscribed or bool(request == "subscribe")
+
+    def writeClient(self, client):
+        try:
+            sent = client.sock.send(client.outData)
+        except socket.error:
+            self.dropClient(client)
+            return
+
+        del client.outData[:sent]
+
+    def sendMessage(self, client, message):
+        client.outData += json.dumps(message).encode("utf-8") + b"\n"
+
+        if len(client.outData) > GRAPHD_MAX_CLIENT_QUEUE:
+            self.dropClient(client)
+
+    def broadcast(self, message):
+        for client in [client for client in self.fClients if client.subscribed]:
+            self.sendMessage(client, message)
+
+    def snapshotMessage(self):
+        return {
+            "type": "snapshot",
+            "protocol": GRAPHD_PROTOCOL_VERSION,
+            "serial": self.fSerial,
+            "ports": [_portToJson(portName, portInfo) for portName, portInfo in self.fPorts.items()],
+            "connections": [list(connection) for connection in self.fConnections]
+        }
+
+    # -----------------------------------------------------------------
+    # Graph
+
+    def addPort(self, portName, portInfo):
+        if portName in self.fPorts:
+            return False
+
+        self.fPorts[portName] = portInfo
+        self.fPortConnections[portName] = set()
+        return True
+
+    def removePort(self, portName, removedConnections):
+        if portName not in self.fPorts:
+            return False
+
+        for connection in list(self.fPortConnections[portName]):
+            if self.removeConnection(*connection):
+                removedConnections.append(list(connection))
+
+        del self.fPorts[portName]
+        del self.fPortConnections[portName]
+        return True
+
+    def renamePort(self, oldName, newName):
+        if oldName not in self.fPorts or newName in self.fPorts:
+            return False
+
+        self.fPorts[newName] = self.fPorts.pop(oldName)
+
+        self.fPortConnections[newName] = set()
+
+        for portOutName, portInName in list(self.fPortConnections[oldName]):
+            self.removeConnection(portOutName, portInName)
+
+            if portOutName == oldName:
+                portOutName = newName
+            if portInName == oldName:
+                portInName = newName
+
+            self.addConnection(portOutName, portInName)
+
+        del self.fPortConnections[oldName]
+        return True
+
+    def addConnection(self, portOutName, portInName):
+        connection = (portOutName, portInName)
+
+        if connection in self.fConnections or portOutName not in self.fPorts or portInName not in self.fPorts:
+            return False
+
+        self.fConnections[connection] = None
+        self.fPortConnections[portOutName].add(connection)
+        self.fPortConnections[portInName].add(connection)
+        return True
+
+    def removeConnection(self, portOutName, portInName):
+        connection = (portOutName, portInName)
+
+        if connection not in self.fConnections:
+            return False
+
+        del self.fConnections[connection]
+        self.fPortConnections[portOutName].discard(connection)
+        self.fPortConnections[portInName].discard(connection)
+        return True
+
+    def clearGraph(self):
+        self.fPorts.clear()
+        self.fConnections.clear()
+        self.fPortConnections.clear()
+
+    # -----------------------------------------------------------------
+    # JACK
+
+    def jackConnect(self):
+        self.fLastConnectTry = time()
+
+        client = jacklib.client_open("cadence-graphd", jacklib.JackNoStartServer, None)
+
+        if not client:
+            return False
+
+        self.fJackClient = client
+        self.fShutdown   = False
+
+        jacklib.set_port_registration_callback(client, self.JackPortRegistrationCallback, None)
+        jacklib.set_port_connect_callback(client, self.JackPortConnectCallback, None)
+        jacklib.set_port_rename_callback(client, self.JackPortRenameCallback, None)
+        jacklib.on_shutdown(client, self.JackShutdownCallback, None)
+
+        # Activate first, so no event is missed; the ones already in the snapshot are ignored later on
+        jacklib.activate(client)
+
+        snapshot = get_graph_snapshot(client, True)
+
+        for portName, portInfo in snapshot.ports.items():
+            self.addPort(portName, portInfo)
+
+        for portOutName, portInName in snapshot.connections:
+            self.addConnection(portOutName, portInName)
+
+        self.fSerial += 1
+        self.broadcast(self.snapshotMessage())
+        return True
+
+    def jackDisconnect(self, closeClient):
+        if closeClient and self.fJackClient:
+            jacklib.deactivate(self.fJackClient)
+            jacklib.client_close(self.fJackClient)
+
+        self.fJackClient = None
+
+        with self.fEventsLock:
+            self.fEvents.clear()
+            self.fEventsDeadline = None
+
+        self.clearGraph()
+        self.fSerial += 1
+        self.broadcast({"type": "reset", "serial": self.fSerial})
+
+    def queueEvent(self):
+        if self.fEventsDeadline is None:
+            self.fEventsDeadline = time() + GRAPHD_EVENTS_DELAY
+            os.write(self.fWakeWrite, b"x")
+
+    def JackPortRegistrationCallback(self, portId, registerYesNo, arg):
+        # The name must be read now, the port will be gone once the event is handled
+        portNameR = "" if registerYesNo else str(jacklib.port_name(jacklib.port_by_id(self.fJackClient, portId)), encoding="utf-8")
+
+        with self.fEventsLock:
+            self.fEvents.portRegistration(portId, bool(registerYesNo), portNameR)
+            self.queueEvent()
+
+    def JackPortConnectCallback(self, portA, portB, connectYesNo, arg):
+        # Same as above, the ids may be gone or reused by the time the event is handled
+        portNameA = self.portNameById(portA)
+        portNameB = self.portNameById(portB)
+
+        if portNameA is None or portNameB is None:
+            return
+
+        with self.fEventsLock:
+            self.fEvents.portConnection(portA, portB, bool(connectYesNo), portNameA, portNameB)
+            self.queueEvent()
+
+    def JackPortRenameCallback(self, portId, oldName, newName, arg):
+        with self.fEventsLock:
+            self.fEvents.portRename(portId, str(oldName, encoding="utf-8"), str(newName, encoding="utf-8"))
+            self.queueEvent()
+        return 0
+
+    def JackShutdownCallback(self, arg):
+        self.fShutdown = True
+        os.write(self.fWakeWrite, b"x")
+
+    def portNameById(self, portId):
+        portPtr = jacklib.port_by_id(self.fJackClient, portId)
+        return str(jacklib.port_name(portPtr), encoding="utf-8") if portPtr else None
+
+    # Applies the queued events to the graph, and sends what changed to subscribers
+    def handleEvents(self):
+        if not self.fJackClient:
+            return
+
+        with self.fEventsLock:
+            if self.fEvents.isEmpty():
+                self.fEventsDeadline = None
+                return
+
+            renames, disconnections, unregistrations, registrations, connections = self.fEvents.takeEvents()
+            self.fEventsDeadline = None
+
+        renamedPorts = []
+        removedConnections = []
+        removedPorts = []
+        addedPorts = []
+        addedConnections = []
+
+        for portId, oldName, newName in renames:
+            if self.renamePort(oldName, newName):
+                renamedPorts.append([oldName, newName])
+
+        for portNameA, portNameB in disconnections:
+            if self.removeConnection(portNameA, portNameB):
+                removedConnections.append([portNameA, portNameB])
+
+        for portId, portNameR in unregistrations:
+            if self.removePort(portNameR, removedConnections):
+                removedPorts.append(portNameR)
+
+        for portId in registrations:
+            portPtr = jacklib.port_by_id(self.fJackClient, portId)
+
+            if not portPtr:
+                continue
+
+            portName = str(jacklib.port_name(portPtr), encoding="utf-8")
+            portInfo = get_port_info(portPtr, True)
+
+            if self.addPort(portName, portInfo):
+                addedPorts.append(_portToJson(portName, portInfo))
+
+        for portNameA, portNameB in connections:
+            if self.addConnection(portNameA, portNameB):
+                addedConnections.append([portNameA, portNameB])
+
+        if not (renamedPorts or removedConnections or removedPorts or addedPorts or addedConnections):
+            return
+
+        self.fSerial += 1
+        self.broadcast({
+            "type": "diff",
+            "serial": self.fSerial,
+            "renamedPorts": renamedPorts,
+            "removedConnections": removedConnections,
+            "removedPorts": removedPorts,
+            "addedPorts": addedPorts,
+            "addedConnections": addedConnections
+        })
+
+    # -----------------------------------------------------------------
+    # Main loop
+
+    def stop(self):
+        self.fRunning = False
+        os.write(self.fWakeWrite, b"x")
+
+    def run(self):
+        while self.fRunning:
+            if self.fShutdown:
+                self.jackDisconnect(False)
+
+            if not self.fJackClient and time() - self.fLastConnectTry >= GRAPHD_RECONNECT_DELAY:
+                self.jackConnect()
+
+            if not self.fJackClient:
+                timeout = GRAPHD_RECONNECT_DELAY
+            elif self.fEventsDeadline is not None:
+                timeout = max(0.0, self.fEventsDeadline - time())
+            else:
+                timeout = None
+
+            readList  = [self.fServer, self.fWakeRead] + [client.sock for client in self.fClients]
+            writeList = [client.sock for client in self.fClients if client.outData]
+
+            try:
+                readable, writable, errors = select.select(readList, writeList, [], timeout)
+            except (select.error, OSError):
+                continue
+
+            if self.fWakeRead in readable:
+                os.read(self.fWakeRead, 4096)
+
+            if self.fServer in readable:
+                self.acceptClient()
+
+            for client in list(self.fClients):
+                if client.sock in readable:
+                    self.readClient(client)
+
+            if self.fEventsDeadline is not None and time() >= self.fEventsDeadline:
+                self.handleEvents()
+
+            for client in list(self.fClients):
+                if client in self.fClients and client.sock in writable and client.outData:
+                    self.writeClient(client)
+
+        self.close()
+
+    def close(self):
+        if self.fJackClient:
+            self.jackDisconnect(True)
+
+        for client in list(self.fClients):
+            self.dropClient(client)
+
+        if self.fServer is not None:
+            self.fServer.close()
+            self.fServer = None
+
+            if os.path.exists(self.fSocketPath):
+                os.remove(self.fSocketPath)
+
+        os.close(self.fWakeRead)
+        os.close(self.fWakeWrite)
+
+#--------------- main ------------------
+if __name__ == '__main__':
+    if not jacklib:
+        print("cadence-graphd needs JACK, which is not available in this system")
+        sys.exit(1)
+
+    daemon = GraphDaemon(get_graphd_socket_path())
+
+    if not daemon.listen():
+        print("cadence-graphd is already running")
+        sys.exit(0)
+
+    def signal_handler(sig, frame=0):
+        daemon.stop()
+
+    signal(SIGINT, signal_handler)
+    signal(SIGTERM, signal_handler)
+
+    print("cadence-graphd started, listening on %s" % daemon.fSocketPath)
+    daemon.run()
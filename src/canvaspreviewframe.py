@@ -19,8 +19,8 @@
 # ------------------------------------------------------------------------------------------------------------
 # Imports (Global)
 
-from PyQt4.QtCore import Qt, QRectF, QTimer, SIGNAL, SLOT
-from PyQt4.QtGui import QBrush, QColor, QCursor, QFrame, QPainter, QPen
+from PyQt4.QtCore import pyqtSlot, Qt, QRectF, QTimer, SIGNAL, SLOT
+from PyQt4.QtGui import QBrush, QColor, QCursor, QFrame, QPainter, QPen, QPixmap
 
 # ------------------------------------------------------------------------------------------------------------
 # Static Variables
@@ -30,6 +30,9 @@ iY = 1
 iWidth  = 2
 iHeight = 3
 
+# Minimum time between scene renders, in ms
+RENDER_INTERVAL = 250
+
 # ------------------------------------------------------------------------------------------------------------
 # Widget Class
 
@@ -58,10 +61,23 @@ class CanvasPreviewFrame(QFrame):
         self.fViewPadY = 0.0
         self.fViewRect = [0.0, 0.0, 10.0, 10.0]
 
+        # Scene thumbnail, re-rendered only when the scene changes
+        self.fPixmap      = None
+        self.fPixmapDirty = True
+
+        self.fRenderTimer = QTimer(self)
+        self.fRenderTimer.setInterval(RENDER_INTERVAL)
+        self.fRenderTimer.setSingleShot(True)
+        self.connect(self.fRenderTimer, SIGNAL("timeout()"), SLOT("slot_renderPixmap()"))
+
     def init(self, scene, realWidth, realHeight, useCustomPaint = False):
         padding = 6
 
+        if self.fScene is not None:
+            self.disconnect(self.fScene, SIGNAL("changed(QList<QRectF>)"), self.slot_sceneChanged)
+
         self.fScene = scene
+        self.connect(self.fScene, SIGNAL("changed(QList<QRectF>)"), self.slot_sceneChanged)
         self.fFakeWidth  = float(realWidth) / 15
         self.fFakeHeight = float(realHeight) / 15
 
@@ -71,6 +87,9 @@ class CanvasPreviewFrame(QFrame):
         self.fRenderTarget.setWidth(realWidth)
         self.fRenderTarget.setHeight(realHeight)
 
+        self.fPixmap = None
+        self.fPixmapDirty = True
+
         if self.fUseCustomPaint != useCustomPaint:
             self.fUseCustomPaint = useCustomPaint
             self.repaint()
@@ -86,14 +105,16 @@ class CanvasPreviewFrame(QFrame):
     def setViewPosX(self, xp):
         x = self.fFakeWidth*xp
         xRatio = (x / self.fFakeWidth) * self.fViewRect[iWidth] / self.fScale
+        oldRect = self.getViewRect()
         self.fViewRect[iX] = x - xRatio + self.fRenderSource.x()
-        self.update()
+        self.updateViewRect(oldRect)
 
     def setViewPosY(self, yp):
         y = self.fFakeHeight*yp
         yRatio = (y / self.fFakeHeight) * self.fViewRect[iHeight] / self.fScale
+        oldRect = self.getViewRect()
         self.fViewRect[iY] = y - yRatio + self.fRenderSource.y()
-        self.update()
+        self.updateViewRect(oldRect)
 
     def setViewScale(self, scale):
         self.fScale = scale
@@ -111,6 +132,62 @@ class CanvasPreviewFrame(QFrame):
         self.fViewBrush = QBrush(brushColor)
         self.fViewPen   = QPen(penColor, 1)
 
+    def getViewRect(self):
+        maxWidth  = self.fViewRect[iWidth]  / self.fScale
+        maxHeight = self.fViewRect[iHeight] / self.fScale
+
+        if maxWidth > self.fFakeWidth:
+            maxWidth = self.fFakeWidth
+        if maxHeight > self.fFakeHeight:
+            maxHeight = self.fFakeHeight
+
+        return QRectF(self.fViewRect[iX], self.fViewRect[iY], maxWidth, maxHeight)
+
+    # Repaint only the area covered by the old and new view rectangles
+    def updateViewRect(self, oldRect):
+        self.update(oldRect.united(self.getViewRect()).toAlignedRect().adjusted(-1, -1, 2, 2))
+
+    def renderPixmap(self):
+        width  = int(self.fFakeWidth)
+        height = int(self.fFakeHeight)
+
+        if width <= 0 or height <= 0:
+            self.fPixmap = None
+            return
+
+        if self.fPixmap is None or self.fPixmap.width() != width or self.fPixmap.height() != height:
+            self.fPixmap = QPixmap(width, height)
+
+        self.fPixmap.fill(Qt.transparent)
+
+        painter = QPainter(self.fPixmap)
+        self.fScene.render(painter, QRectF(0, 0, width, height), self.fRenderTarget, Qt.KeepAspectRatio)
+        painter.end()
+
+        self.fPixmapDirty = False
+
+    @pyqtSlot()
+    def slot_renderPixmap(self):
+        if self.fPixmapDirty and self.isVisible():
+            self.renderPixmap()
+            self.update(self.fRenderSource.toAlignedRect())
+
+    def slot_sceneChanged(self, region):
+        if self.fPixmapDirty:
+            return
+
+        for rect in region:
+            if rect.intersects(self.fRenderTarget):
+                break
+        else:
+            return
+
+        self.fPixmapDirty = True
+
+        # Throttle, not debounce, so the preview keeps up while dragging
+        if not self.fRenderTimer.isActive():
+            self.fRenderTimer.start()
+
     def handleMouseEvent(self, eventX, eventY):
         x = float(eventX) - self.fRenderSource.x() - (self.fViewRect[iWidth]  / self.fScale / 2)
         y = float(eventY) - self.fRenderSource.y() - (self.fViewRect[iHeight] / self.fScale / 2)
@@ -133,9 +210,10 @@ class CanvasPreviewFrame(QFrame):
         elif y > self.fFakeHeight - maxHeight:
             y = self.fFakeHeight - maxHeight
 
+        oldRect = self.getViewRect()
         self.fViewRect[iX] = x + self.fRenderSource.x()
         self.fViewRect[iY] = y + self.fRenderSource.y()
-        self.update()
+        self.updateViewRect(oldRect)
 
         self.emit(SIGNAL("miniCanvasMoved(double, double)"), x * self.fScale / self.fFakeWidth, y * self.fScale / self.fFakeHeight)
 
@@ -178,25 +256,26 @@ class CanvasPreviewFrame(QFrame):
             painter.setPen(self.fViewBg)
             painter.drawRoundRect(2, 2, self.width()-6, self.height()-6, 3, 3)
 
-        self.fScene.render(painter, self.fRenderSource, self.fRenderTarget, Qt.KeepAspectRatio)
+        if self.fPixmap is None:
+            self.renderPixmap()
 
-        maxWidth  = self.fViewRect[iWidth]  / self.fScale
-        maxHeight = self.fViewRect[iHeight] / self.fScale
-
-        if maxWidth > self.fFakeWidth:
-            maxWidth = self.fFakeWidth
-        if maxHeight > self.fFakeHeight:
-            maxHeight = self.fFakeHeight
+        if self.fPixmap is not None:
+            painter.drawPixmap(self.fRenderSource.topLeft(), self.fPixmap)
 
         painter.setBrush(self.fViewBrush)
         painter.setPen(self.fViewPen)
-        painter.drawRect(self.fViewRect[iX], self.fViewRect[iY], maxWidth, maxHeight)
+        painter.drawRect(self.getViewRect())
 
         if self.fUseCustomPaint:
             event.accept()
         else:
             QFrame.paintEvent(self, event)
 
+    def showEvent(self, event):
+        if self.fPixmapDirty and self.fPixmap is not None:
+            self.fRenderTimer.start()
+        QFrame.showEvent(self, event)
+
     def resizeEvent(self, event):
         self.fRenderSource = self.getRenderSource()
         if self.fRealParent:
@@ -21,7 +21,6 @@
 
 from PyQt4.QtCore import pyqtSlot, QSettings
 from PyQt4.QtGui import QApplication, QDialog, QDialogButtonBox, QTableWidgetItem
-from PyQt4.QtXml import QDomDocument
 
 # ------------------------------------------------------------------------------------------------------------
 # Imports (Custom Stuff)
@@ -35,6 +34,12 @@ import ui_catarina_removeport
 import ui_catarina_renameport
 import ui_catarina_connectports
 import ui_catarina_disconnectports
+from catarina_file import iGroupId, iGroupName, iGroupSplit, iGroupIcon
+from catarina_file import iGroupPosId, iGroupPosX_o, iGroupPosY_o, iGroupPosX_i, iGroupPosY_i
+from catarina_file import iPortGroup, iPortId, iPortName, iPortMode, iPortType
+from catarina_file import iConnId, iConnOutput, iConnInput
+from catarina_file import CATARINA_BINARY_EXT, CatarinaPatchbay, load_patchbay, save_patchbay
+from catarina_journal import *
 from shared_canvasjack import *
 from shared_settings import *
 
@@ -47,30 +52,6 @@ try:
 except:
     hasGL = False
 
-# ------------------------------------------------------------------------------------------------------------
-# Static Variables
-
-iGroupId    = 0
-iGroupName  = 1
-iGroupSplit = 2
-iGroupIcon  = 3
-
-iGroupPosId  = 0
-iGroupPosX_o = 1
-iGroupPosY_o = 2
-iGroupPosX_i = 3
-iGroupPosY_i = 4
-
-iPortGroup = 0
-iPortId    = 1
-iPortName  = 2
-iPortMode  = 3
-iPortType  = 4
-
-iConnId     = 0
-iConnOutput = 1
-iConnInput  = 2
-
 # ------------------------------------------------------------------------------------------------------------
 # Add Group Dialog
 
@@ -624,6 +605,8 @@ class CatarinaMainW(AbstractCanvasJackClass):
         self.ui.act_patchbay_rename_port.setIcon(getIcon("edit-rename"))
         self.ui.act_patchbay_connect_ports.setIcon(getIcon("network-connect"))
         self.ui.act_patchbay_disconnect_ports.setIcon(getIcon("network-disconnect"))
+        self.ui.act_edit_undo.setIcon(getIcon("edit-undo"))
+        self.ui.act_edit_redo.setIcon(getIcon("edit-redo"))
         self.ui.b_group_add.setIcon(getIcon("list-add"))
         self.ui.b_group_remove.setIcon(getIcon("edit-delete"))
         self.ui.b_group_rename.setIcon(getIcon("edit-rename"))
@@ -667,6 +650,8 @@ class CatarinaMainW(AbstractCanvasJackClass):
         self.connect(self.ui.b_project_open, SIGNAL("clicked()"), SLOT("slot_projectOpen()"))
         self.connect(self.ui.b_project_save, SIGNAL("clicked()"), SLOT("slot_projectSave()"))
         self.connect(self.ui.b_project_save_as, SIGNAL("clicked()"), SLOT("slot_projectSaveAs()"))
+        self.connect(self.ui.act_edit_undo, SIGNAL("triggered()"), SLOT("slot_undo()"))
+        self.connect(self.ui.act_edit_redo, SIGNAL("triggered()"), SLOT("slot_redo()"))
         self.connect(self.ui.act_patchbay_add_group, SIGNAL("triggered()"), SLOT("slot_groupAdd()"))
         self.connect(self.ui.act_patchbay_remove_group, SIGNAL("triggered()"), SLOT("slot_groupRemove()"))
         self.connect(self.ui.act_patchbay_rename_group, SIGNAL("triggered()"), SLOT("slot_groupRename()"))
@@ -696,6 +681,9 @@ class CatarinaMainW(AbstractCanvasJackClass):
         # Dummy timer to keep events active
         self.fUpdateTimer = self.startTimer(1000)
 
+        # Undo/Redo history
+        self.fJournal = CatarinaJournal()
+
         # Start Empty Project
         self.slot_projectNew()
 
@@ -712,29 +700,25 @@ class CatarinaMainW(AbstractCanvasJackClass):
                     QMessageBox.warning(self, self.tr("Warning"), self.tr("There is already a group with this name"))
                     return
 
-            patchcanvas.renameGroup(group_id, new_group_name)
-
             for group in self.m_group_list:
                 if group[iGroupId] == group_id:
-                    group[iGroupName] = new_group_name
+                    self.journalDo(self.tr("Rename Group"), [(JOURNAL_RENAME_GROUP, group, group[iGroupName], new_group_name)])
                     break
 
         elif action == patchcanvas.ACTION_GROUP_SPLIT:
             group_id = value1
-            patchcanvas.splitGroup(group_id)
 
             for group in self.m_group_list:
                 if group[iGroupId] == group_id:
-                    group[iGroupSplit] = True
+                    self.journalDo(self.tr("Split Group"), [(JOURNAL_SPLIT_GROUP, group, group[iGroupSplit], True)])
                     break
 
         elif action == patchcanvas.ACTION_GROUP_JOIN:
             group_id = value1
-            patchcanvas.joinGroup(group_id)
 
             for group in self.m_group_list:
                 if group[iGroupId] == group_id:
-                    group[iGroupSplit] = False
+                    self.journalDo(self.tr("Join Group"), [(JOURNAL_SPLIT_GROUP, group, group[iGroupSplit], False)])
                     break
 
         elif action == patchcanvas.ACTION_PORT_INFO:
@@ -797,87 +781,159 @@ class CatarinaMainW(AbstractCanvasJackClass):
         elif action == patchcanvas.ACTION_PORT_RENAME:
             port_id = value1
             new_port_name = value_str
-            patchcanvas.renamePort(port_id, new_port_name)
 
             for port in self.m_port_list:
                 if port[iPortId] == port_id:
-                    port[iPortName] = new_port_name
+                    self.journalDo(self.tr("Rename Port"), [(JOURNAL_RENAME_PORT, port, port[iPortName], new_port_name)])
                     break
 
         elif action == patchcanvas.ACTION_PORTS_CONNECT:
             connection_id = self.m_last_connection_id
             port_out_id   = value1
             port_in_id    = value2
-            patchcanvas.connectPorts(connection_id, port_out_id, port_in_id)
 
             conn_obj = [None, None, None]
             conn_obj[iConnId]     = connection_id
             conn_obj[iConnOutput] = port_out_id
             conn_obj[iConnInput]  = port_in_id
 
-            self.m_connection_list.append(conn_obj)
+            self.journalDo(self.tr("Connect Ports"), [(JOURNAL_CONNECT, conn_obj)])
             self.m_last_connection_id += 1
 
         elif action == patchcanvas.ACTION_PORTS_DISCONNECT:
             connection_id = value1
-            patchcanvas.disconnectPorts(connection_id)
 
             for connection in self.m_connection_list:
                 if connection[iConnId] == connection_id:
-                    self.m_connection_list.remove(connection)
+                    self.journalDo(self.tr("Disconnect Ports"), [(JOURNAL_DISCONNECT, connection)])
                     break
 
     def initPorts(self):
-        for group in self.m_group_list:
-            patchcanvas.addGroup(group[iGroupId], group[iGroupName], patchcanvas.SPLIT_YES if (group[iGroupSplit]) else patchcanvas.SPLIT_NO, group[iGroupIcon])
+        with patchcanvas.bulkUpdate():
+            for group in self.m_group_list:
+                patchcanvas.addGroup(group[iGroupId], group[iGroupName], patchcanvas.SPLIT_YES if (group[iGroupSplit]) else patchcanvas.SPLIT_NO, group[iGroupIcon])
 
-        for group_pos in self.m_group_list_pos:
-            patchcanvas.setGroupPosFull(group_pos[iGroupPosId], group_pos[iGroupPosX_o], group_pos[iGroupPosY_o], group_pos[iGroupPosX_i], group_pos[iGroupPosY_i])
+            for group_pos in self.m_group_list_pos:
+                patchcanvas.setGroupPosFull(group_pos[iGroupPosId], group_pos[iGroupPosX_o], group_pos[iGroupPosY_o], group_pos[iGroupPosX_i], group_pos[iGroupPosY_i])
 
-        for port in self.m_port_list:
-            patchcanvas.addPort(port[iPortGroup], port[iPortId], port[iPortName], port[iPortMode], port[iPortType])
+            for port in self.m_port_list:
+                patchcanvas.addPort(port[iPortGroup], port[iPortId], port[iPortName], port[iPortMode], port[iPortType])
 
-        for connection in self.m_connection_list:
-            patchcanvas.connectPorts(connection[iConnId], connection[iConnOutput], connection[iConnInput])
+            for connection in self.m_connection_list:
+                patchcanvas.connectPorts(connection[iConnId], connection[iConnOutput], connection[iConnInput])
 
         self.m_group_list_pos = []
         patchcanvas.updateZValues()
 
+    # Applies journal operations to the patchbay lists and canvas, all in one canvas update.
+    # Removals from the lists are done in a single pass per list, and only when needed.
+    def journalApply(self, ops):
+        removedGroups = set()
+        removedPorts  = set()
+        removedConns  = set()
+
+        def flushRemoved(objList, removed):
+            if removed:
+                objList[:] = [obj for obj in objList if id(obj) not in removed]
+                removed.clear()
+
+        with patchcanvas.bulkUpdate():
+            for op in ops:
+                action = op[0]
+
+                if action == JOURNAL_ADD_GROUP:
+                    group, group_pos = op[1], op[2]
+                    flushRemoved(self.m_group_list, removedGroups)
+                    patchcanvas.addGroup(group[iGroupId], group[iGroupName], patchcanvas.SPLIT_YES if group[iGroupSplit] else patchcanvas.SPLIT_NO, group[iGroupIcon])
+                    if group_pos:
+                        patchcanvas.setGroupPosFull(group[iGroupId], group_pos[0], group_pos[1], group_pos[2], group_pos[3])
+                    self.m_group_list.append(group)
+
+                elif action == JOURNAL_REMOVE_GROUP:
+                    group, group_pos = op[1], op[2]
+                    group_pos_o = patchcanvas.getGroupPos(group[iGroupId], patchcanvas.PORT_MODE_OUTPUT)
+                    group_pos_i = patchcanvas.getGroupPos(group[iGroupId], patchcanvas.PORT_MODE_INPUT)
+                    group_pos[:] = [group_pos_o.x(), group_pos_o.y(), group_pos_i.x(), group_pos_i.y()]
+                    patchcanvas.removeGroup(group[iGroupId])
+                    removedGroups.add(id(group))
+
+                elif action == JOURNAL_RENAME_GROUP:
+                    group = op[1]
+                    group[iGroupName] = op[3]
+                    patchcanvas.renameGroup(group[iGroupId], op[3])
+
+                elif action == JOURNAL_SPLIT_GROUP:
+                    group = op[1]
+                    group[iGroupSplit] = op[3]
+                    if op[3]:
+                        patchcanvas.splitGroup(group[iGroupId])
+                    else:
+                        patchcanvas.joinGroup(group[iGroupId])
+
+                elif action == JOURNAL_ADD_PORT:
+                    port = op[1]
+                    flushRemoved(self.m_port_list, removedPorts)
+                    patchcanvas.addPort(port[iPortGroup], port[iPortId], port[iPortName], port[iPortMode], port[iPortType])
+                    self.m_port_list.append(port)
+
+                elif action == JOURNAL_REMOVE_PORT:
+                    port = op[1]
+                    patchcanvas.removePort(port[iPortId])
+                    removedPorts.add(id(port))
+
+                elif action == JOURNAL_RENAME_PORT:
+                    port = op[1]
+                    port[iPortName] = op[3]
+                    patchcanvas.renamePort(port[iPortId], op[3])
+
+                elif action == JOURNAL_CONNECT:
+                    connection = op[1]
+                    flushRemoved(self.m_connection_list, removedConns)
+                    patchcanvas.connectPorts(connection[iConnId], connection[iConnOutput], connection[iConnInput])
+                    self.m_connection_list.append(connection)
+
+                elif action == JOURNAL_DISCONNECT:
+                    connection = op[1]
+                    patchcanvas.disconnectPorts(connection[iConnId])
+                    removedConns.add(id(connection))
+
+            flushRemoved(self.m_group_list, removedGroups)
+            flushRemoved(self.m_port_list, removedPorts)
+            flushRemoved(self.m_connection_list, removedConns)
+
+    def journalDo(self, text, ops):
+        self.journalApply(ops)
+        self.fJournal.record(text, ops)
+        self.updateJournalActions()
+
+    def undo(self, count=1):
+        self.journalApply(self.fJournal.takeUndo(count))
+        self.updateJournalActions()
+
+    def redo(self, count=1):
+        self.journalApply(self.fJournal.takeRedo(count))
+        self.updateJournalActions()
+
+    def updateJournalActions(self):
+        self.ui.act_edit_undo.setEnabled(self.fJournal.canUndo())
+        self.ui.act_edit_redo.setEnabled(self.fJournal.canRedo())
+        self.ui.act_edit_undo.setText(self.tr("&Undo %s") % self.fJournal.undoText() if self.fJournal.canUndo() else self.tr("&Undo"))
+        self.ui.act_edit_redo.setText(self.tr("&Redo %s") % self.fJournal.redoText() if self.fJournal.canRedo() else self.tr("&Redo"))
+
     def saveFile(self, path):
-        content = ("<?xml version='1.0' encoding='UTF-8'?>\n"
-                   "<!DOCTYPE CATARINA>\n"
-                   "<CATARINA VERSION='%s'>\n" % VERSION)
+        patchbay = CatarinaPatchbay()
+        patchbay.groups      = self.m_group_list
+        patchbay.ports       = self.m_port_list
+        patchbay.connections = self.m_connection_list
 
-        content += " <Groups>\n"
-        for i in range(len(self.m_group_list)):
-            group = self.m_group_list[i]
+        for group in self.m_group_list:
             group_id    = group[iGroupId]
-            group_name  = group[iGroupName]
-            group_split = group[iGroupSplit]
-            group_icon  = group[iGroupIcon]
             group_pos_i = patchcanvas.getGroupPos(group_id, patchcanvas.PORT_MODE_INPUT)
             group_pos_o = patchcanvas.getGroupPos(group_id, patchcanvas.PORT_MODE_OUTPUT)
-            content    += "  <g%i> <name>%s</name> <data>%i:%i:%i:%f:%f:%f:%f</data> </g%i>\n" % (i, group_name, group_id, group_split, group_icon, group_pos_o.x(), group_pos_o.y(), group_pos_i.x(), group_pos_i.y(), i)
-        content += " </Groups>\n"
-
-        content += " <Ports>\n"
-        for i in range(len(self.m_port_list)):
-            port = self.m_port_list[i]
-            content += "  <p%i> <name>%s</name> <data>%i:%i:%i:%i</data> </p%i>\n" % (i, port[iPortName], port[iPortGroup], port[iPortId], port[iPortMode], port[iPortType], i)
-        content += " </Ports>\n"
-
-        content += " <Connections>\n"
-        for i in range(len(self.m_connection_list)):
-            connection = self.m_connection_list[i]
-            content += "  <c%i>%i:%i:%i</c%i>\n" % (i, connection[iConnId], connection[iConnOutput], connection[iConnInput], i)
-        content += " </Connections>\n"
-
-        content += "</CATARINA>\n"
+            patchbay.groupPositions.append([group_id, group_pos_o.x(), group_pos_o.y(), group_pos_i.x(), group_pos_i.y()])
 
         try:
-            fd = uopen(path, "w")
-            fd.write(content)
-            fd.close()
+            save_patchbay(path, patchbay, VERSION)
         except:
             QMessageBox.critical(self, self.tr("Error"), self.tr("Failed to save file"))
 
@@ -888,118 +944,29 @@ class CatarinaMainW(AbstractCanvasJackClass):
             return
 
         try:
-            fd = uopen(path, "r")
-            readState = fd.read()
-            fd.close()
+            patchbay = load_patchbay(path)
         except:
             QMessageBox.critical(self, self.tr("Error"), self.tr("Failed to load file"))
             self.m_save_path = None
             return
 
-        self.m_save_path       = path
-        self.m_group_list      = []
-        self.m_group_list_pos  = []
-        self.m_port_list       = []
-        self.m_connection_list = []
-        self.m_last_group_id   = 1
-        self.m_last_port_id    = 1
-        self.m_last_connection_id = 1
-
-        xml = QDomDocument()
-        xml.setContent(readState.encode("utf-8"))
-
-        content = xml.documentElement()
-        if content.tagName() != "CATARINA":
+        if patchbay is None:
             QMessageBox.critical(self, self.tr("Error"), self.tr("Not a valid Catarina file"))
+            self.m_save_path = None
             return
 
-        # Get values from XML - the big code
-        node = content.firstChild()
-        while not node.isNull():
-            if node.toElement().tagName() == "Groups":
-                group_name = ""
-                groups = node.toElement().firstChild()
-                while not groups.isNull():
-                    group = groups.toElement().firstChild()
-                    while not group.isNull():
-                        tag = group.toElement().tagName()
-                        text = group.toElement().text()
-                        if tag == "name":
-                            group_name = text
-                        elif tag == "data":
-                            group_data = text.split(":")
-                            if len(group_data) == 7 and group_data[0].isdigit() and group_data[1].isdigit() and group_data[2].isdigit() and isNumber(group_data[3]) and isNumber(group_data[4]) and isNumber(group_data[5]) and isNumber(group_data[6]):
-                                group_obj = [None, None, None, None]
-                                group_obj[iGroupId]    = int(group_data[0])
-                                group_obj[iGroupName]  = group_name
-                                group_obj[iGroupSplit] = int(group_data[1])
-                                group_obj[iGroupIcon]  = int(group_data[2])
-
-                                group_pos_obj = [None, None, None, None, None]
-                                group_pos_obj[iGroupPosId]  = int(group_data[0])
-                                group_pos_obj[iGroupPosX_o] = float(group_data[3])
-                                group_pos_obj[iGroupPosY_o] = float(group_data[4])
-                                group_pos_obj[iGroupPosX_i] = float(group_data[5])
-                                group_pos_obj[iGroupPosY_i] = float(group_data[6])
-
-                                self.m_group_list.append(group_obj)
-                                self.m_group_list_pos.append(group_pos_obj)
-
-                                group_id = group_obj[iGroupId]
-                                if group_id > self.m_last_group_id:
-                                    self.m_last_group_id = group_id + 1
-                        group = group.nextSibling()
-                    groups = groups.nextSibling()
-
-            elif node.toElement().tagName() == "Ports":
-                port_name = ""
-                ports = node.toElement().firstChild()
-                while not ports.isNull():
-                    port = ports.toElement().firstChild()
-                    while not port.isNull():
-                        tag = port.toElement().tagName()
-                        text = port.toElement().text()
-                        if tag == "name":
-                            port_name = text
-                        elif tag == "data":
-                            port_data = text.split(":")
-                            if len(port_data) == 4 and port_data[0].isdigit() and port_data[1].isdigit() and port_data[2].isdigit() and port_data[3].isdigit():
-                                new_port = [None, None, None, None, None]
-                                new_port[iPortGroup] = int(port_data[0])
-                                new_port[iPortId]    = int(port_data[1])
-                                new_port[iPortName]  = port_name
-                                new_port[iPortMode]  = int(port_data[2])
-                                new_port[iPortType]  = int(port_data[3])
-                                self.m_port_list.append(new_port)
-
-                                if new_port[iPortId] > self.m_last_port_id:
-                                    self.m_last_port_id = new_port[iPortId] + 1
-
-                        port = port.nextSibling()
-                    ports = ports.nextSibling()
-
-            elif node.toElement().tagName() == "Connections":
-                conns = node.toElement().firstChild()
-                while not conns.isNull():
-                    conn_data = conns.toElement().text().split(":")
-                    if len(conn_data) == 3 and conn_data[0].isdigit() and conn_data[1].isdigit() and conn_data[2].isdigit():
-                        conn_obj = [None, None, None]
-                        conn_obj[iConnId]     = int(conn_data[0])
-                        conn_obj[iConnOutput] = int(conn_data[1])
-                        conn_obj[iConnInput]  = int(conn_data[2])
-
-                        connection_id = conn_obj[iConnId]
-                        self.m_connection_list.append(conn_obj)
-
-                        if connection_id >= self.m_last_connection_id:
-                            self.m_last_connection_id = connection_id + 1
-
-                    conns = conns.nextSibling()
-            node = node.nextSibling()
-
-        self.m_last_group_id += 1
-        self.m_last_port_id  += 1
-        self.m_last_connection_id += 1
+        self.m_save_path       = path
+        self.m_group_list      = patchbay.groups
+        self.m_group_list_pos  = patchbay.groupPositions
+        self.m_port_list       = patchbay.ports
+        self.m_connection_list = patchbay.connections
+
+        self.m_last_group_id = max([group[iGroupId] for group in self.m_group_list] or [0]) + 1
+        self.m_last_port_id  = max([port[iPortId] for port in self.m_port_list] or [0]) + 1
+        self.m_last_connection_id = max([connection[iConnId] for connection in self.m_connection_list] or [0]) + 1
+
+        self.fJournal.clear()
+        self.updateJournalActions()
 
         patchcanvas.clear()
         self.initPorts()
@@ -1017,11 +984,13 @@ class CatarinaMainW(AbstractCanvasJackClass):
         self.m_last_port_id  = 1
         self.m_last_connection_id = 1
         self.m_save_path = None
+        self.fJournal.clear()
+        self.updateJournalActions()
         patchcanvas.clear()
 
     @pyqtSlot()
     def slot_projectOpen(self):
-        path = QFileDialog.getOpenFileName(self, self.tr("Load State"), filter=self.tr("Catarina XML Document (*.xml)"))
+        path = QFileDialog.getOpenFileName(self, self.tr("Load State"), filter=self.tr("Catarina Files (*.xml *%s);;Catarina XML Document (*.xml);;Catarina Binary Document (*%s)" % (CATARINA_BINARY_EXT, CATARINA_BINARY_EXT)))
         if path:
             self.loadFile(path)
 
@@ -1034,11 +1003,19 @@ class CatarinaMainW(AbstractCanvasJackClass):
 
     @pyqtSlot()
     def slot_projectSaveAs(self):
-        path = QFileDialog.getSaveFileName(self, self.tr("Save State"), filter=self.tr("Catarina XML Document (*.xml)"))
+        path = QFileDialog.getSaveFileName(self, self.tr("Save State"), filter=self.tr("Catarina XML Document (*.xml);;Catarina Binary Document (*%s)" % CATARINA_BINARY_EXT))
         if path:
             self.m_save_path = path
             self.saveFile(path)
 
+    @pyqtSlot()
+    def slot_undo(self):
+        self.undo()
+
+    @pyqtSlot()
+    def slot_redo(self):
+        self.redo()
+
     @pyqtSlot()
     def slot_groupAdd(self):
         dialog = CatarinaAddGroupW(self, self.m_group_list)
@@ -1046,9 +1023,7 @@ class CatarinaMainW(AbstractCanvasJackClass):
             group_id     = self.m_last_group_id
             group_name   = dialog.ret_group_name
             group_split  = dialog.ret_group_split
-            group_splitR = patchcanvas.SPLIT_YES if group_split else patchcanvas.SPLIT_NO
             group_icon   = patchcanvas.ICON_HARDWARE if group_split else patchcanvas.ICON_APPLICATION
-            patchcanvas.addGroup(group_id, group_name, group_splitR, group_icon)
 
             group_obj = [None, None, None, None]
             group_obj[iGroupId]    = group_id
@@ -1056,7 +1031,7 @@ class CatarinaMainW(AbstractCanvasJackClass):
             group_obj[iGroupSplit] = group_split
             group_obj[iGroupIcon]  = group_icon
 
-            self.m_group_list.append(group_obj)
+            self.journalDo(self.tr("Add Group"), [(JOURNAL_ADD_GROUP, group_obj, [])])
             self.m_last_group_id += 1
 
     @pyqtSlot()
@@ -1065,38 +1040,15 @@ class CatarinaMainW(AbstractCanvasJackClass):
             dialog = CatarinaRemoveGroupW(self, self.m_group_list)
             if dialog.exec_():
                 group_id = dialog.ret_group_id
+                port_ids = set(port[iPortId] for port in self.m_port_list if port[iPortGroup] == group_id)
 
-                # Remove port connections first
-                for port in self.m_port_list:
-                    if port[iPortGroup] == group_id:
-                        port_id = port[iPortId]
-
-                        h = 0
-                        for i in range(len(self.m_connection_list)):
-                            connection = self.m_connection_list[i-h]
-                            if connection[iConnOutput] == port_id or connection[iConnInput] == port_id:
-                                patchcanvas.disconnectPorts(connection[iConnId])
-                                self.m_connection_list.pop(i-h)
-                                h += 1
-
-                # Remove ports
-                h = 0
-                for i in range(len(self.m_port_list)):
-                    port = self.m_port_list[i-h]
-                    if port[iPortGroup] == group_id:
-                        port_id = port[iPortId]
-
-                        patchcanvas.removePort(port[iPortId])
-                        self.m_port_list.pop(i-h)
-                        h += 1
-
-                # Now remove group
-                patchcanvas.removeGroup(group_id)
+                # Remove port connections first, then ports, then the group
+                ops  = [(JOURNAL_DISCONNECT, connection) for connection in self.m_connection_list
+                        if connection[iConnOutput] in port_ids or connection[iConnInput] in port_ids]
+                ops += [(JOURNAL_REMOVE_PORT, port) for port in self.m_port_list if port[iPortGroup] == group_id]
+                ops += [(JOURNAL_REMOVE_GROUP, group, []) for group in self.m_group_list if group[iGroupId] == group_id]
 
-                for group in self.m_group_list:
-                    if group[iGroupId] == group_id:
-                        self.m_group_list.remove(group)
-                        break
+                self.journalDo(self.tr("Remove Group"), ops)
 
         else:
             QMessageBox.warning(self, self.tr("Warning"), self.tr("Please add a Group first!"))
@@ -1108,11 +1060,10 @@ class CatarinaMainW(AbstractCanvasJackClass):
             if dialog.exec_():
                 group_id = dialog.ret_group_id
                 new_group_name = dialog.ret_new_group_name
-                patchcanvas.renameGroup(group_id, new_group_name)
 
                 for group in self.m_group_list:
                     if group[iGroupId] == group_id:
-                        group[iGroupName] = new_group_name
+                        self.journalDo(self.tr("Rename Group"), [(JOURNAL_RENAME_GROUP, group, group[iGroupName], new_group_name)])
                         break
 
         else:
@@ -1127,7 +1078,6 @@ class CatarinaMainW(AbstractCanvasJackClass):
                 port_name = dialog.ret_port_name
                 port_mode = dialog.ret_port_mode
                 port_type = dialog.ret_port_type
-                patchcanvas.addPort(group_id, self.m_last_port_id, port_name, port_mode, port_type)
 
                 new_port = [None, None, None, None, None]
                 new_port[iPortGroup] = group_id
@@ -1136,7 +1086,7 @@ class CatarinaMainW(AbstractCanvasJackClass):
                 new_port[iPortMode]  = port_mode
                 new_port[iPortType]  = port_type
 
-                self.m_port_list.append(new_port)
+                self.journalDo(self.tr("Add Port"), [(JOURNAL_ADD_PORT, new_port)])
                 self.m_last_port_id += 1
 
         else:
@@ -1149,20 +1099,11 @@ class CatarinaMainW(AbstractCanvasJackClass):
             if dialog.exec_():
                 port_id = dialog.ret_port_id
 
-                h = 0
-                for i in range(len(self.m_connection_list)):
-                    connection = self.m_connection_list[i-h]
-                    if connection[iConnOutput] == port_id or connection[iConnInput] == port_id:
-                        patchcanvas.disconnectPorts(connection[iConnId])
-                        self.m_connection_list.pop(i-h)
-                        h += 1
+                ops  = [(JOURNAL_DISCONNECT, connection) for connection in self.m_connection_list
+                        if connection[iConnOutput] == port_id or connection[iConnInput] == port_id]
+                ops += [(JOURNAL_REMOVE_PORT, port) for port in self.m_port_list if port[iPortId] == port_id]
 
-                patchcanvas.removePort(port_id)
-
-                for port in self.m_port_list:
-                    if port[iPortId] == port_id:
-                        self.m_port_list.remove(port)
-                        break
+                self.journalDo(self.tr("Remove Port"), ops)
 
         else:
             QMessageBox.warning(self, self.tr("Warning"), self.tr("Please add a Port first!"))
@@ -1174,11 +1115,10 @@ class CatarinaMainW(AbstractCanvasJackClass):
             if dialog.exec_():
                 port_id = dialog.ret_port_id
                 new_port_name = dialog.ret_new_port_name
-                patchcanvas.renamePort(port_id, new_port_name)
 
                 for port in self.m_port_list:
                     if port[iPortId] == port_id:
-                        port[iPortName] = new_port_name
+                        self.journalDo(self.tr("Rename Port"), [(JOURNAL_RENAME_PORT, port, port[iPortName], new_port_name)])
                         break
 
         else:
@@ -1198,14 +1138,12 @@ class CatarinaMainW(AbstractCanvasJackClass):
                         QMessageBox.warning(self, self.tr("Warning"), self.tr("Ports already connected!"))
                         return
 
-                patchcanvas.connectPorts(connection_id, port_out_id, port_in_id)
-
                 conn_obj = [None, None, None]
                 conn_obj[iConnId]     = connection_id
                 conn_obj[iConnOutput] = port_out_id
                 conn_obj[iConnInput]  = port_in_id
 
-                self.m_connection_list.append(conn_obj)
+                self.journalDo(self.tr("Connect Ports"), [(JOURNAL_CONNECT, conn_obj)])
                 self.m_last_connection_id += 1
 
         else:
@@ -1216,18 +1154,14 @@ class CatarinaMainW(AbstractCanvasJackClass):
         if len(self.m_connection_list) > 0:
             dialog = CatarinaDisconnectPortsW(self, self.m_group_list, self.m_port_list, self.m_connection_list)
             if dialog.exec_():
-                connection_id = -1
                 port_out_id = dialog.ret_port_out_id
                 port_in_id  = dialog.ret_port_in_id
 
                 for connection in self.m_connection_list:
                     if connection[iConnOutput] == port_out_id and connection[iConnInput] == port_in_id:
-                        connection_id = connection[iConnId]
-                        self.m_connection_list.remove(connection)
+                        self.journalDo(self.tr("Disconnect Ports"), [(JOURNAL_DISCONNECT, connection)])
                         break
 
-                patchcanvas.disconnectPorts(connection_id)
-
         else:
             QMessageBox.warning(self, self.tr("Warning"), self.tr("Please make some Connections first!"))
 
@@ -1291,6 +1225,7 @@ class CatarinaMainW(AbstractCanvasJackClass):
 
     def closeEvent(self, event):
         self.saveSettings()
+        self.fPositionJournal.flush()
         patchcanvas.clear()
         QMainWindow.closeEvent(self, event)
 
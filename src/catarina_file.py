@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Catarina patchbay files, XML and compact binary formats
+# Copyright (C) 2010-2013 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the COPYING file
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+import struct
+from xml.etree.ElementTree import iterparse, ParseError
+from xml.sax.saxutils import escape, quoteattr
+
+# ------------------------------------------------------------------------------------------------------------
+# Static Variables
+
+iGroupId    = 0
+iGroupName  = 1
+iGroupSplit = 2
+iGroupIcon  = 3
+
+iGroupPosId  = 0
+iGroupPosX_o = 1
+iGroupPosY_o = 2
+iGroupPosX_i = 3
+iGroupPosY_i = 4
+
+iPortGroup = 0
+iPortId    = 1
+iPortName  = 2
+iPortMode  = 3
+iPortType  = 4
+
+iConnId     = 0
+iConnOutput = 1
+iConnInput  = 2
+
+CATARINA_BINARY_EXT     = ".cbin"
+CATARINA_BINARY_MAGIC   = b"CTRN"
+CATARINA_BINARY_VERSION = 1
+
+# magic, version, number of groups, ports and connections
+CATARINA_BINARY_HEADER = struct.Struct("<4sIIII")
+
+# id, split, icon, output x, output y, input x, input y, name length (utf-8 name follows)
+CATARINA_BINARY_GROUP = struct.Struct("<iiiddddH")
+
+# group id, id, mode, type, name length (utf-8 name follows)
+CATARINA_BINARY_PORT = struct.Struct("<iiiiH")
+
+# id, output port id, input port id
+CATARINA_BINARY_CONNECTION = struct.Struct("<iii")
+
+# ------------------------------------------------------------------------------------------------------------
+# Patchbay contents, lists use the same layout as Catarina's
+
+class CatarinaPatchbay(object):
+    __slots__ = [
+        'groups',         # [id, name, split, icon]
+        'groupPositions', # [id, output x, output y, input x, input y]
+        'ports',          # [group id, id, name, mode, type]
+        'connections'     # [id, output port id, input port id]
+    ]
+
+    def __init__(self):
+        self.groups         = []
+        self.groupPositions = []
+        self.ports          = []
+        self.connections    = []
+
+# ------------------------------------------------------------------------------------------------------------
+# XML format
+
+def _parseXmlGroup(patchbay, name, data):
+    data = data.split(":")
+
+    if len(data) != 7:
+        return
+
+    try:
+        groupObj = [int(data[0]), name, int(data[1]), int(data[2])]
+        groupPosObj = [groupObj[iGroupId], float(data[3]), float(data[4]), float(data[5]), float(data[6])]
+    except ValueError:
+        return
+
+    patchbay.groups.append(groupObj)
+    patchbay.groupPositions.append(groupPosObj)
+
+def _parseXmlPort(patchbay, name, data):
+    data = data.split(":")
+
+    if len(data) != 4:
+        return
+
+    try:
+        portObj = [int(data[0]), int(data[1]), name, int(data[2]), int(data[3])]
+    except ValueError:
+        return
+
+    patchbay.ports.append(portObj)
+
+def _parseXmlConnection(patchbay, data):
+    data = data.split(":")
+
+    if len(data) != 3:
+        return
+
+    try:
+        connObj = [int(data[0]), int(data[1]), int(data[2])]
+    except ValueError:
+        return
+
+    patchbay.connections.append(connObj)
+
+# Reads the file as a stream, each item is dropped from memory as soon as it's parsed.
+# Returns None if this is not a valid Catarina file, raises on read errors.
+def load_patchbay_xml(path):
+    patchbay = CatarinaPatchbay()
+    section  = None
+    depth    = 0
+
+    try:
+        for event, elem in iterparse(path, events=("start", "end")):
+            if event == "start":
+                if depth == 0 and elem.tag != "CATARINA":
+                    return None
+                if depth == 1:
+                    section = elem
+                depth += 1
+                continue
+
+            depth -= 1
+
+            if depth != 2:
+                continue
+
+            if section.tag == "Groups":
+                _parseXmlGroup(patchbay, elem.findtext("name", ""), elem.findtext("data", ""))
+            elif section.tag == "Ports":
+                _parseXmlPort(patchbay, elem.findtext("name", ""), elem.findtext("data", ""))
+            elif section.tag == "Connections":
+                _parseXmlConnection(patchbay, elem.text or "")
+
+            section.clear()
+
+    except ParseError:
+        return None
+
+    return patchbay
+
+def _xmlLines(patchbay, version):
+    yield ("<?xml version='1.0' encoding='UTF-8'?>\n"
+           "<!DOCTYPE CATARINA>\n"
+           "<CATARINA VERSION=%s>\n" % quoteattr(version))
+
+    groupPositions = dict((groupPos[iGroupPosId], groupPos) for groupPos in patchbay.groupPositions)
+
+    yield " <Groups>\n"
+    for i, group in enumerate(patchbay.groups):
+        groupPos = groupPositions.get(group[iGroupId], (group[iGroupId], 0.0, 0.0, 0.0, 0.0))
+        yield "  <g%i> <name>%s</name> <data>%i:%i:%i:%f:%f:%f:%f</data> </g%i>\n" % (i, escape(group[iGroupName]), group[iGroupId],
+                                                                                      group[iGroupSplit], group[iGroupIcon],
+                                                                                      groupPos[iGroupPosX_o], groupPos[iGroupPosY_o],
+                                                                                      groupPos[iGroupPosX_i], groupPos[iGroupPosY_i], i)
+    yield " </Groups>\n"
+
+    yield " <Ports>\n"
+    for i, port in enumerate(patchbay.ports):
+        yield "  <p%i> <name>%s</name> <data>%i:%i:%i:%i</data> </p%i>\n" % (i, escape(port[iPortName]), port[iPortGroup], port[iPortId],
+                                                                             port[iPortMode], port[iPortType], i)
+    yield " </Ports>\n"
+
+    yield " <Connections>\n"
+    for i, connection in enumerate(patchbay.connections):
+        yield "  <c%i>%i:%i:%i</c%i>\n" % (i, connection[iConnId], connection[iConnOutput], connection[iConnInput], i)
+    yield " </Connections>\n"
+
+    yield "</CATARINA>\n"
+
+def save_patchbay_xml(path, patchbay, version):
+    with open(path, "w", encoding="utf-8", buffering=64*1024) as fd:
+        fd.writelines(_xmlLines(patchbay, version))
+
+# ------------------------------------------------------------------------------------------------------------
+# Compact binary format
+
+# Returns None if this is not a valid file or was written by a newer version, raises on read errors.
+def load_patchbay_binary(path):
+    with open(path, "rb") as fd:
+        data = fd.read()
+
+    if len(data) < CATARINA_BINARY_HEADER.size:
+        return None
+
+    magic, version, groupCount, portCount, connCount = CATARINA_BINARY_HEADER.unpack_from(data)
+
+    if magic != CATARINA_BINARY_MAGIC or version > CATARINA_BINARY_VERSION:
+        return None
+
+    patchbay = CatarinaPatchbay()
+    offset   = CATARINA_BINARY_HEADER.size
+
+    try:
+        for i in range(groupCount):
+            groupId, split, icon, xo, yo, xi, yi, nameSize = CATARINA_BINARY_GROUP.unpack_from(data, offset)
+            offset += CATARINA_BINARY_GROUP.size
+            name    = data[offset:offset+nameSize].decode("utf-8")
+            offset += nameSize
+
+            patchbay.groups.append([groupId, name, split, icon])
+            patchbay.groupPositions.append([groupId, xo, yo, xi, yi])
+
+        for i in range(portCount):
+            groupId, portId, mode, ptype, nameSize = CATARINA_BINARY_PORT.unpack_from(data, offset)
+            offset += CATARINA_BINARY_PORT.size
+            name    = data[offset:offset+nameSize].decode("utf-8")
+            offset += nameSize
+
+            patchbay.ports.append([groupId, portId, name, mode, ptype])
+
+        if len(data) < offset + connCount*CATARINA_BINARY_CONNECTION.size:
+            return None
+
+        patchbay.connections = [list(connection) for connection in CATARINA_BINARY_CONNECTION.iter_unpack(data[offset:offset+connCount*CATARINA_BINARY_CONNECTION.size])]
+
+    except (struct.error, UnicodeDecodeError):
+        return None
+
+    return patchbay
+
+def save_patchbay_binary(path, patchbay):
+    groupPositions = dict((groupPos[iGroupPosId], groupPos) for groupPos in patchbay.groupPositions)
+    chunks = [CATARINA_BINARY_HEADER.pack(CATARINA_BINARY_MAGIC, CATARINA_BINARY_VERSION,
+                                          len(patchbay.groups), len(patchbay.ports), len(patchbay.connections))]
+
+    for group in patchbay.groups:
+        groupPos = groupPositions.get(group[iGroupId], (group[iGroupId], 0.0, 0.0, 0.0, 0.0))
+        name     = group[iGroupName].encode("utf-8")
+        chunks.append(CATARINA_BINARY_GROUP.pack(group[iGroupId], int(group[iGroupSplit]), group[iGroupIcon],
+                                                 groupPos[iGroupPosX_o], groupPos[iGroupPosY_o],
+                                                 groupPos[iGroupPosX_i], groupPos[iGroupPosY_i], len(name)))
+        chunks.append(name)
+
+    for port in patchbay.ports:
+        name = port[iPortName].encode("utf-8")
+        chunks.append(CATARINA_BINARY_PORT.pack(port[iPortGroup], port[iPortId], port[iPortMode], port[iPortType], len(name)))
+        chunks.append(name)
+
+    for connection in patchbay.connections:
+        chunks.append(CATARINA_BINARY_CONNECTION.pack(connection[iConnId], connection[iConnOutput], connection[iConnInput]))
+
+    with open(path, "wb") as fd:
+        fd.write(b"".join(chunks))
+
+# ------------------------------------------------------------------------------------------------------------
+# Format detection
+
+def is_binary_patchbay_file(path):
+    try:
+        with open(path, "rb") as fd:
+            return bool(fd.read(len(CATARINA_BINARY_MAGIC)) == CATARINA_BINARY_MAGIC)
+    except:
+        return False
+
+def load_patchbay(path):
+    if is_binary_patchbay_file(path):
+        return load_patchbay_binary(path)
+    return load_patchbay_xml(path)
+
+# The format is picked from the file extension
+def save_patchbay(path, patchbay, version):
+    if path.lower().endswith(CATARINA_BINARY_EXT):
+        save_patchbay_binary(path, patchbay)
+    else:
+        save_patchbay_xml(path, patchbay, version)
+
+# ------------------------------------------------------------------------------------------------------------
+# Load/save benchmark, run as 'python3 catarina_file.py [number of ports]'
+
+def _benchmarkPatchbay(portCount):
+    patchbay   = CatarinaPatchbay()
+    groupCount = max(1, portCount // 16)
+
+    for i in range(groupCount):
+        groupId = i + 1
+        patchbay.groups.append([groupId, "Group %i" % groupId, int(i % 8 == 0), 1])
+        patchbay.groupPositions.append([groupId, float(i * 40), float(i * 20), float(i * 40 + 200), float(i * 20)])
+
+    for i in range(portCount):
+        portId = i + 1
+        patchbay.ports.append([(i % groupCount) + 1, portId, "port_%i" % portId, 1 if i % 2 else 2, 1 + i % 2])
+
+    for i in range(portCount // 2):
+        patchbay.connections.append([i + 1, (i * 2) + 2, ((i * 2 + 33) % portCount) + 1])
+
+    return patchbay
+
+if __name__ == '__main__':
+    import os
+    import sys
+    from tempfile import mkdtemp
+    from time import time
+
+    portCount = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    patchbay  = _benchmarkPatchbay(portCount)
+    tmpDir    = mkdtemp()
+
+    print("%i groups, %i ports, %i connections" % (len(patchbay.groups), len(patchbay.ports), len(patchbay.connections)))
+
+    for ext in (".xml", CATARINA_BINARY_EXT):
+        path = os.path.join(tmpDir, "benchmark" + ext)
+
+        startTime = time()
+        save_patchbay(path, patchbay, "benchmark")
+        saveTime  = time() - startTime
+
+        startTime = time()
+        loaded    = load_patchbay(path)
+        loadTime  = time() - startTime
+
+        if (loaded is None or len(loaded.groups) != len(patchbay.groups) or len(loaded.ports) != len(patchbay.ports) or
+            loaded.connections != patchbay.connections):
+            print("%s: load failed" % ext)
+        else:
+            print("%-6s save %7.1f ms, load %7.1f ms, %9i bytes" % (ext, saveTime*1000, loadTime*1000, os.path.getsize(path)))
+
+        os.remove(path)
+
+    os.rmdir(tmpDir)
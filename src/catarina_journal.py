@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Catarina undo/redo journal
+# Copyright (C) 2010-2013 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the COPYING file
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+from collections import deque
+
+# ------------------------------------------------------------------------------------------------------------
+# Static Variables
+
+JOURNAL_LIMIT = 1000 # entries
+
+# Operations are tuples, the first item is one of these.
+# Group, port and connection objects are the same lists used by Catarina, they are kept by reference, never copied.
+JOURNAL_ADD_GROUP    = 0 # group, position
+JOURNAL_REMOVE_GROUP = 1 # group, position
+JOURNAL_RENAME_GROUP = 2 # group, old name, new name
+JOURNAL_SPLIT_GROUP  = 3 # group, old split, new split
+JOURNAL_ADD_PORT     = 4 # port
+JOURNAL_REMOVE_PORT  = 5 # port
+JOURNAL_RENAME_PORT  = 6 # port, old name, new name
+JOURNAL_CONNECT      = 7 # connection
+JOURNAL_DISCONNECT   = 8 # connection
+
+# The group position is a list shared by an add/remove operation and its inverse.
+# It gets filled when the group is removed, so adding it back restores the box where it was.
+
+_inverseOps = {
+    JOURNAL_ADD_GROUP:    JOURNAL_REMOVE_GROUP,
+    JOURNAL_REMOVE_GROUP: JOURNAL_ADD_GROUP,
+    JOURNAL_ADD_PORT:     JOURNAL_REMOVE_PORT,
+    JOURNAL_REMOVE_PORT:  JOURNAL_ADD_PORT,
+    JOURNAL_CONNECT:      JOURNAL_DISCONNECT,
+    JOURNAL_DISCONNECT:   JOURNAL_CONNECT
+}
+
+def invert_journal_op(op):
+    if op[0] in (JOURNAL_RENAME_GROUP, JOURNAL_SPLIT_GROUP, JOURNAL_RENAME_PORT):
+        return (op[0], op[1], op[3], op[2])
+    return (_inverseOps[op[0]],) + op[1:]
+
+# ------------------------------------------------------------------------------------------------------------
+# Journal
+
+class CatarinaJournal(object):
+    def __init__(self, limit=JOURNAL_LIMIT):
+        object.__init__(self)
+
+        self.fUndoStack = deque(maxlen=limit)
+        self.fRedoStack = []
+
+    def clear(self):
+        self.fUndoStack.clear()
+        self.fRedoStack = []
+
+    # Call after the operations were applied
+    def record(self, text, ops):
+        if not ops:
+            return
+
+        self.fUndoStack.append((text, tuple(ops)))
+        self.fRedoStack = []
+
+    def canUndo(self):
+        return bool(len(self.fUndoStack) > 0)
+
+    def canRedo(self):
+        return bool(len(self.fRedoStack) > 0)
+
+    def undoText(self):
+        return self.fUndoStack[-1][0] if self.fUndoStack else ""
+
+    def redoText(self):
+        return self.fRedoStack[-1][0] if self.fRedoStack else ""
+
+    # Returns the operations to apply, all steps merged together so they can be applied in one go
+    def takeUndo(self, count=1):
+        ops = []
+
+        for i in range(min(count, len(self.fUndoStack))):
+            entry = self.fUndoStack.pop()
+            self.fRedoStack.append(entry)
+            ops += [invert_journal_op(op) for op in reversed(entry[1])]
+
+        return ops
+
+    def takeRedo(self, count=1):
+        ops = []
+
+        for i in range(min(count, len(self.fRedoStack))):
+            entry = self.fRedoStack.pop()
+            self.fUndoStack.append(entry)
+            ops += entry[1]
+
+        return ops
@@ -16,10 +16,17 @@
 #
 # For a full copy of the GNU General Public License see the COPYING file
 
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+from PyQt4.QtCore import QSocketNotifier
+
 # ------------------------------------------------------------------------------------------------------------
 # Imports (Custom Stuff)
 
+import alsaseq
 import ui_catia
+from cadence_graphd import get_graphd_snapshot
 from shared_canvasjack import *
 from shared_settings import *
 
@@ -54,11 +61,6 @@ if LINUX:
 
         haveALSA = True
 
-        if sys.version_info >= (3, 0):
-            from subprocess import getoutput
-        else:
-            from commands import getoutput
-
         if DEBUG:
             print("Using experimental ALSA-MIDI support")
 
@@ -92,6 +94,9 @@ iConnInput  = 2
 
 URI_CANVAS_ICON = "http://kxstudio.sf.net/ns/canvas/icon"
 
+# Time to wait for more port events before applying them to the canvas (in ms)
+PORT_EVENTS_DELAY = 50
+
 # ------------------------------------------------------------------------------------------------------------
 # Catia Main Window
 
@@ -101,13 +106,26 @@ class CatiaMainW(AbstractCanvasJackClass):
 
         self.fGroupList      = []
         self.fGroupSplitList = []
-        self.fPortList       = []
-        self.fConnectionList = []
+        self.fGroupPortCount = {} # group name -> number of ports
+        self.fPortIdMap      = {} # canvas port id -> port
+        self.fPortNameMap    = {} # full port name (JACK or ALSA) -> port
+        self.fAlsaPortMap    = {} # "[ALSA-Mode] client:port" -> port
+        self.fConnectionIdMap   = {} # canvas connection id -> connection
+        self.fConnectionPortMap = {} # (output port id, input port id) -> connection
+        self.fPortConnectionMap = {} # canvas port id -> set of (output port id, input port id)
 
         self.fLastGroupId = 1
         self.fLastPortId  = 1
         self.fLastConnectionId = 1
 
+        self.fPortEvents = JackPortEventQueue()
+        self.fPortEventsPending = False
+
+        self.fAlsaSnapshot  = None
+        self.fAlsaAnnouncer = None
+        self.fAlsaNotifier  = None
+        self.fAlsaEventsPending = False
+
         self.loadSettings(True)
 
         # -------------------------------------------------------------
@@ -231,8 +249,8 @@ class CatiaMainW(AbstractCanvasJackClass):
         self.connect(self, SIGNAL("BufferSizeCallback(int)"), SLOT("slot_BufferSizeCallback(int)"))
         self.connect(self, SIGNAL("SampleRateCallback(int)"), SLOT("slot_SampleRateCallback(int)"))
         self.connect(self, SIGNAL("ClientRenameCallback(QString, QString)"), SLOT("slot_ClientRenameCallback(QString, QString)"))
-        self.connect(self, SIGNAL("PortRegistrationCallback(int, bool)"), SLOT("slot_PortRegistrationCallback(int, bool)"))
-        self.connect(self, SIGNAL("PortConnectCallback(int, int, bool)"), SLOT("slot_PortConnectCallback(int, int, bool)"))
+        self.connect(self, SIGNAL("PortRegistrationCallback(int, bool, QString)"), SLOT("slot_PortRegistrationCallback(int, bool, QString)"))
+        self.connect(self, SIGNAL("PortConnectCallback(int, int, bool, QString, QString)"), SLOT("slot_PortConnectCallback(int, int, bool, QString, QString)"))
         self.connect(self, SIGNAL("PortRenameCallback(int, QString, QString)"), SLOT("slot_PortRenameCallback(int, QString, QString)"))
         self.connect(self, SIGNAL("ShutdownCallback()"), SLOT("slot_ShutdownCallback()"))
 
@@ -263,14 +281,14 @@ class CatiaMainW(AbstractCanvasJackClass):
         elif action == patchcanvas.ACTION_PORT_INFO:
             portId = value1
 
-            for port in self.fPortList:
-                if port[iPortId] == portId:
-                    portNameR = port[iPortNameR]
-                    portNameG = port[iPortGroupName]
-                    break
-            else:
+            port = self.fPortIdMap.get(portId)
+
+            if port is None:
                 return
 
+            portNameR = port[iPortNameR]
+            portNameG = port[iPortGroupName]
+
             if portNameR.startswith("[ALSA-"):
                 portId, portName = portNameR.split("] ", 1)[1].split(" ", 1)
 
@@ -360,24 +378,24 @@ class CatiaMainW(AbstractCanvasJackClass):
             portId = value1
             portShortName = asciiString(valueStr)
 
-            for port in self.fPortList:
-                if port[iPortId] == portId:
-                    portNameR = port[iPortNameR]
-
-                    if portNameR.startswith("[ALSA-"):
-                        QMessageBox.warning(self, self.tr("Cannot continue"), self.tr(""
-                            "Rename functions rely on JACK aliases and cannot be done in ALSA ports"))
-                        return
-
-                    if portNameR.split(":", 1)[0] == gA2JClientName:
-                        a2jSplit = portNameR.split(":", 3)
-                        portName = "%s:%s: %s" % (a2jSplit[0], a2jSplit[1], portShortName)
-                    else:
-                        portName = "%s:%s" % (port[iPortGroupName], portShortName)
-                    break
-            else:
+            port = self.fPortIdMap.get(portId)
+
+            if port is None:
+                return
+
+            portNameR = port[iPortNameR]
+
+            if portNameR.startswith("[ALSA-"):
+                QMessageBox.warning(self, self.tr("Cannot continue"), self.tr(""
+                    "Rename functions rely on JACK aliases and cannot be done in ALSA ports"))
                 return
 
+            if portNameR.split(":", 1)[0] == gA2JClientName:
+                a2jSplit = portNameR.split(":", 3)
+                portName = "%s:%s: %s" % (a2jSplit[0], a2jSplit[1], portShortName)
+            else:
+                portName = "%s:%s" % (port[iPortGroupName], portShortName)
+
             portPtr = jacklib.port_by_name(gJack.client, portNameR)
             aliases = jacklib.port_get_aliases(portPtr)
 
@@ -402,14 +420,8 @@ class CatiaMainW(AbstractCanvasJackClass):
         elif action == patchcanvas.ACTION_PORTS_CONNECT:
             portIdA = value1
             portIdB = value2
-            portRealNameA = ""
-            portRealNameB = ""
-
-            for port in self.fPortList:
-                if port[iPortId] == portIdA:
-                    portRealNameA = port[iPortNameR]
-                if port[iPortId] == portIdB:
-                    portRealNameB = port[iPortNameR]
+            portRealNameA = self.canvas_getPortRealName(portIdA)
+            portRealNameB = self.canvas_getPortRealName(portIdB)
 
             if portRealNameA.startswith("[ALSA-"):
                 portIdAlsaA = portRealNameA.split(" ", 2)[1]
@@ -424,22 +436,15 @@ class CatiaMainW(AbstractCanvasJackClass):
         elif action == patchcanvas.ACTION_PORTS_DISCONNECT:
             connectionId = value1
 
-            for connection in self.fConnectionList:
-                if connection[iConnId] == connectionId:
-                    portIdA = connection[iConnOutput]
-                    portIdB = connection[iConnInput]
-                    break
-            else:
-                return
+            connection = self.fConnectionIdMap.get(connectionId)
 
-            portRealNameA = ""
-            portRealNameB = ""
+            if connection is None:
+                return
 
-            for port in self.fPortList:
-                if port[iPortId] == portIdA:
-                    portRealNameA = port[iPortNameR]
-                if port[iPortId] == portIdB:
-                    portRealNameB = port[iPortNameR]
+            portIdA = connection[iConnOutput]
+            portIdB = connection[iConnInput]
+            portRealNameA = self.canvas_getPortRealName(portIdA)
+            portRealNameB = self.canvas_getPortRealName(portIdB)
 
             if portRealNameA.startswith("[ALSA-"):
                 portIdAlsaA = portRealNameA.split(" ", 2)[1]
@@ -454,8 +459,13 @@ class CatiaMainW(AbstractCanvasJackClass):
     def initPorts(self):
         self.fGroupList      = []
         self.fGroupSplitList = []
-        self.fPortList       = []
-        self.fConnectionList = []
+        self.fGroupPortCount = {} # group name -> number of ports
+        self.fPortIdMap      = {} # canvas port id -> port
+        self.fPortNameMap    = {} # full port name (JACK or ALSA) -> port
+        self.fAlsaPortMap    = {} # "[ALSA-Mode] client:port" -> port
+        self.fConnectionIdMap   = {} # canvas connection id -> connection
+        self.fConnectionPortMap = {} # (output port id, input port id) -> connection
+        self.fPortConnectionMap = {} # canvas port id -> set of (output port id, input port id)
 
         self.fLastGroupId = 1
         self.fLastPortId  = 1
@@ -509,166 +519,68 @@ class CatiaMainW(AbstractCanvasJackClass):
 
         global gA2JClientName
 
-        # Get all jack ports, put a2j ones to the bottom of the list
-        a2jNameList  = []
-        portNameList = c_char_p_p_to_list(jacklib.get_ports(gJack.client, "", "", 0))
-
-        h = 0
-        for i in range(len(portNameList)):
-            if portNameList[i - h].split(":")[0] == gA2JClientName:
-                portName = portNameList.pop(i - h)
-                a2jNameList.append(portName)
-                h += 1
+        # Read the whole graph at once, cadence-graphd already has it if running
+        snapshot = get_graphd_snapshot()
 
-        for a2jName in a2jNameList:
-            portNameList.append(a2jName)
+        if snapshot is None:
+            snapshot = get_graph_snapshot(gJack.client, self.fSavedSettings["Main/JackPortAlias"] in (1, 2))
 
-        del a2jNameList
+            # Our own snapshot already includes all queued events.
+            # The daemon's may not, those are kept and anything already there gets skipped when they're handled.
+            self.fPortEvents.clear()
 
-        # Add jack ports
-        for portName in portNameList:
-            portPtr = jacklib.port_by_name(gJack.client, portName)
-            self.canvas_addJackPort(portPtr, portName)
+        # Put a2j ports to the bottom of the list
+        portNameList = []
+        a2jNameList  = []
 
-        # Add jack connections
-        for portName in portNameList:
-            portPtr = jacklib.port_by_name(gJack.client, portName)
+        for portName in snapshot.ports:
+            if portName.split(":", 1)[0] == gA2JClientName:
+                a2jNameList.append(portName)
+            else:
+                portNameList.append(portName)
 
-            # Only make connections from an output port
-            if jacklib.port_flags(portPtr) & jacklib.JackPortIsInput:
-                continue
+        portNameList += a2jNameList
 
-            portConnectionNames = c_char_p_p_to_list(jacklib.port_get_all_connections(gJack.client, portPtr))
+        with patchcanvas.bulkUpdate():
+            # Add jack ports
+            for portName in portNameList:
+                self.canvas_addJackPort(portName, snapshot.ports[portName])
 
-            for portConName in portConnectionNames:
-                self.canvas_connectPortsByName(portName, portConName)
+            # Add jack connections
+            for portOutName, portInName in snapshot.connections:
+                self.canvas_connectPortsByName(portOutName, portInName)
 
     def initAlsaPorts(self):
+        self.fAlsaSnapshot = None
+
         if not (haveALSA and self.ui.act_settings_show_alsa.isChecked()):
             return
 
-        # Get ALSA MIDI ports (outputs)
-        output = getoutput("env LANG=C aconnect -i").split("\n")
-        lastGroupId   = -1
-        lastGroupName = ""
-
-        for line in output:
-            # Make 'System' match JACK's 'system'
-            if line == "client 0: 'System' [type=kernel]":
-                line = "client 0: 'system' [type=kernel]"
-
-            if line.startswith("client "):
-                lineSplit  = line.split(": ", 1)
-                lineSplit2 = lineSplit[1].replace("'", "", 1).split("' [type=", 1)
-                groupId    = int(lineSplit[0].replace("client ", ""))
-                groupName  = lineSplit2[0]
-                groupType  = lineSplit2[1].rsplit("]", 1)[0]
-
-                lastGroupId = self.canvas_getGroupId(groupName)
-
-                if lastGroupId == -1:
-                    # Group doesn't exist yet
-                    lastGroupId = self.canvas_addAlsaGroup(groupId, groupName, bool(groupType == "kernel"))
-
-                lastGroupName = groupName
-
-            elif line.startswith("   ") and lastGroupId >= 0 and lastGroupName:
-                lineSplit = line.split(" '", 1)
-                portId    = int(lineSplit[0].strip())
-                portName  = lineSplit[1].rsplit("'", 1)[0].strip()
-
-                self.canvas_addAlsaPort(lastGroupId, lastGroupName, portName, "%i:%i %s" % (groupId, portId, portName), False)
-
-            else:
-                lastGroupId   = -1
-                lastGroupName = ""
-
-        # Get ALSA MIDI ports (inputs)
-        output = getoutput("env LANG=C aconnect -o").split("\n")
-        lastGroupId   = -1
-        lastGroupName = ""
-
-        for line in output:
-            # Make 'System' match JACK's 'system'
-            if line == "client 0: 'System' [type=kernel]":
-                line = "client 0: 'system' [type=kernel]"
-
-            if line.startswith("client "):
-                lineSplit  = line.split(": ", 1)
-                lineSplit2 = lineSplit[1].replace("'", "", 1).split("' [type=", 1)
-                groupId    = int(lineSplit[0].replace("client ", ""))
-                groupName  = lineSplit2[0]
-                groupType  = lineSplit2[1].rsplit("]", 1)[0]
-
-                lastGroupId = self.canvas_getGroupId(groupName)
-
-                if lastGroupId == -1:
-                    # Group doesn't exist yet
-                    lastGroupId = self.canvas_addAlsaGroup(groupId, groupName, bool(groupType == "kernel"))
+        # Listen for sequencer changes, so we don't need to rescan everything
+        if self.fAlsaAnnouncer is None:
+            self.fAlsaAnnouncer = alsaseq.AlsaSeqAnnouncer("Catia")
 
-                lastGroupName = groupName
+            if self.fAlsaAnnouncer.isValid():
+                self.fAlsaNotifier = QSocketNotifier(self.fAlsaAnnouncer.fd, QSocketNotifier.Read, self)
+                self.connect(self.fAlsaNotifier, SIGNAL("activated(int)"), SLOT("slot_AlsaSeqActivity()"))
 
-            elif line.startswith("   ") and lastGroupId >= 0 and lastGroupName:
-                lineSplit = line.split(" '", 1)
-                portId    = int(lineSplit[0].strip())
-                portName  = lineSplit[1].rsplit("'", 1)[0].strip()
+        snapshot = alsaseq.get_seq_snapshot(self.fAlsaAnnouncer.clientId)
 
-                self.canvas_addAlsaPort(lastGroupId, lastGroupName, portName, "%i:%i %s" % (groupId, portId, portName), True)
-
-            else:
-                lastGroupId   = -1
-                lastGroupName = ""
-
-        # Get ALSA MIDI connections
-        output = getoutput("env LANG=C aconnect -ol").split("\n")
-        lastGroupId = -1
-        lastPortId  = -1
-
-        for line in output:
-            # Make 'System' match JACK's 'system'
-            if line == "client 0: 'System' [type=kernel]":
-                line = "client 0: 'system' [type=kernel]"
-
-            if line.startswith("client "):
-                lineSplit  = line.split(": ", 1)
-                lineSplit2 = lineSplit[1].replace("'", "", 1).split("' [type=", 1)
-                groupId    = int(lineSplit[0].replace("client ", ""))
-                groupName  = lineSplit2[0]
-
-                lastGroupId = self.canvas_getGroupId(groupName)
-
-            elif line.startswith("    ") and lastGroupId >= 0:
-                lineSplit = line.split(" '", 1)
-                portId    = int(lineSplit[0].strip())
-                portName  = lineSplit[1].rsplit("'", 1)[0].strip()
-
-                for port in self.fPortList:
-                    if port[iPortNameR] == "[ALSA-Input] %i:%i %s" % (groupId, portId, portName):
-                        lastPortId = port[iPortId]
-                        break
-                else:
-                    lastPortId = -1
-
-            elif line.startswith("\tConnect") and lastGroupId >= 0 and lastPortId >= 0:
-                if line.startswith("\tConnected From"):
-                    lineSplit = line.split(": ", 1)[1]
-                    lineConns = lineSplit.split(", ")
+        if snapshot is None:
+            return
 
-                    for lineConn in lineConns:
-                        lineConnSplit = lineConn.replace("'","").split(":", 1)
-                        alsaGroupId   = int(lineConnSplit[0].split("[real:",1)[0])
-                        alsaPortId    = int(lineConnSplit[1].split("[real:",1)[0])
+        self.fAlsaSnapshot = snapshot
 
-                        portNameRtest = "[ALSA-Output] %i:%i " % (alsaGroupId, alsaPortId)
+        # Outputs first, then inputs
+        portKeys  = [portKey for portKey in snapshot.ports if not portKey[2]]
+        portKeys += [portKey for portKey in snapshot.ports if portKey[2]]
 
-                        for port in self.fPortList:
-                            if port[iPortNameR].startswith(portNameRtest):
-                                self.canvas_connectPorts(port[iPortId], lastPortId)
-                                break
+        with patchcanvas.bulkUpdate():
+            for portKey in portKeys:
+                self.canvas_addAlsaSeqPort(snapshot, portKey)
 
-            else:
-                lastGroupId = -1
-                lastPortId  = -1
+            for portAddrA, portAddrB in snapshot.connections:
+                self.canvas_connectAlsaSeqPorts(portAddrA, portAddrB)
 
     def canvas_getGroupId(self, groupName):
         for group in self.fGroupList:
@@ -755,28 +667,48 @@ class CatiaMainW(AbstractCanvasJackClass):
         portObj[iPortNameR] = "[ALSA-%s] %s" % ("Input" if isPortInput else "Output", portNameR)
         portObj[iPortGroupName] = groupName
 
-        self.fPortList.append(portObj)
+        self.canvas_addPortObj(portObj)
+        self.fAlsaPortMap["[ALSA-%s] %s" % ("Input" if isPortInput else "Output", portNameR.split(" ", 1)[0])] = portObj
         self.fLastPortId += 1
 
         return portId
 
-    def canvas_addJackPort(self, portPtr, portName):
+    def canvas_addAlsaSeqPort(self, snapshot, portKey):
+        clientId, portId, isPortInput = portKey
+        groupName, portName = snapshot.ports[portKey]
+
+        groupId = self.canvas_getGroupId(groupName)
+
+        if groupId == -1:
+            # Group doesn't exist yet
+            groupId = self.canvas_addAlsaGroup(clientId, groupName, snapshot.clients[clientId][1])
+
+        return self.canvas_addAlsaPort(groupId, groupName, portName, "%i:%i %s" % (clientId, portId, portName), isPortInput)
+
+    def canvas_removeAlsaSeqPort(self, portKey):
+        port = self.fAlsaPortMap.pop("[ALSA-%s] %i:%i" % ("Input" if portKey[2] else "Output", portKey[0], portKey[1]), None)
+
+        if port is None:
+            return
+
+        self.canvas_removeJackPort(port[iPortId])
+
+    def canvas_addJackPort(self, portName, portInfo):
         global gA2JClientName
 
         portId  = self.fLastPortId
         groupId = -1
 
         portNameR = portName
+        portFlags, portTypeStr, aliases = portInfo
 
         aliasN = self.fSavedSettings["Main/JackPortAlias"]
         if aliasN in (1, 2):
-            aliases = jacklib.port_get_aliases(portPtr)
             if aliases[0] == 2 and aliasN == 2:
                 portName = aliases[2]
             elif aliases[0] >= 1 and aliasN == 1:
                 portName = aliases[1]
 
-        portFlags = jacklib.port_flags(portPtr)
         groupName = portName.split(":", 1)[0]
 
         if portFlags & jacklib.JackPortIsInput:
@@ -794,7 +726,6 @@ class CatiaMainW(AbstractCanvasJackClass):
         else:
             portShortName = portName.replace("%s:" % groupName, "", 1)
 
-            portTypeStr = str(jacklib.port_type(portPtr), encoding="utf-8")
             if portTypeStr == jacklib.JACK_DEFAULT_AUDIO_TYPE:
                 portType = patchcanvas.PORT_TYPE_AUDIO_JACK
             elif portTypeStr == jacklib.JACK_DEFAULT_MIDI_TYPE:
@@ -818,7 +749,7 @@ class CatiaMainW(AbstractCanvasJackClass):
         portObj[iPortNameR] = portNameR
         portObj[iPortGroupName] = groupName
 
-        self.fPortList.append(portObj)
+        self.canvas_addPortObj(portObj)
         self.fLastPortId += 1
 
         if groupId not in self.fGroupSplitList and (portFlags & jacklib.JackPortIsPhysical) > 0:
@@ -829,26 +760,66 @@ class CatiaMainW(AbstractCanvasJackClass):
         return portId
 
     def canvas_removeJackPort(self, portId):
+        # Connections still left here had their disconnect event lost, the canvas keeps them otherwise
+        for portOutId, portInId in list(self.fPortConnectionMap.get(portId, ())):
+            self.canvas_disconnectPorts(portOutId, portInId)
+
+        self.fPortConnectionMap.pop(portId, None)
         patchcanvas.removePort(portId)
 
-        for port in self.fPortList:
-            if port[iPortId] == portId:
-                groupName = port[iPortGroupName]
-                self.fPortList.remove(port)
-                break
-        else:
+        port = self.fPortIdMap.pop(portId, None)
+
+        if port is None:
             return
 
+        groupName = port[iPortGroupName]
+
+        if self.fPortNameMap.get(port[iPortNameR]) is port:
+            del self.fPortNameMap[port[iPortNameR]]
+
         # Check if group has no more ports; if yes remove it
-        for port in self.fPortList:
-            if port[iPortGroupName] == groupName:
-                break
-        else:
+        self.fGroupPortCount[groupName] -= 1
+
+        if self.fGroupPortCount[groupName] == 0:
+            del self.fGroupPortCount[groupName]
             self.canvas_removeGroup(groupName)
 
+    def canvas_addPortObj(self, portObj):
+        groupName = portObj[iPortGroupName]
+
+        self.fPortIdMap[portObj[iPortId]] = portObj
+        self.fPortNameMap[portObj[iPortNameR]] = portObj
+        self.fGroupPortCount[groupName] = self.fGroupPortCount.get(groupName, 0) + 1
+
+    def canvas_getPortRealName(self, portId):
+        port = self.fPortIdMap.get(portId)
+        return port[iPortNameR] if port is not None else ""
+
     def canvas_renamePort(self, portId, portShortName):
         patchcanvas.renamePort(portId, portShortName)
 
+    def canvas_renameJackPort(self, portIdJack, oldName, newName):
+        portShortName = newName.split(":", 1)[-1]
+
+        port = self.fPortNameMap.pop(oldName, None)
+
+        if port is None:
+            return
+
+        portIdCanvas = port[iPortId]
+        port[iPortNameR] = newName
+        self.fPortNameMap[newName] = port
+
+        # Only set new name in canvas if no alias is active for this port
+        portPtr = jacklib.port_by_id(gJack.client, portIdJack)
+        aliases = jacklib.port_get_aliases(portPtr) if portPtr else (0, "", "")
+        if aliases[0] == 1 and self.fSavedSettings["Main/JackPortAlias"] == 1:
+            pass
+        elif aliases[0] == 2 and self.fSavedSettings["Main/JackPortAlias"] == 2:
+            pass
+        else:
+            self.canvas_renamePort(portIdCanvas, portShortName)
+
     def canvas_connectPorts(self, portOutId, portInId):
         connectionId = self.fLastConnectionId
         patchcanvas.connectPorts(connectionId, portOutId, portInId)
@@ -858,52 +829,76 @@ class CatiaMainW(AbstractCanvasJackClass):
         connObj[iConnOutput] = portOutId
         connObj[iConnInput]  = portInId
 
-        self.fConnectionList.append(connObj)
+        self.fConnectionIdMap[connectionId] = connObj
+        self.fConnectionPortMap[(portOutId, portInId)] = connObj
+        self.fPortConnectionMap.setdefault(portOutId, set()).add((portOutId, portInId))
+        self.fPortConnectionMap.setdefault(portInId, set()).add((portOutId, portInId))
         self.fLastConnectionId += 1
 
         return connectionId
 
     def canvas_connectPortsByName(self, portOutName, portInName):
-        portOutId = -1
-        portInId  = -1
-
-        for port in self.fPortList:
-            if port[iPortNameR] == portOutName:
-                portOutId = port[iPortId]
-            elif port[iPortNameR] == portInName:
-                portInId = port[iPortId]
-
-            if portOutId >= 0 and portInId >= 0:
-                break
+        portOut = self.fPortNameMap.get(portOutName)
+        portIn  = self.fPortNameMap.get(portInName)
 
-        else:
+        if portOut is None or portIn is None:
             print("Catia - connect jack ports failed")
             return -1
 
-        return self.canvas_connectPorts(portOutId, portInId)
+        connection = self.fConnectionPortMap.get((portOut[iPortId], portIn[iPortId]))
+
+        if connection is not None:
+            return connection[iConnId]
+
+        return self.canvas_connectPorts(portOut[iPortId], portIn[iPortId])
 
     def canvas_disconnectPorts(self, portOutId, portInId):
-        for connection in self.fConnectionList:
-            if connection[iConnOutput] == portOutId and connection[iConnInput] == portInId:
-                patchcanvas.disconnectPorts(connection[iConnId])
-                self.fConnectionList.remove(connection)
-                break
+        connection = self.fConnectionPortMap.pop((portOutId, portInId), None)
 
-    def canvas_disconnectPortsByName(self, portOutName, portInName):
-        portOutId = -1
-        portInId  = -1
+        if connection is None:
+            return
+
+        patchcanvas.disconnectPorts(connection[iConnId])
+        del self.fConnectionIdMap[connection[iConnId]]
+
+        for portId in (portOutId, portInId):
+            portConnections = self.fPortConnectionMap.get(portId)
+            if portConnections is not None:
+                portConnections.discard((portOutId, portInId))
 
-        for port in self.fPortList:
-            if port[iPortNameR] == portOutName:
-                portOutId = port[iPortId]
-            elif port[iPortNameR] == portInName:
-                portInId = port[iPortId]
+    def canvas_connectAlsaSeqPorts(self, portAddrOut, portAddrIn):
+        portOut = self.fAlsaPortMap.get("[ALSA-Output] %i:%i" % portAddrOut)
+        portIn  = self.fAlsaPortMap.get("[ALSA-Input] %i:%i" % portAddrIn)
+
+        if portOut is None or portIn is None:
+            return -1
 
-        if portOutId == -1 or portInId == -1:
+        # Connections made from the canvas are already there
+        connection = self.fConnectionPortMap.get((portOut[iPortId], portIn[iPortId]))
+
+        if connection is not None:
+            return connection[iConnId]
+
+        return self.canvas_connectPorts(portOut[iPortId], portIn[iPortId])
+
+    def canvas_disconnectAlsaSeqPorts(self, portAddrOut, portAddrIn):
+        portOut = self.fAlsaPortMap.get("[ALSA-Output] %i:%i" % portAddrOut)
+        portIn  = self.fAlsaPortMap.get("[ALSA-Input] %i:%i" % portAddrIn)
+
+        if portOut is None or portIn is None:
+            return
+
+        self.canvas_disconnectPorts(portOut[iPortId], portIn[iPortId])
+
+    def canvas_disconnectPortsByName(self, portOutName, portInName):
+        portOut = self.fPortNameMap.get(portOutName)
+        portIn  = self.fPortNameMap.get(portInName)
+
+        if portOut is None or portIn is None:
             print("Catia - disconnect ports failed")
             return
 
-        self.canvas_disconnectPorts(portOutId, portInId)
+        self.canvas_disconnectPorts(portOut[iPortId], portIn[iPortId])
 
     def jackStarted(self):
         if not gJack.client:
@@ -937,6 +932,7 @@ class CatiaMainW(AbstractCanvasJackClass):
 
         # client already closed
         gJack.client = None
+        self.fPortEvents.clear()
 
         # refresh canvas (remove jack ports)
         patchcanvas.clear()
@@ -1073,16 +1069,26 @@ class CatiaMainW(AbstractCanvasJackClass):
         self.emit(SIGNAL("ClientRenameCallback(QString, QString)"), str(oldName, encoding="utf-8"), str(newName, encoding="utf-8"))
         return 0
 
+    # Port names are read here, while JACK still has the ports; by the time the events are handled they may be gone or reused
+
     def JackPortRegistrationCallback(self, portId, registerYesNo, arg):
         if DEBUG: print("JackPortRegistrationCallback(%i, %i)" % (portId, registerYesNo))
-        self.emit(SIGNAL("PortRegistrationCallback(int, bool)"), portId, bool(registerYesNo))
+        portNameR = "" if registerYesNo else self.jackPortNameById(portId)
+        self.emit(SIGNAL("PortRegistrationCallback(int, bool, QString)"), portId, bool(registerYesNo), portNameR)
         return 0
 
     def JackPortConnectCallback(self, portA, portB, connectYesNo, arg):
         if DEBUG: print("JackPortConnectCallback(%i, %i, %i)" % (portA, portB, connectYesNo))
-        self.emit(SIGNAL("PortConnectCallback(int, int, bool)"), portA, portB, bool(connectYesNo))
+        portNameA = self.jackPortNameById(portA)
+        portNameB = self.jackPortNameById(portB)
+        if portNameA and portNameB:
+            self.emit(SIGNAL("PortConnectCallback(int, int, bool, QString, QString)"), portA, portB, bool(connectYesNo), portNameA, portNameB)
         return 0
 
+    def jackPortNameById(self, portId):
+        portPtr = jacklib.port_by_id(gJack.client, portId)
+        return str(jacklib.port_name(portPtr), encoding="utf-8") if portPtr else ""
+
     def JackPortRenameCallback(self, portId, oldName, newName, arg):
         if DEBUG: print("JackPortRenameCallback(%i, \"%s\", \"%s\")" % (portId, oldName, newName))
         self.emit(SIGNAL("PortRenameCallback(int, QString, QString)"), portId, str(oldName, encoding="utf-8"), str(newName, encoding="utf-8"))
@@ -1183,56 +1189,100 @@ class CatiaMainW(AbstractCanvasJackClass):
     def slot_ClientRenameCallback(self, oldName, newName):
         pass # TODO
 
-    @pyqtSlot(int, bool)
-    def slot_PortRegistrationCallback(self, portIdJack, registerYesNo):
-        portPtr = jacklib.port_by_id(gJack.client, portIdJack)
-        portNameR = str(jacklib.port_name(portPtr), encoding="utf-8")
+    @pyqtSlot(int, bool, str)
+    def slot_PortRegistrationCallback(self, portIdJack, registerYesNo, portNameR):
+        self.fPortEvents.portRegistration(portIdJack, registerYesNo, portNameR)
+        self.startPortEventsTimer()
 
-        if registerYesNo:
-            self.canvas_addJackPort(portPtr, portNameR)
-        else:
-            for port in self.fPortList:
-                if port[iPortNameR] == portNameR:
-                    portIdCanvas = port[iPortId]
-                    break
-            else:
-                return
+    @pyqtSlot(int, int, bool, str, str)
+    def slot_PortConnectCallback(self, portIdJackA, portIdJackB, connectYesNo, portRealNameA, portRealNameB):
+        self.fPortEvents.portConnection(portIdJackA, portIdJackB, connectYesNo, portRealNameA, portRealNameB)
+        self.startPortEventsTimer()
 
-            self.canvas_removeJackPort(portIdCanvas)
+    @pyqtSlot(int, str, str)
+    def slot_PortRenameCallback(self, portIdJack, oldName, newName):
+        self.fPortEvents.portRename(portIdJack, oldName, newName)
+        self.startPortEventsTimer()
 
-    @pyqtSlot(int, int, bool)
-    def slot_PortConnectCallback(self, portIdJackA, portIdJackB, connectYesNo):
-        portPtrA = jacklib.port_by_id(gJack.client, portIdJackA)
-        portPtrB = jacklib.port_by_id(gJack.client, portIdJackB)
-        portRealNameA = str(jacklib.port_name(portPtrA), encoding="utf-8")
-        portRealNameB = str(jacklib.port_name(portPtrB), encoding="utf-8")
+    def startPortEventsTimer(self):
+        if self.fPortEventsPending:
+            return
 
-        if connectYesNo:
-            self.canvas_connectPortsByName(portRealNameA, portRealNameB)
-        else:
-            self.canvas_disconnectPortsByName(portRealNameA, portRealNameB)
+        self.fPortEventsPending = True
+        QTimer.singleShot(PORT_EVENTS_DELAY, self, SLOT("slot_handlePortEvents()"))
 
-    @pyqtSlot(int, str, str)
-    def slot_PortRenameCallback(self, portIdJack, oldName, newName):
-        portPtr = jacklib.port_by_id(gJack.client, portIdJack)
-        portShortName = str(jacklib.port_short_name(portPtr), encoding="utf-8")
+    @pyqtSlot()
+    def slot_AlsaSeqActivity(self):
+        # Always drain the events, even if ALSA ports are hidden
+        if not self.fAlsaAnnouncer.readEvents():
+            return
+        if self.fAlsaSnapshot is None or self.fAlsaEventsPending:
+            return
 
-        for port in self.fPortList:
-            if port[iPortNameR] == oldName:
-                portIdCanvas = port[iPortId]
-                port[iPortNameR] = newName
-                break
-        else:
+        self.fAlsaEventsPending = True
+        QTimer.singleShot(PORT_EVENTS_DELAY, self, SLOT("slot_handleAlsaEvents()"))
+
+    @pyqtSlot()
+    def slot_handleAlsaEvents(self):
+        self.fAlsaEventsPending = False
+
+        if self.fAlsaSnapshot is None:
             return
 
-        # Only set new name in canvas if no alias is active for this port
-        aliases = jacklib.port_get_aliases(portPtr)
-        if aliases[0] == 1 and self.fSavedSettings["Main/JackPortAlias"] == 1:
-            pass
-        elif aliases[0] == 2 and self.fSavedSettings["Main/JackPortAlias"] == 2:
-            pass
-        else:
-            self.canvas_renamePort(portIdCanvas, portShortName)
+        snapshot = alsaseq.get_seq_snapshot(self.fAlsaAnnouncer.clientId)
+
+        if snapshot is None:
+            return
+
+        removedPorts, addedPorts, removedConnections, addedConnections = alsaseq.diff_seq_snapshots(self.fAlsaSnapshot, snapshot)
+        self.fAlsaSnapshot = snapshot
+
+        with patchcanvas.bulkUpdate():
+            for portAddrA, portAddrB in removedConnections:
+                self.canvas_disconnectAlsaSeqPorts(portAddrA, portAddrB)
+
+            for portKey in removedPorts:
+                self.canvas_removeAlsaSeqPort(portKey)
+
+            for portKey in addedPorts:
+                self.canvas_addAlsaSeqPort(snapshot, portKey)
+
+            for portAddrA, portAddrB in addedConnections:
+                self.canvas_connectAlsaSeqPorts(portAddrA, portAddrB)
+
+    @pyqtSlot()
+    def slot_handlePortEvents(self):
+        self.fPortEventsPending = False
+
+        if not gJack.client:
+            self.fPortEvents.clear()
+            return
+
+        renames, disconnections, unregistrations, registrations, connections = self.fPortEvents.takeEvents()
+
+        with patchcanvas.bulkUpdate():
+            for portIdJack, oldName, newName in renames:
+                self.canvas_renameJackPort(portIdJack, oldName, newName)
+
+            for portRealNameA, portRealNameB in disconnections:
+                self.canvas_disconnectPortsByName(portRealNameA, portRealNameB)
+
+            for portIdJack, portNameR in unregistrations:
+                port = self.fPortNameMap.get(portNameR)
+                if port is not None:
+                    self.canvas_removeJackPort(port[iPortId])
+
+            for portIdJack in registrations:
+                portPtr = jacklib.port_by_id(gJack.client, portIdJack)
+                if not portPtr:
+                    continue
+                portNameR = str(jacklib.port_name(portPtr), encoding="utf-8")
+                if portNameR in self.fPortNameMap:
+                    continue
+                self.canvas_addJackPort(portNameR, get_port_info(portPtr, self.fSavedSettings["Main/JackPortAlias"] in (1, 2)))
+
+            for portRealNameA, portRealNameB in connections:
+                self.canvas_connectPortsByName(portRealNameA, portRealNameB)
 
     @pyqtSlot()
     def slot_ShutdownCallback(self):
@@ -1371,6 +1421,11 @@ class CatiaMainW(AbstractCanvasJackClass):
 
     def closeEvent(self, event):
         self.saveSettings()
+        self.fPositionJournal.flush()
+
+        if self.fAlsaAnnouncer is not None:
+            self.fAlsaAnnouncer.close()
+
         patchcanvas.clear()
         QMainWindow.closeEvent(self, event)
 
@@ -162,6 +162,8 @@ URI_CANVAS_X_SPLIT = "http://kxstudio.sf.net/ns/canvas/x_split"
 URI_CANVAS_Y_SPLIT = "http://kxstudio.sf.net/ns/canvas/y_split"
 URI_CANVAS_ICON    = "http://kxstudio.sf.net/ns/canvas/icon"
 
+URI_CANVAS_GROUP_KEYS = (URI_CANVAS_SPLIT, URI_CANVAS_X, URI_CANVAS_Y, URI_CANVAS_X_SPLIT, URI_CANVAS_Y_SPLIT)
+
 DEFAULT_CANVAS_WIDTH  = 3100
 DEFAULT_CANVAS_HEIGHT = 2400
 
@@ -173,6 +175,57 @@ RECENT_PROJECTS_STORE_MAX_ITEMS = 50
 DEFAULT_PROJECT_FOLDER = os.path.join(HOME, "ladish-projects")
 setDefaultProjectFolder(DEFAULT_PROJECT_FOLDER)
 
+# ------------------------------------------------------------------------------------------------------------
+# Asynchronous ladish GraphDict requests
+# Requests are sent without waiting for each reply, and handled when all replies arrive
+
+class GraphDictRequests(object):
+    def __init__(self):
+        object.__init__(self)
+
+        self.fGeneration = 0
+
+    # Ignore replies of all requests made so far (the graph they refer to is gone)
+    def invalidate(self):
+        self.fGeneration += 1
+
+    # 'requests' is a list of (object type, object id, key)
+    # 'callback' receives a dict of request -> value (None if unset)
+    def getMany(self, graphDict, requests, callback):
+        generation = self.fGeneration
+        values     = {}
+        pending    = [len(requests)]
+
+        if not requests:
+            callback(values)
+            return
+
+        def handleReply(request, value):
+            if generation != self.fGeneration:
+                return
+
+            values[request] = value
+            pending[0] -= 1
+
+            if pending[0] == 0:
+                callback(values)
+
+        for request in requests:
+            graphDict.Get(request[0], request[1], request[2],
+                          reply_handler=lambda value, request=request: handleReply(request, str(value)),
+                          error_handler=lambda error, request=request: handleReply(request, None))
+
+    # 'items' is a list of (object type, object id, key, value)
+    def setMany(self, graphDict, items):
+        for objectType, objectId, key, value in items:
+            graphDict.Set(objectType, objectId, key, value, reply_handler=self._handleSetReply, error_handler=self._handleError)
+
+    def _handleSetReply(self, *args):
+        pass
+
+    def _handleError(self, error):
+        print("Claudia - GraphDict request failed:", error)
+
 # ------------------------------------------------------------------------------------------------------------
 # Studio Name Dialog
 
@@ -606,6 +659,10 @@ class ClaudiaMainW(AbstractCanvasJackClass):
         self.m_crashedJACK   = False
         self.m_crashedLADISH = False
 
+        # Graph is read asynchronously, changes that happen meanwhile are queued here
+        self.m_graphRequests = GraphDictRequests()
+        self.m_graphEvents   = None
+
         self.loadSettings(True)
 
         # -------------------------------------------------------------
@@ -841,7 +898,6 @@ class ClaudiaMainW(AbstractCanvasJackClass):
         self.connect(self.ui.graphicsView.horizontalScrollBar(), SIGNAL("valueChanged(int)"), SLOT("slot_horizontalScrollBarChanged(int)"))
         self.connect(self.ui.graphicsView.verticalScrollBar(), SIGNAL("valueChanged(int)"), SLOT("slot_verticalScrollBarChanged(int)"))
 
-        self.connect(self.scene, SIGNAL("sceneGroupMoved(int, int, QPointF)"), SLOT("slot_canvasItemMoved(int, int, QPointF)"))
         self.connect(self.scene, SIGNAL("scaleChanged(double)"), SLOT("slot_canvasScaleChanged(double)"))
 
         self.connect(self.ui.act_settings_configure, SIGNAL("triggered()"), SLOT("slot_configureClaudia()"))
@@ -913,14 +969,14 @@ class ClaudiaMainW(AbstractCanvasJackClass):
 
         elif action == patchcanvas.ACTION_GROUP_SPLIT:
             group_id = value1
-            gDBus.ladish_graph.Set(GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_SPLIT, "true")
+            self.m_graphRequests.setMany(gDBus.ladish_graph, [(GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_SPLIT, "true")])
 
             patchcanvas.splitGroup(group_id)
             self.ui.miniCanvasPreview.update()
 
         elif action == patchcanvas.ACTION_GROUP_JOIN:
             group_id = value1
-            gDBus.ladish_graph.Set(GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_SPLIT, "false")
+            self.m_graphRequests.setMany(gDBus.ladish_graph, [(GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_SPLIT, "false")])
 
             patchcanvas.joinGroup(group_id)
             self.ui.miniCanvasPreview.update()
@@ -1002,11 +1058,17 @@ class ClaudiaMainW(AbstractCanvasJackClass):
         elif action == patchcanvas.ACTION_PORTS_CONNECT:
             port_a = value1
             port_b = value2
-            gDBus.patchbay.ConnectPortsByID(port_a, port_b)
+            gDBus.patchbay.ConnectPortsByID(port_a, port_b, reply_handler=self.slot_DBusAsyncReply, error_handler=self.slot_DBusAsyncError)
 
         elif action == patchcanvas.ACTION_PORTS_DISCONNECT:
             connection_id = value1
-            gDBus.patchbay.DisconnectPortsByConnectionID(connection_id)
+            gDBus.patchbay.DisconnectPortsByConnectionID(connection_id, reply_handler=self.slot_DBusAsyncReply, error_handler=self.slot_DBusAsyncError)
+
+    def slot_DBusAsyncReply(self, *args):
+        pass
+
+    def slot_DBusAsyncError(self, error):
+        print("Claudia - DBus request failed:", error)
 
     def init_jack(self):
         self.fXruns = -1
@@ -1127,39 +1189,90 @@ class ClaudiaMainW(AbstractCanvasJackClass):
         if not (gJack.client and gDBus.patchbay):
             return
 
-        version, groups, conns = gDBus.patchbay.GetGraph(0)
+        # Replies for an older graph are of no use now
+        self.m_graphRequests.invalidate()
+        self.m_graphEvents = []
 
-        # Graph Ports
-        for group in groups:
-            group_id, group_name, ports = group
-            self.canvas_add_group(int(group_id), str(group_name))
+        generation = self.m_graphRequests.fGeneration
 
-            for port in ports:
-                port_id, port_name, port_flags, port_type_jack = port
+        gDBus.patchbay.GetGraph(0, reply_handler=lambda *graph: self.initPortsGotGraph(generation, *graph),
+                                   error_handler=lambda error: self.initPortsFailed(generation, error))
 
-                if port_flags & JACKDBUS_PORT_FLAG_INPUT:
-                    port_mode = patchcanvas.PORT_MODE_INPUT
-                elif port_flags & JACKDBUS_PORT_FLAG_OUTPUT:
-                    port_mode = patchcanvas.PORT_MODE_OUTPUT
-                else:
-                    port_mode = patchcanvas.PORT_MODE_NULL
+    def initPortsFailed(self, generation, error):
+        if generation != self.m_graphRequests.fGeneration:
+            return
+
+        print("Claudia - failed to get graph:", error)
+        self.m_graphEvents = None
+
+    def initPortsGotGraph(self, generation, version, groups, conns):
+        if generation != self.m_graphRequests.fGeneration:
+            return
+
+        # Stop queueing patchbay signals, nothing would apply them
+        if not gDBus.ladish_graph:
+            self.m_graphEvents = None
+            return
+
+        # Request all canvas dict values at once
+        requests = []
+
+        for group_id, group_name, ports in groups:
+            for key in URI_CANVAS_GROUP_KEYS:
+                requests.append((GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, key))
+
+            for port_id, port_name, port_flags, port_type_jack in ports:
+                if port_type_jack == JACKDBUS_PORT_TYPE_MIDI:
+                    requests.append((GRAPH_DICT_OBJECT_TYPE_PORT, port_id, URI_A2J_PORT))
+
+        try:
+            self.m_graphRequests.getMany(gDBus.ladish_graph, requests, lambda values: self.initPortsFinish(version, groups, conns, values))
+        except dbus.exceptions.DBusException as error:
+            self.initPortsFailed(generation, error)
+
+    def initPortsFinish(self, version, groups, conns, values):
+        # Changes that happened after the graph was read, taken now so queueing stops even if something below fails
+        graphEvents = self.m_graphEvents or []
+        self.m_graphEvents = None
 
-                if port_type_jack == JACKDBUS_PORT_TYPE_AUDIO:
-                    port_type = patchcanvas.PORT_TYPE_AUDIO_JACK
-                elif port_type_jack == JACKDBUS_PORT_TYPE_MIDI:
-                    if gDBus.ladish_graph.Get(GRAPH_DICT_OBJECT_TYPE_PORT, port_id, URI_A2J_PORT) == "yes":
-                        port_type = patchcanvas.PORT_TYPE_MIDI_A2J
+        with patchcanvas.bulkUpdate():
+            # Graph Ports
+            for group in groups:
+                group_id, group_name, ports = group
+                group_dict = dict((key, values.get((GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, key))) for key in URI_CANVAS_GROUP_KEYS)
+                self.canvas_add_group(int(group_id), str(group_name), group_dict)
+
+                for port in ports:
+                    port_id, port_name, port_flags, port_type_jack = port
+
+                    if port_flags & JACKDBUS_PORT_FLAG_INPUT:
+                        port_mode = patchcanvas.PORT_MODE_INPUT
+                    elif port_flags & JACKDBUS_PORT_FLAG_OUTPUT:
+                        port_mode = patchcanvas.PORT_MODE_OUTPUT
                     else:
-                        port_type = patchcanvas.PORT_TYPE_MIDI_JACK
-                else:
-                    port_type = patchcanvas.PORT_TYPE_NULL
+                        port_mode = patchcanvas.PORT_MODE_NULL
+
+                    if port_type_jack == JACKDBUS_PORT_TYPE_AUDIO:
+                        port_type = patchcanvas.PORT_TYPE_AUDIO_JACK
+                    elif port_type_jack == JACKDBUS_PORT_TYPE_MIDI:
+                        if values.get((GRAPH_DICT_OBJECT_TYPE_PORT, port_id, URI_A2J_PORT)) == "yes":
+                            port_type = patchcanvas.PORT_TYPE_MIDI_A2J
+                        else:
+                            port_type = patchcanvas.PORT_TYPE_MIDI_JACK
+                    else:
+                        port_type = patchcanvas.PORT_TYPE_NULL
 
-                self.canvas_add_port(int(group_id), int(port_id), str(port_name), port_mode, port_type)
+                    self.canvas_add_port(int(group_id), int(port_id), str(port_name), port_mode, port_type)
 
-        # Graph Connections
-        for conn in conns:
-            source_group_id, source_group_name, source_port_id, source_port_name, target_group_id, target_group_name, target_port_id, target_port_name, conn_id = conn
-            self.canvas_connect_ports(int(conn_id), int(source_port_id), int(target_port_id))
+            # Graph Connections
+            for conn in conns:
+                source_group_id, source_group_name, source_port_id, source_port_name, target_group_id, target_group_name, target_port_id, target_port_name, conn_id = conn
+                self.canvas_connect_ports(int(conn_id), int(source_port_id), int(target_port_id))
+
+            # Apply changes that happened after the graph was read
+            for member, args in graphEvents:
+                if args[0] > version:
+                    self.emitPatchbaySignal(member, args)
 
         QTimer.singleShot(1000 if (self.fSavedSettings['Canvas/EyeCandy']) else 0, self.ui.miniCanvasPreview, SLOT("update()"))
 
@@ -1200,7 +1313,7 @@ class ClaudiaMainW(AbstractCanvasJackClass):
 
         return item
 
-    def canvas_add_group(self, groupId, groupName):
+    def canvas_add_group(self, groupId, groupName, groupDict=None):
         # TODO - request ladish client type
 
         #if (False):
@@ -1211,7 +1324,7 @@ class ClaudiaMainW(AbstractCanvasJackClass):
             #split = patchcanvas.SPLIT_NO
         #else:
 
-        splitTry = gDBus.ladish_graph.Get(GRAPH_DICT_OBJECT_TYPE_CLIENT, groupId, URI_CANVAS_SPLIT)
+        splitTry = groupDict[URI_CANVAS_SPLIT] if groupDict is not None else None
 
         if splitTry == "true":
             groupSplit = patchcanvas.SPLIT_YES
@@ -1244,19 +1357,60 @@ class ClaudiaMainW(AbstractCanvasJackClass):
 
         patchcanvas.addGroup(groupId, groupName, groupSplit, groupIcon)
 
-        x  = gDBus.ladish_graph.Get(GRAPH_DICT_OBJECT_TYPE_CLIENT, groupId, URI_CANVAS_X)
-        y  = gDBus.ladish_graph.Get(GRAPH_DICT_OBJECT_TYPE_CLIENT, groupId, URI_CANVAS_Y)
-        x2 = gDBus.ladish_graph.Get(GRAPH_DICT_OBJECT_TYPE_CLIENT, groupId, URI_CANVAS_X_SPLIT)
-        y2 = gDBus.ladish_graph.Get(GRAPH_DICT_OBJECT_TYPE_CLIENT, groupId, URI_CANVAS_Y_SPLIT)
+        if groupDict is not None:
+            self.canvas_set_group_dict(groupId, groupDict)
+
+        elif gDBus.ladish_graph:
+            # New group, ask ladish about it without waiting
+            requests = [(GRAPH_DICT_OBJECT_TYPE_CLIENT, groupId, key) for key in URI_CANVAS_GROUP_KEYS]
+            self.m_graphRequests.getMany(gDBus.ladish_graph, requests,
+                                         lambda values: self.canvas_set_group_dict(groupId, dict((request[2], value) for request, value in values.items()), True))
+
+        QTimer.singleShot(0, self.ui.miniCanvasPreview, SLOT("update()"))
+
+    def canvas_set_group_dict(self, groupId, groupDict, checkSplit=False):
+        group = patchcanvas.canvas.groups.get(groupId)
+
+        if group is None:
+            return
+
+        if checkSplit:
+            if groupDict[URI_CANVAS_SPLIT] == "true" and not group.split:
+                patchcanvas.splitGroup(groupId)
+            elif groupDict[URI_CANVAS_SPLIT] == "false" and group.split:
+                patchcanvas.joinGroup(groupId)
+
+        x  = groupDict[URI_CANVAS_X]
+        y  = groupDict[URI_CANVAS_Y]
+        x2 = groupDict[URI_CANVAS_X_SPLIT]
+        y2 = groupDict[URI_CANVAS_Y_SPLIT]
 
         if x != None and y != None:
             if x2 is None: x2 = "%f" % (float(x) + 50)
             if y2 is None: y2 = "%f" % (float(y) + 50)
             patchcanvas.setGroupPosFull(groupId, float(x), float(y), float(x2), float(y2))
 
-        QTimer.singleShot(0, self.ui.miniCanvasPreview, SLOT("update()"))
+    def canvas_saveGroupPositions(self, moves):
+        if not gDBus.ladish_graph:
+            return
+
+        items = []
+
+        for group_id, split_mode, x, y in moves:
+            if split_mode == patchcanvas.PORT_MODE_INPUT:
+                canvas_x = URI_CANVAS_X_SPLIT
+                canvas_y = URI_CANVAS_Y_SPLIT
+            else:
+                canvas_x = URI_CANVAS_X
+                canvas_y = URI_CANVAS_Y
+
+            items.append((GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, canvas_x, str(x)))
+            items.append((GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, canvas_y, str(y)))
+
+        self.m_graphRequests.setMany(gDBus.ladish_graph, items)
 
     def canvas_remove_group(self, group_id):
+        self.fPositionJournal.discard(group_id)
         patchcanvas.removeGroup(group_id)
         QTimer.singleShot(0, self.ui.miniCanvasPreview, SLOT("update()"))
 
@@ -1463,6 +1617,9 @@ class ClaudiaMainW(AbstractCanvasJackClass):
 
         self.ui.treeWidget.clear()
 
+        self.m_graphRequests.invalidate()
+        self.m_graphEvents = None
+        self.fPositionJournal.discard()
         patchcanvas.clear()
 
     def a2jStarted(self):
@@ -1515,22 +1672,11 @@ class ClaudiaMainW(AbstractCanvasJackClass):
         elif kwds['interface'] == "org.jackaudio.JackPatchbay":
             if gDBus.patchbay and kwds['path'] == gDBus.patchbay.object_path:
                 if DEBUG: print("DBus signal @org.jackaudio.JackPatchbay,", kwds['member'])
-                if kwds['member'] == "ClientAppeared":
-                    self.emit(SIGNAL("DBusClientAppearedCallback(int, QString)"), args[iJackClientId], args[iJackClientName])
-                elif kwds['member'] == "ClientDisappeared":
-                    self.emit(SIGNAL("DBusClientDisappearedCallback(int)"), args[iJackClientId])
-                elif kwds['member'] == "ClientRenamed":
-                    self.emit(SIGNAL("DBusClientRenamedCallback(int, QString)"), args[iRenamedId], args[iRenamedNewName])
-                elif kwds['member'] == "PortAppeared":
-                    self.emit(SIGNAL("DBusPortAppearedCallback(int, int, QString, int, int)"), args[iJackClientId], args[iJackPortId], args[iJackPortName], args[iJackPortFlags], args[iJackPortType])
-                elif kwds['member'] == "PortDisappeared":
-                    self.emit(SIGNAL("DBusPortDisppearedCallback(int)"), args[iJackPortId])
-                elif kwds['member'] == "PortRenamed":
-                    self.emit(SIGNAL("DBusPortRenamedCallback(int, QString)"), args[iJackPortId], args[iJackPortNewName])
-                elif kwds['member'] == "PortsConnected":
-                    self.emit(SIGNAL("DBusPortsConnectedCallback(int, int, int)"), args[iJackConnId], args[iSourcePortId], args[iTargetPortId])
-                elif kwds['member'] == "PortsDisconnected":
-                    self.emit(SIGNAL("DBusPortsDisconnectedCallback(int)"), args[iJackConnId])
+                if self.m_graphEvents is not None:
+                    # Graph is still being read
+                    self.m_graphEvents.append((kwds['member'], args))
+                else:
+                    self.emitPatchbaySignal(kwds['member'], args)
 
         elif kwds['interface'] == "org.ladish.Control":
             if DEBUG: print("DBus signal @org.ladish.Control,", kwds['member'])
@@ -1583,6 +1729,24 @@ class ClaudiaMainW(AbstractCanvasJackClass):
             elif kwds['member'] == "bridge_stopped":
                 self.a2jStopped()
 
+    def emitPatchbaySignal(self, member, args):
+        if member == "ClientAppeared":
+            self.emit(SIGNAL("DBusClientAppearedCallback(int, QString)"), args[iJackClientId], args[iJackClientName])
+        elif member == "ClientDisappeared":
+            self.emit(SIGNAL("DBusClientDisappearedCallback(int)"), args[iJackClientId])
+        elif member == "ClientRenamed":
+            self.emit(SIGNAL("DBusClientRenamedCallback(int, QString)"), args[iRenamedId], args[iRenamedNewName])
+        elif member == "PortAppeared":
+            self.emit(SIGNAL("DBusPortAppearedCallback(int, int, QString, int, int)"), args[iJackClientId], args[iJackPortId], args[iJackPortName], args[iJackPortFlags], args[iJackPortType])
+        elif member == "PortDisappeared":
+            self.emit(SIGNAL("DBusPortDisppearedCallback(int)"), args[iJackPortId])
+        elif member == "PortRenamed":
+            self.emit(SIGNAL("DBusPortRenamedCallback(int, QString)"), args[iJackPortId], args[iJackPortNewName])
+        elif member == "PortsConnected":
+            self.emit(SIGNAL("DBusPortsConnectedCallback(int, int, int)"), args[iJackConnId], args[iSourcePortId], args[iTargetPortId])
+        elif member == "PortsDisconnected":
+            self.emit(SIGNAL("DBusPortsDisconnectedCallback(int)"), args[iJackConnId])
+
     def DBusReconnect(self):
         gDBus.jack = gDBus.bus.get_object("org.jackaudio.service", "/org/jackaudio/Controller")
         gDBus.ladish_control = gDBus.bus.get_object("org.ladish", "/org/ladish/Control")
@@ -1862,6 +2026,9 @@ class ClaudiaMainW(AbstractCanvasJackClass):
             else:
                 return
 
+            # Save pending moves while the old graph is still there
+            self.fPositionJournal.flush()
+
             patchcanvas.clear()
             gDBus.patchbay = dbus.Interface(object_path, 'org.jackaudio.JackPatchbay')
             gDBus.ladish_graph = dbus.Interface(object_path, 'org.ladish.GraphDict')
@@ -2091,16 +2258,7 @@ class ClaudiaMainW(AbstractCanvasJackClass):
 
     @pyqtSlot(int, int, QPointF)
     def slot_canvasItemMoved(self, group_id, split_mode, pos):
-        if split_mode == patchcanvas.PORT_MODE_INPUT:
-            canvas_x = URI_CANVAS_X_SPLIT
-            canvas_y = URI_CANVAS_Y_SPLIT
-        else:
-            canvas_x = URI_CANVAS_X
-            canvas_y = URI_CANVAS_Y
-
-        gDBus.ladish_graph.Set(GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, canvas_x, str(pos.x()))
-        gDBus.ladish_graph.Set(GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, canvas_y, str(pos.y()))
-
+        self.fPositionJournal.addMove(group_id, split_mode, pos)
         self.ui.miniCanvasPreview.update()
 
     @pyqtSlot(int)
@@ -2144,6 +2302,9 @@ class ClaudiaMainW(AbstractCanvasJackClass):
 
     @pyqtSlot()
     def slot_handleCrash_jack(self):
+        self.m_graphRequests.invalidate()
+        self.m_graphEvents = None
+        self.fPositionJournal.discard()
         patchcanvas.clear()
         self.DBusReconnect()
         self.studioUnloaded()
@@ -2162,6 +2323,9 @@ class ClaudiaMainW(AbstractCanvasJackClass):
     @pyqtSlot()
     def slot_handleCrash_ladish(self):
         self.ui.treeWidget.clear()
+        self.m_graphRequests.invalidate()
+        self.m_graphEvents = None
+        self.fPositionJournal.discard()
         patchcanvas.clear()
         self.DBusReconnect()
         QMessageBox.warning(self, self.tr("Error"), self.tr("ladish daemon has crashed"))
@@ -2231,6 +2395,7 @@ class ClaudiaMainW(AbstractCanvasJackClass):
         if port_type_jack == JACKDBUS_PORT_TYPE_AUDIO:
             port_type = patchcanvas.PORT_TYPE_AUDIO_JACK
         elif port_type_jack == JACKDBUS_PORT_TYPE_MIDI:
+            # Needs to stay synchronous, connection signals for this port may follow right away
             if gDBus.ladish_graph.Get(GRAPH_DICT_OBJECT_TYPE_PORT, port_id, URI_A2J_PORT) == "yes":
                 port_type = patchcanvas.PORT_TYPE_MIDI_A2J
             else:
@@ -2520,8 +2685,11 @@ class ClaudiaMainW(AbstractCanvasJackClass):
     @pyqtSlot()
     def slot_configureClaudia(self):
         # Save groups position now
+        self.fPositionJournal.discard()
+
         if gDBus.patchbay:
             version, groups, conns = gDBus.patchbay.GetGraph(0)
+            items = []
 
             for group in groups:
                 group_id, group_name, ports = group
@@ -2529,10 +2697,12 @@ class ClaudiaMainW(AbstractCanvasJackClass):
                 group_pos_i = patchcanvas.getGroupPos(group_id, patchcanvas.PORT_MODE_OUTPUT)
                 group_pos_o = patchcanvas.getGroupPos(group_id, patchcanvas.PORT_MODE_INPUT)
 
-                gDBus.ladish_graph.Set(GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_X, str(group_pos_o.x()))
-                gDBus.ladish_graph.Set(GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_Y, str(group_pos_o.y()))
-                gDBus.ladish_graph.Set(GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_X_SPLIT, str(group_pos_i.x()))
-                gDBus.ladish_graph.Set(GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_Y_SPLIT, str(group_pos_i.y()))
+                items.append((GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_X, str(group_pos_o.x())))
+                items.append((GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_Y, str(group_pos_o.y())))
+                items.append((GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_X_SPLIT, str(group_pos_i.x())))
+                items.append((GRAPH_DICT_OBJECT_TYPE_CLIENT, group_id, URI_CANVAS_Y_SPLIT, str(group_pos_i.y())))
+
+            self.m_graphRequests.setMany(gDBus.ladish_graph, items)
 
         try:
             ladish_config = gDBus.bus.get_object("org.ladish.conf", "/org/ladish/conf")
@@ -2688,6 +2858,7 @@ class ClaudiaMainW(AbstractCanvasJackClass):
 
     def closeEvent(self, event):
         self.saveSettings()
+        self.fPositionJournal.flush()
         if self.systray:
             if self.fSavedSettings["Main/CloseToTray"]:
                 if self.systray.handleQtCloseEvent(event):
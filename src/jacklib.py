@@ -20,21 +20,29 @@
 # Imports (Global)
 
 from ctypes import *
+from os import getenv
 from sys import platform
 
 # ------------------------------------------------------------------------------------------------------------
-# Load JACK shared library
-
-try:
-    if platform == "darwin":
-        jacklib = cdll.LoadLibrary("libjack.dylib")
-    elif platform in ("win32", "win64", "cygwin"):
-        jacklib = cdll.LoadLibrary("libjack.dll")
-    else:
-        jacklib = cdll.LoadLibrary("libjack.so.0")
-except:
-    jacklib = None
-    raise ImportError("JACK is not available in this system")
+# Load JACK shared library, or the in-process fake server (see jacklib_fake.py) if JACKLIB_BACKEND is "fake"
+
+JACKLIB_BACKEND = getenv("JACKLIB_BACKEND", "libjack")
+
+if JACKLIB_BACKEND == "fake":
+    from jacklib_fake import FakeJackLibrary
+    jacklib = FakeJackLibrary()
+
+else:
+    try:
+        if platform == "darwin":
+            jacklib = cdll.LoadLibrary("libjack.dylib")
+        elif platform in ("win32", "win64", "cygwin"):
+            jacklib = cdll.LoadLibrary("libjack.dll")
+        else:
+            jacklib = cdll.LoadLibrary("libjack.so.0")
+    except:
+        jacklib = None
+        raise ImportError("JACK is not available in this system")
 
 # ------------------------------------------------------------------------------------------------------------
 # JACK2 test
@@ -950,7 +958,7 @@ def last_frame_time(client):
     return jacklib.jack_last_frame_time(client)
 
 def get_cycle_times(client, current_frames, current_usecs, next_usecs, period_usecs): # JACK_OPTIONAL_WEAK_EXPORT
-    if jacklib.jack_frames_to_time:
+    if jacklib.jack_get_cycle_times:
         return jacklib.jack_get_cycle_times(client, current_frames, current_usecs, next_usecs, period_usecs)
     return -1
 
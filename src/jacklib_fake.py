@@ -0,0 +1,785 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Fake in-process JACK server, a stand-in for libjack when testing without audio hardware
+# Copyright (C) 2010-2013 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the COPYING file
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+import os
+import re
+from collections import OrderedDict
+from random import Random
+from threading import Event, RLock, Thread
+from time import time
+
+# ------------------------------------------------------------------------------------------------------------
+# Static Variables
+
+# Same values as in jacklib, which can't be imported from here
+_JackPortIsInput    = 0x1
+_JackPortIsOutput   = 0x2
+_JackPortIsPhysical = 0x4
+_JackPortIsTerminal = 0x10
+
+_AUDIO_TYPE = b"32 bit float mono audio"
+_MIDI_TYPE  = b"8 bit raw midi"
+
+_EEXIST = 17
+
+FAKE_BUFFER_SIZES  = (256, 512, 1024)
+FAKE_TICK = 0.01 # seconds
+
+# Event kinds for rates, in events per second
+FAKE_EVENT_KINDS = ("register", "connect", "rename", "xrun", "buffer-size")
+
+# ------------------------------------------------------------------------------------------------------------
+# Server objects
+
+class FakeJackPort(object):
+    __slots__ = [
+        'portId',
+        'name',
+        'portType',
+        'flags',
+        'aliases',
+        'owner' # client name
+    ]
+
+class FakeJackClient(object):
+    __slots__ = [
+        'name',
+        'active',
+        'callbacks' # callback name -> (callback, arg)
+    ]
+
+# ------------------------------------------------------------------------------------------------------------
+# Fake JACK server
+#
+# Keeps the graph and tells the active clients about each change, from the thread that made it.
+# Like JACK, callbacks can come from a thread other than the GUI one.
+
+class FakeJackServer(object):
+    def __init__(self, bufferSize=1024, sampleRate=48000):
+        object.__init__(self)
+
+        self.fLock = RLock()
+
+        self.fClients     = []
+        self.fPorts       = OrderedDict() # port id -> port
+        self.fPortNames   = {}            # port name -> port
+        self.fGonePorts   = {}            # port id -> port being unregistered, only while clients are told about it
+        self.fConnections = OrderedDict() # (output port id, input port id) -> None
+        self.fNextPortId  = 1
+
+        self.fBufferSize = bufferSize
+        self.fSampleRate = sampleRate
+
+        self.fEventCount = 0
+
+    # -----------------------------------------------------------------
+    # Clients
+
+    def openClient(self, name):
+        with self.fLock:
+            names = [client.name for client in self.fClients]
+            newName = name
+            i = 1
+
+            while newName in names:
+                newName = "%s-%02i" % (name, i)
+                i += 1
+
+            client = FakeJackClient()
+            client.name      = newName
+            client.active    = False
+            client.callbacks = {}
+
+            self.fClients.append(client)
+            return client
+
+    def closeClient(self, client):
+        with self.fLock:
+            if client in self.fClients:
+                self.fClients.remove(client)
+
+    def notify(self, callbackName, *args):
+        with self.fLock:
+            callbacks = [client.callbacks.get(callbackName) for client in self.fClients if client.active]
+
+        self.fEventCount += 1
+
+        for callback in callbacks:
+            if callback is not None:
+                callback[0](*(args + (callback[1],)))
+
+    # -----------------------------------------------------------------
+    # Graph changes
+
+    def addPort(self, name, portType, flags, owner=""):
+        with self.fLock:
+            if name in self.fPortNames:
+                return -1
+
+            port = FakeJackPort()
+            port.portId   = self.fNextPortId
+            port.name     = name
+            port.portType = portType
+            port.flags    = flags
+            port.aliases  = []
+            port.owner    = owner or name.split(":", 1)[0]
+
+            self.fPorts[port.portId] = port
+            self.fPortNames[name]    = port
+            self.fNextPortId += 1
+
+        self.notify("port-registration", port.portId, 1)
+        return port.portId
+
+    def removePort(self, portId):
+        with self.fLock:
+            port = self.fPorts.get(portId)
+
+            if port is None:
+                return -1
+
+            connections = [portIds for portIds in self.fConnections if portId in portIds]
+
+        for portIdA, portIdB in connections:
+            self.disconnectPorts(portIdA, portIdB)
+
+        with self.fLock:
+            del self.fPorts[portId]
+            del self.fPortNames[port.name]
+            self.fGonePorts[portId] = port
+
+        # Like in JACK, the port can be looked up from the callback but not afterwards
+        self.notify("port-registration", portId, 0)
+
+        with self.fLock:
+            del self.fGonePorts[portId]
+
+        return 0
+
+    def renamePort(self, portId, newName):
+        with self.fLock:
+            port = self.fPorts.get(portId)
+
+            if port is None or newName in self.fPortNames:
+                return -1
+
+            oldName = port.name
+            del self.fPortNames[oldName]
+            port.name = newName
+            self.fPortNames[newName] = port
+
+        self.notify("port-rename", portId, oldName.encode("utf-8"), newName.encode("utf-8"))
+        return 0
+
+    def connectPorts(self, portIdA, portIdB):
+        with self.fLock:
+            portA = self.fPorts.get(portIdA)
+            portB = self.fPorts.get(portIdB)
+
+            if portA is None or portB is None or portA.portType != portB.portType:
+                return -1
+            if not (portA.flags & _JackPortIsOutput and portB.flags & _JackPortIsInput):
+                return -1
+            if (portIdA, portIdB) in self.fConnections:
+                return _EEXIST
+
+            self.fConnections[(portIdA, portIdB)] = None
+
+        self.notify("port-connect", portIdA, portIdB, 1)
+        return 0
+
+    def disconnectPorts(self, portIdA, portIdB):
+        with self.fLock:
+            if (portIdA, portIdB) not in self.fConnections:
+                return -1
+
+            del self.fConnections[(portIdA, portIdB)]
+
+        self.notify("port-connect", portIdA, portIdB, 0)
+        return 0
+
+    def xrun(self):
+        self.notify("xrun")
+
+    def setBufferSize(self, bufferSize):
+        with self.fLock:
+            self.fBufferSize = bufferSize
+
+        self.notify("buffer-size", bufferSize)
+        return 0
+
+    # -----------------------------------------------------------------
+    # Queries
+
+    def portById(self, portId):
+        with self.fLock:
+            return self.fPorts.get(portId) or self.fGonePorts.get(portId)
+
+    def portByName(self, name):
+        with self.fLock:
+            return self.fPortNames.get(name)
+
+    def portList(self):
+        with self.fLock:
+            return list(self.fPorts.values())
+
+    def portConnections(self, portId):
+        with self.fLock:
+            names = []
+
+            for portIdA, portIdB in self.fConnections:
+                if portIdA == portId:
+                    names.append(self.fPorts[portIdB].name)
+                elif portIdB == portId:
+                    names.append(self.fPorts[portIdA].name)
+
+            return names
+
+    def connectionList(self):
+        with self.fLock:
+            return list(self.fConnections)
+
+    def bufferSize(self):
+        return self.fBufferSize
+
+    def sampleRate(self):
+        return self.fSampleRate
+
+    def eventCount(self):
+        return self.fEventCount
+
+# ------------------------------------------------------------------------------------------------------------
+# Deterministic event generator
+#
+# Makes port registration, connection, rename, xrun and buffer-size changes at the given rates (events per second).
+# The same seed always gives the same sequence of events, no matter how 'step()' is called.
+
+class FakeJackEventGenerator(object):
+    def __init__(self, server, rates, seed=0, clientCount=8):
+        object.__init__(self)
+
+        self.fServer  = server
+        self.fRates   = dict((kind, float(rates.get(kind, 0.0))) for kind in FAKE_EVENT_KINDS)
+        self.fRandom  = Random(seed)
+        self.fPending = dict((kind, 0.0) for kind in FAKE_EVENT_KINDS)
+        self.fClients = ["fake_%i" % i for i in range(max(1, clientCount))]
+        self.fPortNum = 0
+
+        self.fThread = None
+        self.fStopEvent = Event()
+
+    def populate(self):
+        server = self.fServer
+
+        for i in range(2):
+            server.addPort("system:capture_%i" % (i+1), _AUDIO_TYPE, _JackPortIsOutput|_JackPortIsPhysical|_JackPortIsTerminal)
+            server.addPort("system:playback_%i" % (i+1), _AUDIO_TYPE, _JackPortIsInput|_JackPortIsPhysical|_JackPortIsTerminal)
+
+        for clientName in self.fClients:
+            for portType in (_AUDIO_TYPE, _AUDIO_TYPE, _MIDI_TYPE):
+                self.addRandomPort(clientName, portType, _JackPortIsInput)
+                self.addRandomPort(clientName, portType, _JackPortIsOutput)
+
+    def addRandomPort(self, clientName=None, portType=None, flags=None):
+        if clientName is None:
+            clientName = self.fRandom.choice(self.fClients)
+        if portType is None:
+            portType = self.fRandom.choice((_AUDIO_TYPE, _AUDIO_TYPE, _MIDI_TYPE))
+        if flags is None:
+            flags = self.fRandom.choice((_JackPortIsInput, _JackPortIsOutput))
+
+        self.fPortNum += 1
+        return self.fServer.addPort("%s:%s_%i" % (clientName, "in" if flags & _JackPortIsInput else "out", self.fPortNum), portType, flags)
+
+    # Only ports of the fake clients are changed, never the system ones
+    def randomClientPort(self, ports):
+        ports = [port for port in ports if port.owner != "system"]
+        return self.fRandom.choice(ports) if ports else None
+
+    def doEvent(self, kind):
+        server = self.fServer
+        random = self.fRandom
+
+        if kind == "register":
+            port = self.randomClientPort(server.portList())
+
+            # Keep the number of ports around its initial size
+            if port is None or random.random() < 0.5:
+                self.addRandomPort()
+            else:
+                server.removePort(port.portId)
+
+        elif kind == "connect":
+            connections = server.connectionList()
+
+            if connections and random.random() < 0.5:
+                server.disconnectPorts(*random.choice(connections))
+            else:
+                ports   = server.portList()
+                outputs = [port for port in ports if port.flags & _JackPortIsOutput]
+                inputs  = [port for port in ports if port.flags & _JackPortIsInput]
+
+                if outputs and inputs:
+                    portA = random.choice(outputs)
+                    portB = random.choice([port for port in inputs if port.portType == portA.portType] or inputs)
+                    server.connectPorts(portA.portId, portB.portId)
+
+        elif kind == "rename":
+            port = self.randomClientPort(server.portList())
+
+            if port is not None:
+                self.fPortNum += 1
+                server.renamePort(port.portId, "%s:renamed_%i" % (port.owner, self.fPortNum))
+
+        elif kind == "xrun":
+            server.xrun()
+
+        elif kind == "buffer-size":
+            server.setBufferSize(random.choice([size for size in FAKE_BUFFER_SIZES if size != server.bufferSize()]))
+
+    # Makes the events due in 'seconds', returns how many were made
+    def step(self, seconds):
+        count = 0
+
+        for kind in FAKE_EVENT_KINDS:
+            self.fPending[kind] += self.fRates[kind] * seconds
+
+            while self.fPending[kind] >= 1.0:
+                self.fPending[kind] -= 1.0
+                self.doEvent(kind)
+                count += 1
+
+        return count
+
+    # Runs 'step()' in its own thread, like JACK's notification thread
+    def start(self):
+        if self.fThread is not None or not any(self.fRates.values()):
+            return
+
+        self.fStopEvent.clear()
+        self.fThread = Thread(target=self.run)
+        self.fThread.daemon = True
+        self.fThread.start()
+
+    def stop(self):
+        if self.fThread is None:
+            return
+
+        self.fStopEvent.set()
+        self.fThread.join()
+        self.fThread = None
+
+    def run(self):
+        lastTime = time()
+
+        while not self.fStopEvent.wait(FAKE_TICK):
+            curTime  = time()
+            self.step(curTime - lastTime)
+            lastTime = curTime
+
+# "register=50,connect=200" -> {"register": 50.0, "connect": 200.0}
+def parse_fake_rates(ratesStr):
+    rates = {}
+
+    for rate in ratesStr.split(","):
+        kind, sep, value = rate.strip().partition("=")
+
+        if kind in FAKE_EVENT_KINDS:
+            try:
+                rates[kind] = float(value)
+            except ValueError:
+                pass
+
+    return rates
+
+# ------------------------------------------------------------------------------------------------------------
+# libjack stand-in
+#
+# Has the same 'jack_*' functions jacklib sets up and calls on the real library, so everything above jacklib
+# (helpers, Catia, Claudia) works unchanged. Functions it doesn't know about do nothing and return 0.
+# Environment:
+#   JACKLIB_FAKE_RATES   - events per second, "register=N,connect=N,rename=N,xrun=N,buffer-size=N"
+#   JACKLIB_FAKE_SEED    - random seed for generated events
+#   JACKLIB_FAKE_CLIENTS - number of fake clients in the initial graph
+
+class _FakeFunction(object):
+    def __init__(self, func):
+        object.__init__(self)
+
+        self.func     = func
+        self.argtypes = None
+        self.restype  = None
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+def _fakeNoop(*args):
+    return 0
+
+class FakeJackLibrary(object):
+    def __init__(self, server=None, generator=None):
+        object.__init__(self)
+
+        if server is None:
+            server = FakeJackServer()
+
+        if generator is None:
+            seed    = int(os.getenv("JACKLIB_FAKE_SEED", "0"))
+            clients = int(os.getenv("JACKLIB_FAKE_CLIENTS", "8"))
+            generator = FakeJackEventGenerator(server, parse_fake_rates(os.getenv("JACKLIB_FAKE_RATES", "")), seed, clients)
+            generator.populate()
+
+        self.server    = server
+        self.generator = generator
+
+    def __getattr__(self, name):
+        if not name.startswith("jack_"):
+            raise AttributeError(name)
+
+        func = _FakeFunction(getattr(self, "fake_" + name[5:], _fakeNoop))
+        setattr(self, name, func)
+        return func
+
+    # -----------------------------------------------------------------
+    # Client
+
+    def fake_get_version_string(self):
+        return b"fake"
+
+    def fake_client_open(self, clientName, options, status, uuid):
+        if status:
+            status.contents.value = 0
+        return self.server.openClient(str(clientName, encoding="utf-8"))
+
+    def fake_client_close(self, client):
+        client.active = False
+        self.server.closeClient(client)
+
+        if not any(otherClient.active for otherClient in self.server.fClients):
+            self.generator.stop()
+
+        return 0
+
+    def fake_client_name_size(self):
+        return 64
+
+    def fake_get_client_name(self, client):
+        return client.name.encode("utf-8")
+
+    def fake_activate(self, client):
+        client.active = True
+        self.generator.start()
+        return 0
+
+    def fake_deactivate(self, client):
+        client.active = False
+        return 0
+
+    def fake_is_realtime(self, client):
+        return 1
+
+    # -----------------------------------------------------------------
+    # Callbacks
+
+    def setCallback(self, client, name, callback, arg):
+        client.callbacks[name] = (callback, arg)
+        return 0
+
+    def fake_on_shutdown(self, client, callback, arg):
+        self.setCallback(client, "shutdown", callback, arg)
+
+    def fake_set_buffer_size_callback(self, client, callback, arg):
+        return self.setCallback(client, "buffer-size", callback, arg)
+
+    def fake_set_sample_rate_callback(self, client, callback, arg):
+        return self.setCallback(client, "sample-rate", callback, arg)
+
+    def fake_set_xrun_callback(self, client, callback, arg):
+        return self.setCallback(client, "xrun", callback, arg)
+
+    def fake_set_port_registration_callback(self, client, callback, arg):
+        return self.setCallback(client, "port-registration", callback, arg)
+
+    def fake_set_port_connect_callback(self, client, callback, arg):
+        return self.setCallback(client, "port-connect", callback, arg)
+
+    def fake_set_port_rename_callback(self, client, callback, arg):
+        return self.setCallback(client, "port-rename", callback, arg)
+
+    # -----------------------------------------------------------------
+    # Server
+
+    def fake_set_buffer_size(self, client, bufferSize):
+        return self.server.setBufferSize(bufferSize)
+
+    def fake_get_buffer_size(self, client):
+        return self.server.bufferSize()
+
+    def fake_get_sample_rate(self, client):
+        return self.server.sampleRate()
+
+    def fake_cpu_load(self, client):
+        return 0.0
+
+    # -----------------------------------------------------------------
+    # Ports
+
+    def fake_port_register(self, client, portName, portType, flags, bufferSize):
+        portId = self.server.addPort("%s:%s" % (client.name, str(portName, encoding="utf-8")), portType, flags, client.name)
+        return self.server.portById(portId) if portId > 0 else None
+
+    def fake_port_unregister(self, client, port):
+        return self.server.removePort(port.portId)
+
+    def fake_port_name(self, port):
+        return port.name.encode("utf-8")
+
+    def fake_port_short_name(self, port):
+        return port.name.split(":", 1)[-1].encode("utf-8")
+
+    def fake_port_flags(self, port):
+        return port.flags
+
+    def fake_port_type(self, port):
+        return port.portType
+
+    def fake_port_is_mine(self, client, port):
+        return int(port.owner == client.name)
+
+    def fake_port_connected(self, port):
+        return len(self.server.portConnections(port.portId))
+
+    def fake_port_get_connections(self, port):
+        names = self.server.portConnections(port.portId)
+        return [name.encode("utf-8") for name in names] + [None] if names else None
+
+    def fake_port_get_all_connections(self, client, port):
+        return self.fake_port_get_connections(port)
+
+    def fake_port_set_name(self, port, portName):
+        return self.server.renamePort(port.portId, str(portName, encoding="utf-8"))
+
+    def fake_port_set_alias(self, port, alias):
+        if len(port.aliases) >= 2:
+            return -1
+        port.aliases.append(alias)
+        return 0
+
+    def fake_port_unset_alias(self, port, alias):
+        if alias not in port.aliases:
+            return -1
+        port.aliases.remove(alias)
+        return 0
+
+    def fake_port_get_aliases(self, port, aliases):
+        for i in range(len(port.aliases)):
+            aliases.contents[i] = port.aliases[i]
+        return len(port.aliases)
+
+    def fake_port_name_size(self):
+        return 256
+
+    def fake_port_type_size(self):
+        return 32
+
+    def fake_connect(self, client, sourcePort, destinationPort):
+        portA = self.server.portByName(str(sourcePort, encoding="utf-8"))
+        portB = self.server.portByName(str(destinationPort, encoding="utf-8"))
+
+        if portA is None or portB is None:
+            return -1
+
+        return self.server.connectPorts(portA.portId, portB.portId)
+
+    def fake_disconnect(self, client, sourcePort, destinationPort):
+        portA = self.server.portByName(str(sourcePort, encoding="utf-8"))
+        portB = self.server.portByName(str(destinationPort, encoding="utf-8"))
+
+        if portA is None or portB is None:
+            return -1
+
+        return self.server.disconnectPorts(portA.portId, portB.portId)
+
+    def fake_get_ports(self, client, portNamePattern, typeNamePattern, flags):
+        portNameRe = re.compile(str(portNamePattern, encoding="utf-8")) if portNamePattern else None
+        typeNameRe = re.compile(str(typeNamePattern, encoding="utf-8")) if typeNamePattern else None
+        names = []
+
+        for port in self.server.portList():
+            if portNameRe is not None and not portNameRe.search(port.name):
+                continue
+            if typeNameRe is not None and not typeNameRe.search(str(port.portType, encoding="utf-8")):
+                continue
+            if flags and (port.flags & flags) != flags:
+                continue
+            names.append(port.name.encode("utf-8"))
+
+        return names + [None] if names else None
+
+    def fake_port_by_name(self, client, portName):
+        return self.server.portByName(str(portName, encoding="utf-8"))
+
+    def fake_port_by_id(self, client, portId):
+        return self.server.portById(portId)
+
+    def fake_custom_get_data(self, client, clientName, key, data, size):
+        return -1
+
+# ------------------------------------------------------------------------------------------------------------
+# Stress test for Catia's port event handling, run as 'python3 jacklib_fake.py [seconds of events] [rates]'
+#
+# Runs the real Catia main window offscreen on top of the fake server, with events made from the generator's thread.
+# Reports events per second and the latency from each JACK callback to the end of the canvas update that applied it,
+# then checks that Catia ended up with the same graph as the server.
+
+if __name__ == '__main__':
+    import sys
+
+    os.environ["JACKLIB_BACKEND"] = "fake"
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PyQt4.QtCore import pyqtSlot, QTimer
+    from PyQt4.QtGui import QApplication
+
+    import jacklib
+    import catia
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    rates   = parse_fake_rates(sys.argv[2] if len(sys.argv) > 2 else "register=200,connect=1000,rename=20,xrun=10,buffer-size=1")
+
+    server    = jacklib.jacklib.server
+    generator = jacklib.jacklib.generator
+    generator.fRates.update(rates)
+
+    # Catia must read the fake graph, not the one of a cadence-graphd that may be running
+    catia.get_graphd_snapshot = lambda: None
+
+    # Event key -> times of the JACK callbacks not yet applied, filled from the generator's thread
+    pendingLock  = RLock()
+    pendingTimes = {}
+    batchTimes   = []
+    latencies    = []
+
+    def eventQueued(key):
+        with pendingLock:
+            pendingTimes.setdefault(key, []).append(time())
+
+    class StressCatiaMainW(catia.CatiaMainW):
+        def __init__(self):
+            self.fBatchTimes = []
+            catia.CatiaMainW.__init__(self)
+
+        def JackPortRegistrationCallback(self, portId, registerYesNo, arg):
+            eventQueued(("register", portId, bool(registerYesNo)))
+            return catia.CatiaMainW.JackPortRegistrationCallback(self, portId, registerYesNo, arg)
+
+        def JackPortConnectCallback(self, portA, portB, connectYesNo, arg):
+            eventQueued(("connect", portA, portB, bool(connectYesNo)))
+            return catia.CatiaMainW.JackPortConnectCallback(self, portA, portB, connectYesNo, arg)
+
+        def JackPortRenameCallback(self, portId, oldName, newName, arg):
+            eventQueued(("rename", portId, str(newName, encoding="utf-8")))
+            return catia.CatiaMainW.JackPortRenameCallback(self, portId, oldName, newName, arg)
+
+        # Events reach these slots in the order they were queued, so they are part of the next batch
+        def takeQueued(self, key):
+            with pendingLock:
+                times = pendingTimes.get(key)
+                if times:
+                    self.fBatchTimes.append(times.pop(0))
+
+        @pyqtSlot(int, bool, str)
+        def slot_PortRegistrationCallback(self, portIdJack, registerYesNo, portNameR):
+            self.takeQueued(("register", portIdJack, registerYesNo))
+            catia.CatiaMainW.slot_PortRegistrationCallback(self, portIdJack, registerYesNo, portNameR)
+
+        @pyqtSlot(int, int, bool, str, str)
+        def slot_PortConnectCallback(self, portIdJackA, portIdJackB, connectYesNo, portRealNameA, portRealNameB):
+            self.takeQueued(("connect", portIdJackA, portIdJackB, connectYesNo))
+            catia.CatiaMainW.slot_PortConnectCallback(self, portIdJackA, portIdJackB, connectYesNo, portRealNameA, portRealNameB)
+
+        @pyqtSlot(int, str, str)
+        def slot_PortRenameCallback(self, portIdJack, oldName, newName):
+            self.takeQueued(("rename", portIdJack, newName))
+            catia.CatiaMainW.slot_PortRenameCallback(self, portIdJack, oldName, newName)
+
+        @pyqtSlot()
+        def slot_handlePortEvents(self):
+            batchStart = time()
+            catia.CatiaMainW.slot_handlePortEvents(self)
+            batchEnd = time()
+
+            batchTimes.append(batchEnd - batchStart)
+            latencies.extend(batchEnd - queueTime for queueTime in self.fBatchTimes)
+            self.fBatchTimes = []
+
+    app = QApplication(sys.argv)
+
+    # Events start as soon as Catia activates its client
+    startCount = server.eventCount()
+    startTime  = time()
+    gui = StressCatiaMainW()
+
+    def stopEvents():
+        generator.stop()
+        # Give Catia time to apply what's left
+        QTimer.singleShot(catia.PORT_EVENTS_DELAY * 10, app.quit)
+
+    QTimer.singleShot(int(seconds * 1000), stopEvents)
+    app.exec_()
+
+    elapsed = time() - startTime
+    total   = server.eventCount() - startCount
+
+    # Catia's view of the graph, by real JACK port names
+    portNames = set(name for name in gui.fPortNameMap if not name.startswith("[ALSA-"))
+    connections = set()
+
+    for portOutId, portInId in gui.fConnectionPortMap:
+        portOutName = gui.canvas_getPortRealName(portOutId)
+        portInName  = gui.canvas_getPortRealName(portInId)
+        if not portOutName.startswith("[ALSA-"):
+            connections.add((portOutName, portInName))
+
+    serverPortNames   = set(port.name for port in server.portList())
+    serverConnections = set((server.portById(portIdA).name, server.portById(portIdB).name) for portIdA, portIdB in server.connectionList())
+
+    jacklib.deactivate(catia.gJack.client)
+    jacklib.client_close(catia.gJack.client)
+
+    print("%.1f s, %i events, %.0f events/s, %i batches" % (elapsed, total, total / elapsed if elapsed > 0.0 else 0.0, len(batchTimes)))
+
+    if batchTimes:
+        batchTimes.sort()
+        print("batch handling: median %.3f ms, max %.3f ms" % (batchTimes[len(batchTimes)//2] * 1000, batchTimes[-1] * 1000))
+
+    if latencies:
+        latencies.sort()
+        print("callback to canvas: median %.1f ms, 95%% %.1f ms, max %.1f ms" % (latencies[len(latencies)//2] * 1000,
+                                                                                latencies[int(len(latencies) * 0.95)] * 1000,
+                                                                                latencies[-1] * 1000))
+
+    if portNames != serverPortNames or connections != serverConnections:
+        print("Catia's graph differs from the server: %i/%i ports, %i/%i connections" % (len(portNames), len(serverPortNames),
+                                                                                         len(connections), len(serverConnections)))
+        sys.exit(1)
+
+    print("Catia's graph matches the server: %i ports, %i connections" % (len(portNames), len(connections)))
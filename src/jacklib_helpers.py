@@ -16,6 +16,11 @@
 #
 # For a full copy of the GNU General Public License see the COPYING file
 
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+from collections import OrderedDict
+
 # ------------------------------------------------------------------------------------------------------------
 # Try Import jacklib
 
@@ -115,3 +120,155 @@ def translate_midi_event_buffer(void_p, size):
         return (void_p[0], void_p[1], void_p[2], void_p[3])
     else:
         return ()
+
+# ------------------------------------------------------------------------------------------------------------
+# Coalescing queue for JACK port events
+#
+# Collects port registration, connection and rename events (keyed by JACK port id) and
+# returns only their net effect, so bursts of events can be applied as a single batch.
+# Connection events carry the port names read when they arrived, ids may be gone or reused by then.
+
+class JackPortEventQueue(object):
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.fRegistrations = OrderedDict() # portId -> [firstRegister, lastRegister, unregisteredName]
+        self.fConnections   = OrderedDict() # (portIdA, portIdB) -> [firstConnect, lastConnect, firstNames, lastNames]
+        self.fRenames       = OrderedDict() # portId -> [oldName, newName]
+
+    def isEmpty(self):
+        return not (self.fRegistrations or self.fConnections or self.fRenames)
+
+    def portRegistration(self, portId, registerYesNo, portName=""):
+        event = self.fRegistrations.get(portId)
+
+        if event is None:
+            self.fRegistrations[portId] = [registerYesNo, registerYesNo, "" if registerYesNo else portName]
+            return
+
+        event[1] = registerYesNo
+
+        # Keep the name the port had before this batch
+        if not (registerYesNo or event[2]):
+            event[2] = portName
+
+    def portConnection(self, portIdA, portIdB, connectYesNo, portNameA, portNameB):
+        event = self.fConnections.get((portIdA, portIdB))
+
+        if event is None:
+            self.fConnections[(portIdA, portIdB)] = [connectYesNo, connectYesNo, (portNameA, portNameB), (portNameA, portNameB)]
+        else:
+            event[1] = connectYesNo
+            event[3] = (portNameA, portNameB)
+
+    def portRename(self, portId, oldName, newName):
+        event = self.fRenames.get(portId)
+
+        if event is None:
+            self.fRenames[portId] = [oldName, newName]
+        else:
+            event[1] = newName
+
+    # Returns the net changes, in the order they should be applied:
+    # (renames, disconnections, unregistrations, registrations, connections)
+    # Disconnections and connections are (portNameA, portNameB), with renames in this batch already applied.
+    def takeEvents(self):
+        renames = []
+        disconnections   = []
+        unregistrations  = []
+        registrations    = []
+        connections      = []
+        reregisteredIds  = []
+
+        for portId, event in self.fRenames.items():
+            oldName, newName = event
+            if oldName != newName:
+                renames.append((portId, oldName, newName))
+
+        for portId, event in self.fRegistrations.items():
+            firstRegister, lastRegister, unregisteredName = event
+
+            # Port came and went in the same batch
+            if firstRegister and not lastRegister:
+                continue
+
+            if not firstRegister:
+                unregistrations.append((portId, unregisteredName))
+            if lastRegister:
+                registrations.append(portId)
+            if not firstRegister and lastRegister:
+                reregisteredIds.append(portId)
+
+        def renamed(portIds, portNames):
+            return tuple(self.fRenames[portId][1] if portId in self.fRenames and portId not in reregisteredIds else portName
+                         for portId, portName in zip(portIds, portNames))
+
+        for portIds, event in self.fConnections.items():
+            firstConnect, lastConnect, firstNames, lastNames = event
+
+            if firstConnect == lastConnect:
+                if lastConnect:
+                    connections.append(renamed(portIds, lastNames))
+                else:
+                    disconnections.append(renamed(portIds, firstNames))
+
+            # Disconnected and connected again, only matters if one of the ports was re-created
+            elif lastConnect and (portIds[0] in reregisteredIds or portIds[1] in reregisteredIds):
+                disconnections.append(renamed(portIds, firstNames))
+                connections.append(renamed(portIds, lastNames))
+
+        self.clear()
+
+        return (renames, disconnections, unregistrations, registrations, connections)
+
+# ------------------------------------------------------------------------------------------------------------
+# Snapshot of the whole JACK graph, read in a single pass
+
+# Returns (flags, type string, aliases or None) of a port
+def get_port_info(portPtr, withAliases=False):
+    portFlags   = jacklib.port_flags(portPtr)
+    portTypeStr = str(jacklib.port_type(portPtr), encoding="utf-8")
+    portAliases = jacklib.port_get_aliases(portPtr) if withAliases else None
+
+    return (portFlags, portTypeStr, portAliases)
+
+class JackGraphSnapshot(object):
+    __slots__ = [
+        'ports',      # OrderedDict, full port name -> (flags, type string, aliases or None)
+        'connections' # list of (output port name, input port name)
+    ]
+
+def get_graph_snapshot(client, withAliases=False):
+    snapshot = JackGraphSnapshot()
+    snapshot.ports = OrderedDict()
+    snapshot.connections = []
+
+    for portName in c_char_p_p_to_list(jacklib.get_ports(client, "", "", 0)):
+        portPtr = jacklib.port_by_name(client, portName)
+
+        # Port was removed meanwhile
+        if not portPtr:
+            continue
+
+        portInfo = get_port_info(portPtr, withAliases)
+        snapshot.ports[portName] = portInfo
+
+        # Only read connections from output ports, each one is listed once
+        if portInfo[0] & jacklib.JackPortIsOutput:
+            for portConName in c_char_p_p_to_list(jacklib.port_get_all_connections(client, portPtr)):
+                snapshot.connections.append((portName, portConName))
+
+    return snapshot
+
+# Returns (removed ports, added ports, removed connections, added connections)
+def diff_graph_snapshots(oldSnapshot, newSnapshot):
+    oldConnections = set(oldSnapshot.connections)
+    newConnections = set(newSnapshot.connections)
+
+    removedPorts = [portName for portName in oldSnapshot.ports if portName not in newSnapshot.ports]
+    addedPorts   = [portName for portName in newSnapshot.ports if portName not in oldSnapshot.ports]
+    removedConnections = [conn for conn in oldSnapshot.connections if conn not in newConnections]
+    addedConnections   = [conn for conn in newSnapshot.connections if conn not in oldConnections]
+
+    return (removedPorts, addedPorts, removedConnections, addedConnections)
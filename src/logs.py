@@ -19,8 +19,8 @@
 # ------------------------------------------------------------------------------------------------------------
 # Imports (Global)
 
-from PyQt4.QtCore import pyqtSlot, Qt, QFile, QIODevice, QMutex, QMutexLocker, QTextStream, QThread, QSettings
-from PyQt4.QtGui import QDialog, QPalette, QSyntaxHighlighter
+from PyQt4.QtCore import pyqtSlot, Qt, QAbstractListModel, QFileSystemWatcher, QModelIndex, QObject, QSettings, QSize
+from PyQt4.QtGui import QAction, QApplication, QColor, QDialog, QKeySequence, QPalette, QStyle, QStyledItemDelegate
 
 # ------------------------------------------------------------------------------------------------------------
 # Imports (Custom Stuff)
@@ -35,231 +35,251 @@ def fixLogText(text):
     return text.replace("[1m[31m", "").replace("[1m[33m", "").replace("[31m", "").replace("[33m", "").replace("[0m", "")
 
 # ------------------------------------------------------------------------------------------------------------
-# Syntax Highlighter for JACK
-
-class SyntaxHighlighter_JACK(QSyntaxHighlighter):
-    def __init__(self, parent):
-        QSyntaxHighlighter.__init__(self, parent)
-
-        self.fPalette = parent.palette()
-
-    def highlightBlock(self, text):
-        if ": ERROR: " in text:
-            self.setFormat(text.find(" ERROR: "), len(text), Qt.red)
-        elif ": WARNING: " in text:
-            self.setFormat(text.find(" WARNING: "), len(text), Qt.darkRed)
-        elif ": ------------------" in text:
-            self.setFormat(text.find(" ------------------"), len(text), self.fPalette.color(QPalette.Active, QPalette.Mid))
-        elif ": Connecting " in text:
-            self.setFormat(text.find(" Connecting "), len(text), self.fPalette.color(QPalette.Active, QPalette.Link))
-        elif ": Disconnecting " in text:
-            self.setFormat(text.find(" Disconnecting "), len(text), self.fPalette.color(QPalette.Active, QPalette.LinkVisited))
-        #elif (": New client " in text):
-            #self.setFormat(text.find(" New client "), len(text), self.fPalette.color(QPalette.Active, QPalette.Link))
+# Highlight rules, as (text to match, text where highlight starts, color or palette role)
+
+HIGHLIGHT_RULES_JACK = (
+    (": ERROR: ", " ERROR: ", Qt.red),
+    (": WARNING: ", " WARNING: ", Qt.darkRed),
+    (": ------------------", " ------------------", QPalette.Mid),
+    (": Connecting ", " Connecting ", QPalette.Link),
+    (": Disconnecting ", " Disconnecting ", QPalette.LinkVisited)
+)
+
+HIGHLIGHT_RULES_A2J = (
+    (": error: ", " error: ", Qt.red),
+    (": WARNING: ", " WARNING: ", Qt.darkRed),
+    (": ----------------------------", "----------------------------", QPalette.Mid),
+    (": port created: ", " port created: ", QPalette.Link),
+    (": port deleted: ", " port deleted: ", QPalette.LinkVisited)
+)
+
+HIGHLIGHT_RULES_LASH = (
+    (": ERROR: ", " ERROR: ", Qt.red),
+    (": WARNING: ", " WARNING: ", Qt.darkRed),
+    (": ------------------", " ------------------", QPalette.Mid)
+)
+
+HIGHLIGHT_RULES_LADISH = (
+    (": ERROR: ", " ERROR: ", Qt.red),
+    (": WARNING: ", " WARNING: ", Qt.darkRed),
+    (": -------", " -------", QPalette.Mid)
+)
 
 # ------------------------------------------------------------------------------------------------------------
-# Syntax Highlighter for A2J
+# Log lines model, keeps only the last 'maxLines' lines in a ring buffer
 
-class SyntaxHighlighter_A2J(QSyntaxHighlighter):
-    def __init__(self, parent):
-        QSyntaxHighlighter.__init__(self, parent)
-
-        self.fPalette = parent.palette()
-
-    def highlightBlock(self, text):
-        if ": error: " in text:
-            self.setFormat(text.find(" error: "), len(text), Qt.red)
-        elif ": WARNING: " in text:
-            self.setFormat(text.find(" WARNING: "), len(text), Qt.darkRed)
-        elif ": ----------------------------" in text:
-            self.setFormat(text.find("----------------------------"), len(text), self.fPalette.color(QPalette.Active, QPalette.Mid))
-        elif ": port created: " in text:
-            self.setFormat(text.find(" port created: "), len(text), self.fPalette.color(QPalette.Active, QPalette.Link))
-        elif ": port deleted: " in text:
-            self.setFormat(text.find(" port deleted: "), len(text), self.fPalette.color(QPalette.Active, QPalette.LinkVisited))
+class LogsModel(QAbstractListModel):
+    def __init__(self, parent, maxLines):
+        QAbstractListModel.__init__(self, parent)
 
-# ------------------------------------------------------------------------------------------------------------
-# Syntax Highlighter for LASH
+        self.fLines    = [""] * maxLines
+        self.fMaxLines = maxLines
+        self.fFirst    = 0
+        self.fCount    = 0
 
-class SyntaxHighlighter_LASH(QSyntaxHighlighter):
-    def __init__(self, parent):
-        QSyntaxHighlighter.__init__(self, parent)
+        # Longest line seen, used for the horizontal scroll range
+        self.fLongestLine = ""
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.fCount
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid() or index.row() >= self.fCount:
+            return None
+
+        return self.fLines[(self.fFirst + index.row()) % self.fMaxLines]
+
+    def appendText(self, text):
+        lines = text.split("\n")[-self.fMaxLines:]
+
+        for line in lines:
+            if len(line) > len(self.fLongestLine):
+                self.fLongestLine = line
+
+        # Drop the oldest lines to make room
+        overflow = self.fCount + len(lines) - self.fMaxLines
+
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            self.fFirst  = (self.fFirst + overflow) % self.fMaxLines
+            self.fCount -= overflow
+            self.endRemoveRows()
+
+        self.beginInsertRows(QModelIndex(), self.fCount, self.fCount + len(lines) - 1)
+
+        for line in lines:
+            self.fLines[(self.fFirst + self.fCount) % self.fMaxLines] = line
+            self.fCount += 1
+
+        self.endInsertRows()
 
-        self.fPalette = parent.palette()
+    def clear(self):
+        self.beginResetModel()
+        self.fLines  = [""] * self.fMaxLines
+        self.fFirst  = 0
+        self.fCount  = 0
+        self.fLongestLine = ""
+        self.endResetModel()
 
-    def highlightBlock(self, text):
-        if ": ERROR: " in text:
-            self.setFormat(text.find(" ERROR: "), len(text), Qt.red)
-        elif ": WARNING: " in text:
-            self.setFormat(text.find(" WARNING: "), len(text), Qt.darkRed)
-        elif ": ------------------" in text:
-            self.setFormat(text.find(" ------------------"), len(text), self.fPalette.color(QPalette.Active, QPalette.Mid))
+    def longestLine(self):
+        return self.fLongestLine
+
+    def linesText(self, rows):
+        return "\n".join(self.fLines[(self.fFirst + row) % self.fMaxLines] for row in rows if row < self.fCount)
 
 # ------------------------------------------------------------------------------------------------------------
-# Syntax Highlighter for LADISH
+# Log line painter, only called for visible lines
 
-class SyntaxHighlighter_LADISH(QSyntaxHighlighter):
-    def __init__(self, parent):
-        QSyntaxHighlighter.__init__(self, parent)
+class LogsItemDelegate(QStyledItemDelegate):
+    def __init__(self, parent, rules):
+        QStyledItemDelegate.__init__(self, parent)
+
+        self.fRules = rules
+
+    def paint(self, painter, option, index):
+        text  = index.data()
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, option, painter, option.widget)
+
+        if option.state & QStyle.State_Selected:
+            textColor = option.palette.color(QPalette.Active, QPalette.HighlightedText)
+        else:
+            textColor = option.palette.color(QPalette.Active, QPalette.Text)
+
+        highlightPos   = len(text)
+        highlightColor = textColor
+
+        for match, start, color in self.fRules:
+            if match in text:
+                highlightPos   = max(0, text.find(start))
+                highlightColor = QColor(color) if isinstance(color, Qt.GlobalColor) else option.palette.color(QPalette.Active, color)
+                break
 
-        self.fPalette = parent.palette()
+        rect = option.rect.adjusted(2, 0, 0, 0)
 
-    def highlightBlock(self, text):
-        if ": ERROR: " in text:
-            self.setFormat(text.find(" ERROR: "), len(text), Qt.red)
-        elif ": WARNING: " in text:
-            self.setFormat(text.find(" WARNING: "), len(text), Qt.darkRed)
-        elif ": -------" in text:
-            self.setFormat(text.find(" -------"), len(text), self.fPalette.color(QPalette.Active, QPalette.Mid))
+        painter.save()
+        painter.setFont(option.font)
+        painter.setPen(textColor)
+        painter.drawText(rect, Qt.AlignLeft|Qt.AlignVCenter, text[:highlightPos])
+
+        if highlightPos < len(text):
+            if not option.state & QStyle.State_Selected:
+                painter.setPen(highlightColor)
+            rect.setLeft(rect.left() + option.fontMetrics.width(text[:highlightPos]))
+            painter.drawText(rect, Qt.AlignLeft|Qt.AlignVCenter, text[highlightPos:])
+
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(option.fontMetrics.width(index.model().longestLine()) + 4, option.fontMetrics.height())
 
 # ------------------------------------------------------------------------------------------------------------
-# Lock-less file read thread
+# Event-driven log file tailer
 
-class LogsReadThread(QThread):
+class LogFileTailer(QObject):
     MAX_INITIAL_SIZE = 2*1024*1024 # 2Mb
 
-    def __init__(self, parent):
-        QThread.__init__(self, parent)
+    def __init__(self, parent, filename):
+        QObject.__init__(self, parent)
 
-        self.fCloseNow   = False
-        self.fPurgeLogs  = False
-        self.fRealParent = parent
+        self.fFilename = filename
+        self.fFile     = None
+        self.fInode    = None
+        self.fPending  = b""
 
-        # -------------------------------------------------------------
-        # Take some values from Logs Window
+        # The directory is watched too, so we notice when the file gets rotated or re-created
+        self.fWatcher = QFileSystemWatcher(self)
+        self.fWatcher.addPath(os.path.dirname(filename))
 
-        self.LOG_FILE_JACK   = LogsW.LOG_FILE_JACK
-        self.LOG_FILE_A2J    = LogsW.LOG_FILE_A2J
-        self.LOG_FILE_LASH   = LogsW.LOG_FILE_LASH
-        self.LOG_FILE_LADISH = LogsW.LOG_FILE_LADISH
+        self.connect(self.fWatcher, SIGNAL("fileChanged(QString)"), SLOT("slot_fileChanged()"))
+        self.connect(self.fWatcher, SIGNAL("directoryChanged(QString)"), SLOT("slot_fileChanged()"))
 
-        # -------------------------------------------------------------
-        # Init logs
+    def start(self):
+        if self.openFile(True):
+            self.readNewText()
 
-        if self.LOG_FILE_JACK is not None:
-            self.fLogFileJACK = QFile(self.LOG_FILE_JACK)
-            self.fLogFileJACK.open(QIODevice.ReadOnly)
-            self.fLogStreamJACK = QTextStream(self.fLogFileJACK)
-            self.fLogStreamJACK.setCodec("UTF-8")
+    def close(self):
+        self.fWatcher.removePaths(self.fWatcher.files() + self.fWatcher.directories())
+        self.closeFile()
 
-            if self.fLogFileJACK.size() > self.MAX_INITIAL_SIZE:
-                self.fLogStreamJACK.seek(self.fLogFileJACK.size() - self.MAX_INITIAL_SIZE)
+    def purge(self):
+        try:
+            open(self.fFilename, "wb").close()
+        except:
+            return
 
-        if self.LOG_FILE_A2J is not None:
-            self.fLogFileA2J = QFile(self.LOG_FILE_A2J)
-            self.fLogFileA2J.open(QIODevice.ReadOnly)
-            self.fLogStreamA2J = QTextStream(self.fLogFileA2J)
-            self.fLogStreamA2J.setCodec("UTF-8")
+        if self.fFile is not None:
+            self.fFile.seek(0)
 
-            if self.fLogFileA2J.size() > self.MAX_INITIAL_SIZE:
-                self.fLogStreamA2J.seek(self.fLogFileA2J.size() - self.MAX_INITIAL_SIZE)
+        self.fPending = b""
 
-        if self.LOG_FILE_LASH is not None:
-            self.fLogFileLASH = QFile(self.LOG_FILE_LASH)
-            self.fLogFileLASH.open(QIODevice.ReadOnly)
-            self.fLogStreamLASH = QTextStream(self.fLogFileLASH)
-            self.fLogStreamLASH.setCodec("UTF-8")
+    def openFile(self, initial):
+        try:
+            self.fFile = open(self.fFilename, "rb")
+        except:
+            self.fFile = None
+            return False
 
-            if self.fLogFileLASH.size() > self.MAX_INITIAL_SIZE:
-                self.fLogStreamLASH.seek(self.fLogFileLASH.size() - self.MAX_INITIAL_SIZE)
+        fileStat    = os.fstat(self.fFile.fileno())
+        self.fInode = fileStat.st_ino
 
-        if self.LOG_FILE_LADISH is not None:
-            self.fLogFileLADISH = QFile(self.LOG_FILE_LADISH)
-            self.fLogFileLADISH.open(QIODevice.ReadOnly)
-            self.fLogStreamLADISH = QTextStream(self.fLogFileLADISH)
-            self.fLogStreamLADISH.setCodec("UTF-8")
+        # Skip old contents, starting from the next full line
+        if initial and fileStat.st_size > self.MAX_INITIAL_SIZE:
+            self.fFile.seek(fileStat.st_size - self.MAX_INITIAL_SIZE)
+            self.fFile.readline()
 
-            if self.fLogFileLADISH.size() > self.MAX_INITIAL_SIZE:
-                self.fLogStreamLADISH.seek(self.fLogFileLADISH.size() - self.MAX_INITIAL_SIZE)
+        if self.fFilename not in self.fWatcher.files():
+            self.fWatcher.addPath(self.fFilename)
 
-    def closeNow(self):
-        self.fCloseNow = True
+        return True
 
-    def purgeLogs(self):
-        self.fPurgeLogs = True
+    def closeFile(self):
+        if self.fFile is not None:
+            self.fFile.close()
+            self.fFile = None
 
-    def run(self):
-        # -------------------------------------------------------------
-        # Read logs and set text in main thread
-
-        while not self.fCloseNow:
-            if self.fPurgeLogs:
-                if self.LOG_FILE_JACK:
-                    self.fLogStreamJACK.flush()
-                    self.fLogFileJACK.close()
-                    self.fLogFileJACK.open(QIODevice.WriteOnly)
-                    self.fLogFileJACK.close()
-                    self.fLogFileJACK.open(QIODevice.ReadOnly)
-
-                if self.LOG_FILE_A2J:
-                    self.fLogStreamA2J.flush()
-                    self.fLogFileA2J.close()
-                    self.fLogFileA2J.open(QIODevice.WriteOnly)
-                    self.fLogFileA2J.close()
-                    self.fLogFileA2J.open(QIODevice.ReadOnly)
-
-                if self.LOG_FILE_LASH:
-                    self.fLogStreamLASH.flush()
-                    self.fLogFileLASH.close()
-                    self.fLogFileLASH.open(QIODevice.WriteOnly)
-                    self.fLogFileLASH.close()
-                    self.fLogFileLASH.open(QIODevice.ReadOnly)
-
-                if self.LOG_FILE_LADISH:
-                    self.fLogStreamLADISH.flush()
-                    self.fLogFileLADISH.close()
-                    self.fLogFileLADISH.open(QIODevice.WriteOnly)
-                    self.fLogFileLADISH.close()
-                    self.fLogFileLADISH.open(QIODevice.ReadOnly)
-
-                self.fPurgeLogs = False
-
-            else:
-                if self.LOG_FILE_JACK:
-                    textJACK = fixLogText(self.fLogStreamJACK.readAll()).strip()
-                else:
-                    textJACK = ""
-
-                if self.LOG_FILE_A2J:
-                    textA2J = fixLogText(self.fLogStreamA2J.readAll()).strip()
-                else:
-                    textA2J = ""
-
-                if self.LOG_FILE_LASH:
-                    textLASH = fixLogText(self.fLogStreamLASH.readAll()).strip()
-                else:
-                    textLASH = ""
-
-                if self.LOG_FILE_LADISH:
-                    textLADISH = fixLogText(self.fLogStreamLADISH.readAll()).strip()
-                else:
-                    textLADISH = ""
-
-                self.fRealParent.setLogsText(textJACK, textA2J, textLASH, textLADISH)
-                self.emit(SIGNAL("updateLogs()"))
-
-            if not self.fCloseNow:
-                self.sleep(1)
+    def readNewText(self):
+        try:
+            fileStat = os.stat(self.fFilename)
+        except:
+            fileStat = None
 
-        # -------------------------------------------------------------
-        # Close logs before closing thread
+        data = self.fPending
 
-        if self.LOG_FILE_JACK:
-            self.fLogFileJACK.close()
+        if self.fFile is not None:
+            if fileStat is not None and fileStat.st_ino == self.fInode and fileStat.st_size < self.fFile.tell():
+                # Truncated, start over
+                self.fFile.seek(0)
+                data = b""
 
-        if self.LOG_FILE_A2J:
-            self.fLogFileA2J.close()
+            data += self.fFile.read()
 
-        if self.LOG_FILE_LASH:
-            self.fLogFileLASH.close()
+            if fileStat is None or fileStat.st_ino != self.fInode:
+                # Rotated or removed, nothing more will be written to our copy
+                self.closeFile()
 
-        if self.LOG_FILE_LADISH:
-            self.fLogFileLADISH.close()
+        if self.fFile is None and fileStat is not None and self.openFile(False):
+            data += self.fFile.read()
+
+        # Keep incomplete lines until the rest is written
+        lineEnd = data.rfind(b"\n") + 1
+        self.fPending = data[lineEnd:]
+
+        text = fixLogText(data[:lineEnd].decode("utf-8", "replace")).strip()
+
+        if text:
+            self.emit(SIGNAL("textAppended(QString)"), text)
+
+    @pyqtSlot()
+    def slot_fileChanged(self):
+        self.readNewText()
 
 # ------------------------------------------------------------------------------------------------------------
 # Logs Window
 
 class LogsW(QDialog):
+    MAX_LINES = 10000
+
     LOG_PATH = os.path.join(HOME, ".log")
 
     LOG_FILE_JACK   = os.path.join(LOG_PATH, "jack", "jackdbus.log")
@@ -286,13 +306,7 @@ class LogsW(QDialog):
 
         self.loadSettings()
 
-        self.fFirstRun = True
-        self.fTextLock = QMutex()
-
-        self.fTextJACK   = ""
-        self.fTextA2J    = ""
-        self.fTextLASH   = ""
-        self.fTextLADISH = ""
+        self.fTailers = []
 
         # -------------------------------------------------------------
         # Set-up GUI
@@ -322,91 +336,80 @@ class LogsW(QDialog):
             tabIndex += 1
 
         # -------------------------------------------------------------
-        # Init logs viewers
+        # Init logs viewers and file tailers
+
+        self.fViews = (self.ui.lv_jack, self.ui.lv_a2j, self.ui.lv_lash, self.ui.lv_ladish)
 
         if self.LOG_FILE_JACK:
-            self.fSyntaxJACK = SyntaxHighlighter_JACK(self.ui.pte_jack)
-            self.fSyntaxJACK.setDocument(self.ui.pte_jack.document())
+            self.addTailer(self.LOG_FILE_JACK, self.ui.lv_jack, HIGHLIGHT_RULES_JACK)
 
         if self.LOG_FILE_A2J:
-            self.fSyntaxA2J = SyntaxHighlighter_A2J(self.ui.pte_a2j)
-            self.fSyntaxA2J.setDocument(self.ui.pte_a2j.document())
+            self.addTailer(self.LOG_FILE_A2J, self.ui.lv_a2j, HIGHLIGHT_RULES_A2J)
 
         if self.LOG_FILE_LASH:
-            self.fSyntaxLASH = SyntaxHighlighter_LASH(self.ui.pte_lash)
-            self.fSyntaxLASH.setDocument(self.ui.pte_lash.document())
+            self.addTailer(self.LOG_FILE_LASH, self.ui.lv_lash, HIGHLIGHT_RULES_LASH)
 
         if self.LOG_FILE_LADISH:
-            self.SyntaxLADISH = SyntaxHighlighter_LADISH(self.ui.pte_ladish)
-            self.SyntaxLADISH.setDocument(self.ui.pte_ladish.document())
-
-        # -------------------------------------------------------------
-        # Init file read thread
-
-        self.fReadThread = LogsReadThread(self)
-        self.fReadThread.start(QThread.IdlePriority)
+            self.addTailer(self.LOG_FILE_LADISH, self.ui.lv_ladish, HIGHLIGHT_RULES_LADISH)
 
         # -------------------------------------------------------------
         # Set-up connections
 
         self.connect(self.ui.b_purge, SIGNAL("clicked()"), SLOT("slot_purgeLogs()"))
-        self.connect(self.fReadThread, SIGNAL("updateLogs()"), SLOT("slot_updateLogs()"))
 
         # -------------------------------------------------------------
 
-    def setLogsText(self, textJACK, textA2J, textLASH, textLADISH):
-        QMutexLocker(self.fTextLock)
+    def addTailer(self, filename, view, rules):
+        model = LogsModel(view, self.fMaxLines)
+        view.setModel(model)
+        view.setItemDelegate(LogsItemDelegate(view, rules))
 
-        self.fTextJACK   = textJACK
-        self.fTextA2J    = textA2J
-        self.fTextLASH   = textLASH
-        self.fTextLADISH = textLADISH
+        copyAction = QAction(view)
+        copyAction.setShortcut(QKeySequence.Copy)
+        copyAction.setShortcutContext(Qt.WidgetShortcut)
+        view.addAction(copyAction)
 
-    @pyqtSlot()
-    def slot_updateLogs(self):
-        QMutexLocker(self.fTextLock)
-
-        if self.fFirstRun:
-            self.ui.pte_jack.clear()
-            self.ui.pte_a2j.clear()
-            self.ui.pte_lash.clear()
-            self.ui.pte_ladish.clear()
-
-        if self.LOG_FILE_JACK and self.fTextJACK:
-            self.ui.pte_jack.appendPlainText(self.fTextJACK)
-
-        if self.LOG_FILE_A2J and self.fTextA2J:
-            self.ui.pte_a2j.appendPlainText(self.fTextA2J)
-
-        if self.LOG_FILE_LASH and self.fTextLASH:
-            self.ui.pte_lash.appendPlainText(self.fTextLASH)
-
-        if self.LOG_FILE_LADISH and self.fTextLADISH:
-            self.ui.pte_ladish.appendPlainText(self.fTextLADISH)
-
-        if self.fFirstRun:
-            self.ui.pte_jack.horizontalScrollBar().setValue(0)
-            self.ui.pte_jack.verticalScrollBar().setValue(self.ui.pte_jack.verticalScrollBar().maximum())
-            self.ui.pte_a2j.horizontalScrollBar().setValue(0)
-            self.ui.pte_a2j.verticalScrollBar().setValue(self.ui.pte_a2j.verticalScrollBar().maximum())
-            self.ui.pte_lash.horizontalScrollBar().setValue(0)
-            self.ui.pte_lash.verticalScrollBar().setValue(self.ui.pte_lash.verticalScrollBar().maximum())
-            self.ui.pte_ladish.horizontalScrollBar().setValue(0)
-            self.ui.pte_ladish.verticalScrollBar().setValue(self.ui.pte_ladish.verticalScrollBar().maximum())
-            self.fFirstRun = False
+        self.connect(copyAction, SIGNAL("triggered()"), lambda: self.copySelectedLines(view))
+
+        tailer = LogFileTailer(self, filename)
+        self.connect(tailer, SIGNAL("textAppended(QString)"), lambda text: self.appendText(view, text))
+        self.fTailers.append(tailer)
+
+        tailer.start()
+
+        view.horizontalScrollBar().setValue(0)
+        view.scrollToBottom()
+
+    def appendText(self, view, text):
+        scrollBar   = view.verticalScrollBar()
+        followLines = bool(scrollBar.value() == scrollBar.maximum())
+
+        view.model().appendText(text)
+
+        if followLines:
+            view.scrollToBottom()
+
+    def copySelectedLines(self, view):
+        rows = sorted(index.row() for index in view.selectionModel().selectedIndexes())
+
+        if rows:
+            QApplication.clipboard().setText(view.model().linesText(rows))
 
     @pyqtSlot()
     def slot_purgeLogs(self):
-        self.fReadThread.purgeLogs()
-        self.ui.pte_jack.clear()
-        self.ui.pte_a2j.clear()
-        self.ui.pte_lash.clear()
-        self.ui.pte_ladish.clear()
+        for tailer in self.fTailers:
+            tailer.purge()
+
+        for view in self.fViews:
+            if view.model() is not None:
+                view.model().clear()
 
     def loadSettings(self):
         settings = QSettings("Cadence", "Cadence-Logs")
         self.restoreGeometry(settings.value("Geometry", ""))
 
+        self.fMaxLines = max(100, settings.value("MaxLines", self.MAX_LINES, type=int))
+
     def saveSettings(self):
         settings = QSettings("Cadence", "Cadence-Logs")
         settings.setValue("Geometry", self.saveGeometry())
@@ -414,11 +417,8 @@ class LogsW(QDialog):
     def closeEvent(self, event):
         self.saveSettings()
 
-        if self.fReadThread.isRunning():
-            self.fReadThread.closeNow()
-
-            if not self.fReadThread.wait(2000):
-                self.fReadThread.terminate()
+        for tailer in self.fTailers:
+            tailer.close()
 
         QDialog.closeEvent(self, event)
 
@@ -430,9 +430,6 @@ class LogsW(QDialog):
 # Allow to use this as a standalone app
 
 if __name__ == '__main__':
-    # Additional imports
-    from PyQt4.QtGui import QApplication
-
     # App initialization
     app = QApplication(sys.argv)
     app.setApplicationName("Cadence-Logs")
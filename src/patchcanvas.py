@@ -17,9 +17,11 @@
 # For a full copy of the GNU General Public License see the GPL.txt file
 
 # Imports (Global)
+from collections import OrderedDict
+from contextlib import contextmanager
 from PyQt4.QtCore import pyqtSignal, pyqtSlot, qDebug, qCritical, qFatal, qWarning, Qt, QObject
 from PyQt4.QtCore import QAbstractAnimation, QLineF, QPointF, QRectF, QSizeF, QSettings, QTimer
-from PyQt4.QtGui import QColor, QLinearGradient, QPen, QPolygonF, QPainter, QPainterPath
+from PyQt4.QtGui import QBrush, QColor, QLinearGradient, QPen, QPolygonF, QPainter, QPainterPath
 from PyQt4.QtGui import QCursor, QFont, QFontMetrics
 from PyQt4.QtGui import QGraphicsScene, QGraphicsItem, QGraphicsLineItem, QGraphicsPathItem
 from PyQt4.QtGui import QGraphicsColorizeEffect, QGraphicsDropShadowEffect
@@ -77,6 +79,17 @@ EYECANDY_NONE  = 0
 EYECANDY_SMALL = 1
 EYECANDY_FULL  = 2
 
+# Auto-arrange spacing and number of ordering passes
+ARRANGE_SPACING_X = 80
+ARRANGE_SPACING_Y = 20
+ARRANGE_SWEEPS    = 4
+
+# Zoom level below which items are drawn with less detail
+LOW_DETAIL_SCALE = 0.5
+
+# Minimum time between connection line updates while moving boxes, in ms (about 60 fps)
+LINE_UPDATE_INTERVAL = 16
+
 # Canvas options
 class options_t(object):
     __slots__ = [
@@ -100,6 +113,9 @@ class features_t(object):
 # ------------------------------------------------------------------------------
 # patchcanvas.h
 
+# max number of cached text widths
+TEXT_WIDTH_CACHE_SIZE = 4096
+
 # object types
 CanvasBoxType           = QGraphicsItem.UserType + 1
 CanvasIconType          = QGraphicsItem.UserType + 2
@@ -143,6 +159,84 @@ class animation_dict_t(object):
         'item'
     ]
 
+# Uniform grid of box rectangles, for fast lookups by position
+class CanvasBoxIndex(object):
+    def __init__(self, cell_size=256):
+        object.__init__(self)
+
+        self.m_cell_size = float(cell_size)
+        self.m_cells = {}     # (column, row) -> set of boxes
+        self.m_box_rects = {} # box -> (scene rect, cell range)
+
+    def clear(self):
+        self.m_cells = {}
+        self.m_box_rects = {}
+
+    def cellRange(self, rect):
+        return (int(rect.left()   // self.m_cell_size), int(rect.top()    // self.m_cell_size),
+                int(rect.right()  // self.m_cell_size), int(rect.bottom() // self.m_cell_size))
+
+    def addToCells(self, box, cell_range):
+        for column in range(cell_range[0], cell_range[2]+1):
+            for row in range(cell_range[1], cell_range[3]+1):
+                cell = self.m_cells.get((column, row))
+                if cell is None:
+                    self.m_cells[(column, row)] = set((box,))
+                else:
+                    cell.add(box)
+
+    def removeFromCells(self, box, cell_range):
+        for column in range(cell_range[0], cell_range[2]+1):
+            for row in range(cell_range[1], cell_range[3]+1):
+                cell = self.m_cells.get((column, row))
+                if cell is not None:
+                    cell.discard(box)
+                    if not cell:
+                        del self.m_cells[(column, row)]
+
+    # Call after a box is added, moved or resized
+    def update(self, box):
+        rect = box.sceneBoundingRect()
+        cell_range = self.cellRange(rect)
+        old_rect_and_range = self.m_box_rects.get(box)
+
+        if old_rect_and_range is not None:
+            if old_rect_and_range[1] != cell_range:
+                self.removeFromCells(box, old_rect_and_range[1])
+                self.addToCells(box, cell_range)
+        else:
+            self.addToCells(box, cell_range)
+
+        self.m_box_rects[box] = (rect, cell_range)
+
+    def remove(self, box):
+        rect_and_range = self.m_box_rects.pop(box, None)
+        if rect_and_range is not None:
+            self.removeFromCells(box, rect_and_range[1])
+
+    def boxRect(self, box):
+        return self.m_box_rects[box][0]
+
+    # Boxes containing a scene point
+    def boxesAt(self, point):
+        cell = self.m_cells.get((int(point.x() // self.m_cell_size), int(point.y() // self.m_cell_size)))
+        if not cell:
+            return []
+        return [box for box in cell if self.m_box_rects[box][0].contains(point)]
+
+    # Boxes intersecting a scene rectangle
+    def boxesIn(self, rect):
+        cell_range = self.cellRange(rect)
+        boxes = set()
+
+        for column in range(cell_range[0], cell_range[2]+1):
+            for row in range(cell_range[1], cell_range[3]+1):
+                cell = self.m_cells.get((column, row))
+                if cell:
+                    boxes.update(cell)
+
+        return [box for box in boxes if self.m_box_rects[box][0].intersects(rect)]
+
 # Main Canvas object
 class Canvas(object):
     __slots__ = [
@@ -153,9 +247,22 @@ class Canvas(object):
         'last_connection_id',
         'initial_pos',
         'size_rect',
-        'group_list',
-        'port_list',
-        'connection_list',
+        'groups',
+        'ports',
+        'connections',
+        'group_ports',
+        'port_connections',
+        'box_index',
+        'low_detail',
+        'low_detail_pens',
+        'line_gradient_stops',
+        'pending_lines',
+        'update_depth',
+        'update_boxes',
+        'update_new_boxes',
+        'update_scene',
+        'font_metrics',
+        'text_widths',
         'animation_list',
         'qobject',
         'settings',
@@ -170,6 +277,19 @@ class CanvasObject(QObject):
     def __init__(self, parent=None):
         QObject.__init__(self, parent)
 
+        self.m_line_timer = QTimer(self)
+        self.m_line_timer.setInterval(LINE_UPDATE_INTERVAL)
+        self.m_line_timer.setSingleShot(True)
+        self.m_line_timer.timeout.connect(self.PendingLinesTimeout)
+
+    def startLineTimer(self):
+        if not self.m_line_timer.isActive():
+            self.m_line_timer.start()
+
+    @pyqtSlot()
+    def PendingLinesTimeout(self):
+        CanvasUpdatePendingLines()
+
     @pyqtSlot()
     def AnimationIdle(self):
         animation = self.sender()
@@ -209,9 +329,22 @@ canvas.qobject    = None
 canvas.settings   = None
 canvas.theme      = None
 canvas.initiated  = False
-canvas.group_list = []
-canvas.port_list  = []
-canvas.connection_list = []
+canvas.groups = {}
+canvas.ports  = {}
+canvas.connections = {}
+canvas.group_ports = {}
+canvas.port_connections = {}
+canvas.box_index = CanvasBoxIndex()
+canvas.low_detail = False
+canvas.low_detail_pens = {}
+canvas.line_gradient_stops = {}
+canvas.pending_lines = set()
+canvas.update_depth = 0
+canvas.update_boxes = set()
+canvas.update_new_boxes = OrderedDict()
+canvas.update_scene = False
+canvas.font_metrics = {}
+canvas.text_widths  = OrderedDict()
 canvas.animation_list  = []
 
 options = options_t()
@@ -338,34 +471,34 @@ def clear():
     if canvas.debug:
         qDebug("PatchCanvas::clear()")
 
-    group_list_ids = []
-    port_list_ids  = []
-    connection_list_ids = []
-
-    for group in canvas.group_list:
-        group_list_ids.append(group.group_id)
-
-    for port in canvas.port_list:
-        port_list_ids.append(port.port_id)
+    group_list_ids = list(canvas.groups.keys())
+    port_list_ids  = list(canvas.ports.keys())
+    connection_list_ids = list(canvas.connections.keys())
 
-    for connection in canvas.connection_list:
-        connection_list_ids.append(connection.connection_id)
+    with bulkUpdate():
+        for idx in connection_list_ids:
+            disconnectPorts(idx)
 
-    for idx in connection_list_ids:
-        disconnectPorts(idx)
+        for idx in port_list_ids:
+            removePort(idx)
 
-    for idx in port_list_ids:
-        removePort(idx)
-
-    for idx in group_list_ids:
-        removeGroup(idx)
+        for idx in group_list_ids:
+            removeGroup(idx)
 
     canvas.last_z_value = 0
     canvas.last_connection_id = 0
 
-    canvas.group_list = []
-    canvas.port_list = []
-    canvas.connection_list = []
+    canvas.groups = {}
+    canvas.ports  = {}
+    canvas.connections = {}
+    canvas.group_ports = {}
+    canvas.port_connections = {}
+    canvas.box_index.clear()
+    canvas.pending_lines = set()
+    canvas.update_depth = 0
+    canvas.update_boxes = set()
+    canvas.update_new_boxes = OrderedDict()
+    canvas.update_scene = False
 
     canvas.scene.clear()
 
@@ -391,10 +524,9 @@ def addGroup(group_id, group_name, split=SPLIT_UNDEF, icon=ICON_APPLICATION):
     if canvas.debug:
         qDebug("PatchCanvas::addGroup(%i, %s, %s, %s)" % (group_id, group_name.encode(), split2str(split), icon2str(icon)))
 
-    for group in canvas.group_list:
-        if group.group_id == group_id:
-            qWarning("PatchCanvas::addGroup(%i, %s, %s, %s) - group already exists" % (group_id, group_name.encode(), split2str(split), icon2str(icon)))
-            return
+    if group_id in canvas.groups:
+        qWarning("PatchCanvas::addGroup(%i, %s, %s, %s) - group already exists" % (group_id, group_name.encode(), split2str(split), icon2str(icon)))
+        return
 
     if split == SPLIT_UNDEF and features.handle_group_pos:
         split = canvas.settings.value("CanvasPositions/%s_SPLIT" % group_name, split, type=int)
@@ -411,20 +543,14 @@ def addGroup(group_id, group_name, split=SPLIT_UNDEF, icon=ICON_APPLICATION):
     if split == SPLIT_YES:
         group_box.setSplit(True, PORT_MODE_OUTPUT)
 
-        if features.handle_group_pos:
-            group_box.setPos(canvas.settings.value("CanvasPositions/%s_OUTPUT" % group_name, CanvasGetNewGroupPos(), type=QPointF))
-        else:
-            group_box.setPos(CanvasGetNewGroupPos())
+        CanvasSetNewBoxPos(group_box, "CanvasPositions/%s_OUTPUT" % group_name)
 
         group_sbox = CanvasBox(group_id, group_name, icon)
         group_sbox.setSplit(True, PORT_MODE_INPUT)
 
         group_dict.widgets[1] = group_sbox
 
-        if features.handle_group_pos:
-            group_sbox.setPos(canvas.settings.value("CanvasPositions/%s_INPUT" % group_name, CanvasGetNewGroupPos(True), type=QPointF))
-        else:
-            group_sbox.setPos(CanvasGetNewGroupPos(True))
+        CanvasSetNewBoxPos(group_sbox, "CanvasPositions/%s_INPUT" % group_name, True)
 
         canvas.last_z_value += 1
         group_sbox.setZValue(canvas.last_z_value)
@@ -438,83 +564,87 @@ def addGroup(group_id, group_name, split=SPLIT_UNDEF, icon=ICON_APPLICATION):
         group_box.setSplit(False)
 
         if features.handle_group_pos:
-            group_box.setPos(canvas.settings.value("CanvasPositions/%s" % group_name, CanvasGetNewGroupPos(), type=QPointF))
+            CanvasSetNewBoxPos(group_box, "CanvasPositions/%s" % group_name)
         else:
             # Special ladish fake-split groups
             horizontal = bool(icon == ICON_HARDWARE or icon == ICON_LADISH_ROOM)
-            group_box.setPos(CanvasGetNewGroupPos(horizontal))
+            CanvasSetNewBoxPos(group_box, None, horizontal)
 
     group_box.checkItemPos()
 
     canvas.last_z_value += 1
     group_box.setZValue(canvas.last_z_value)
 
-    canvas.group_list.append(group_dict)
+    canvas.groups[group_id] = group_dict
+    canvas.group_ports[group_id] = OrderedDict()
 
     if options.eyecandy == EYECANDY_FULL and not options.auto_hide_groups:
         CanvasItemFX(group_box, True)
 
-    QTimer.singleShot(0, canvas.scene.update)
+    CanvasSceneUpdate()
 
 def removeGroup(group_id):
     if canvas.debug:
         qDebug("PatchCanvas::removeGroup(%i)" % group_id)
 
-    for group in canvas.group_list:
-        if group.group_id == group_id:
-            item = group.widgets[0]
-            group_name = group.group_name
+    group = canvas.groups.get(group_id)
 
-            if group.split:
-                s_item = group.widgets[1]
+    if not group:
+        qCritical("PatchCanvas::removeGroup(%i) - unable to find group to remove" % group_id)
+        return
 
-                if features.handle_group_pos:
-                    canvas.settings.setValue("CanvasPositions/%s_OUTPUT" % group_name, item.pos())
-                    canvas.settings.setValue("CanvasPositions/%s_INPUT" % group_name, s_item.pos())
-                    canvas.settings.setValue("CanvasPositions/%s_SPLIT" % group_name, SPLIT_YES)
+    item = group.widgets[0]
 
-                if options.eyecandy == EYECANDY_FULL:
-                    CanvasItemFX(s_item, False, True)
-                else:
-                    s_item.removeIconFromScene()
-                    canvas.scene.removeItem(s_item)
-                    del s_item
+    CanvasSaveGroupPos(group)
 
-            else:
-                if features.handle_group_pos:
-                    canvas.settings.setValue("CanvasPositions/%s" % group_name, item.pos())
-                    canvas.settings.setValue("CanvasPositions/%s_SPLIT" % group_name, SPLIT_NO)
+    for box in group.widgets:
+        canvas.update_new_boxes.pop(box, None)
 
-            if options.eyecandy == EYECANDY_FULL:
-                CanvasItemFX(item, False, True)
-            else:
-                item.removeIconFromScene()
-                canvas.scene.removeItem(item)
-                del item
+    if group.split:
+        s_item = group.widgets[1]
 
-            canvas.group_list.remove(group)
+        canvas.update_boxes.discard(s_item)
+        canvas.box_index.remove(s_item)
 
-            QTimer.singleShot(0, canvas.scene.update)
-            return
+        if options.eyecandy == EYECANDY_FULL:
+            CanvasItemFX(s_item, False, True)
+        else:
+            s_item.removeIconFromScene()
+            canvas.scene.removeItem(s_item)
+            del s_item
+
+    canvas.update_boxes.discard(item)
+    canvas.box_index.remove(item)
+
+    if options.eyecandy == EYECANDY_FULL:
+        CanvasItemFX(item, False, True)
+    else:
+        item.removeIconFromScene()
+        canvas.scene.removeItem(item)
+        del item
 
-    qCritical("PatchCanvas::removeGroup(%i) - unable to find group to remove" % group_id)
+    del canvas.groups[group_id]
+    canvas.group_ports.pop(group_id, None)
+
+    CanvasSceneUpdate()
 
 def renameGroup(group_id, new_group_name):
     if canvas.debug:
         qDebug("PatchCanvas::renameGroup(%i, %s)" % (group_id, new_group_name.encode()))
 
-    for group in canvas.group_list:
-        if group.group_id == group_id:
-            group.group_name = new_group_name
-            group.widgets[0].setGroupName(new_group_name)
+    group = canvas.groups.get(group_id)
 
-            if group.split and group.widgets[1]:
-                group.widgets[1].setGroupName(new_group_name)
+    if not group:
+        qCritical("PatchCanvas::renameGroup(%i, %s) - unable to find group to rename" % (group_id, new_group_name.encode()))
+        return
 
-            QTimer.singleShot(0, canvas.scene.update)
-            return
+    group.group_name = new_group_name
+    group.widgets[0].setGroupName(new_group_name)
 
-    qCritical("PatchCanvas::renameGroup(%i, %s) - unable to find group to rename" % (group_id, new_group_name.encode()))
+    if group.split and group.widgets[1]:
+        group.widgets[1].setGroupName(new_group_name)
+
+    CanvasSceneUpdate()
 
 def splitGroup(group_id):
     if canvas.debug:
@@ -527,62 +657,66 @@ def splitGroup(group_id):
     conns_data = []
 
     # Step 1 - Store all Item data
-    for group in canvas.group_list:
-        if group.group_id == group_id:
-            if group.split:
-                qCritical("PatchCanvas::splitGroup(%i) - group is already splitted" % group_id)
-                return
+    group = canvas.groups.get(group_id)
 
-            item = group.widgets[0]
-            group_name = group.group_name
-            group_icon = group.icon
-            break
+    if group:
+        if group.split:
+            qCritical("PatchCanvas::splitGroup(%i) - group is already splitted" % group_id)
+            return
+
+        item = group.widgets[0]
+        group_name = group.group_name
+        group_icon = group.icon
 
     if not item:
         qCritical("PatchCanvas::splitGroup(%i) - unable to find group to split" % group_id)
         return
 
-    port_list_ids = list(item.getPortList())
-
-    for port in canvas.port_list:
-        if port.port_id in port_list_ids:
-            port_dict = port_dict_t()
-            port_dict.group_id = port.group_id
-            port_dict.port_id = port.port_id
-            port_dict.port_name = port.port_name
-            port_dict.port_mode = port.port_mode
-            port_dict.port_type = port.port_type
-            port_dict.widget = None
-            ports_data.append(port_dict)
-
-    for connection in canvas.connection_list:
-        if connection.port_out_id in port_list_ids or connection.port_in_id in port_list_ids:
-            connection_dict = connection_dict_t()
-            connection_dict.connection_id = connection.connection_id
-            connection_dict.port_in_id = connection.port_in_id
-            connection_dict.port_out_id = connection.port_out_id
-            connection_dict.widget = None
-            conns_data.append(connection_dict)
-
-    # Step 2 - Remove Item and Children
-    for conn in conns_data:
-        disconnectPorts(conn.connection_id)
+    port_list_ids = list(canvas.group_ports[group_id])
+
+    conn_list_ids = OrderedDict()
 
     for port_id in port_list_ids:
-        removePort(port_id)
+        port = canvas.ports[port_id]
+        port_dict = port_dict_t()
+        port_dict.group_id = port.group_id
+        port_dict.port_id = port.port_id
+        port_dict.port_name = port.port_name
+        port_dict.port_mode = port.port_mode
+        port_dict.port_type = port.port_type
+        port_dict.widget = None
+        ports_data.append(port_dict)
+
+        for connection_id in canvas.port_connections[port_id]:
+            conn_list_ids[connection_id] = None
+
+    for connection_id in conn_list_ids:
+        connection = canvas.connections[connection_id]
+        connection_dict = connection_dict_t()
+        connection_dict.connection_id = connection.connection_id
+        connection_dict.port_in_id = connection.port_in_id
+        connection_dict.port_out_id = connection.port_out_id
+        connection_dict.widget = None
+        conns_data.append(connection_dict)
 
-    removeGroup(group_id)
+    with bulkUpdate():
+        # Step 2 - Remove Item and Children
+        for conn in conns_data:
+            disconnectPorts(conn.connection_id)
 
-    # Step 3 - Re-create Item, now splitted
-    addGroup(group_id, group_name, SPLIT_YES, group_icon)
+        for port_id in port_list_ids:
+            removePort(port_id)
 
-    for port in ports_data:
-        addPort(group_id, port.port_id, port.port_name, port.port_mode, port.port_type)
+        removeGroup(group_id)
 
-    for conn in conns_data:
-        connectPorts(conn.connection_id, conn.port_out_id, conn.port_in_id)
+        # Step 3 - Re-create Item, now splitted
+        addGroup(group_id, group_name, SPLIT_YES, group_icon)
 
-    QTimer.singleShot(0, canvas.scene.update)
+        for port in ports_data:
+            addPort(group_id, port.port_id, port.port_name, port.port_mode, port.port_type)
+
+        for conn in conns_data:
+            connectPorts(conn.connection_id, conn.port_out_id, conn.port_in_id)
 
 def joinGroup(group_id):
     if canvas.debug:
@@ -596,88 +730,104 @@ def joinGroup(group_id):
     conns_data = []
 
     # Step 1 - Store all Item data
-    for group in canvas.group_list:
-        if group.group_id == group_id:
-            if not group.split:
-                qCritical("PatchCanvas::joinGroup(%i) - group is not splitted" % group_id)
-                return
+    group = canvas.groups.get(group_id)
 
-            item = group.widgets[0]
-            s_item = group.widgets[1]
-            group_name = group.group_name
-            group_icon = group.icon
-            break
+    if group:
+        if not group.split:
+            qCritical("PatchCanvas::joinGroup(%i) - group is not splitted" % group_id)
+            return
+
+        item = group.widgets[0]
+        s_item = group.widgets[1]
+        group_name = group.group_name
+        group_icon = group.icon
 
     # FIXME
     if not (item and s_item):
         qCritical("PatchCanvas::joinGroup(%i) - unable to find groups to join" % group_id)
         return
 
-    port_list_ids = list(item.getPortList())
-    port_list_idss = s_item.getPortList()
-
-    for port_id in port_list_idss:
-        if port_id not in port_list_ids:
-            port_list_ids.append(port_id)
-
-    for port in canvas.port_list:
-        if port.port_id in port_list_ids:
-            port_dict = port_dict_t()
-            port_dict.group_id = port.group_id
-            port_dict.port_id = port.port_id
-            port_dict.port_name = port.port_name
-            port_dict.port_mode = port.port_mode
-            port_dict.port_type = port.port_type
-            port_dict.widget = None
-            ports_data.append(port_dict)
-
-    for connection in canvas.connection_list:
-        if connection.port_out_id in port_list_ids or connection.port_in_id in port_list_ids:
-            connection_dict = connection_dict_t()
-            connection_dict.connection_id = connection.connection_id
-            connection_dict.port_in_id = connection.port_in_id
-            connection_dict.port_out_id = connection.port_out_id
-            connection_dict.widget = None
-            conns_data.append(connection_dict)
-
-    # Step 2 - Remove Item and Children
-    for conn in conns_data:
-        disconnectPorts(conn.connection_id)
+    port_list_ids = list(canvas.group_ports[group_id])
+
+    conn_list_ids = OrderedDict()
 
     for port_id in port_list_ids:
-        removePort(port_id)
+        port = canvas.ports[port_id]
+        port_dict = port_dict_t()
+        port_dict.group_id = port.group_id
+        port_dict.port_id = port.port_id
+        port_dict.port_name = port.port_name
+        port_dict.port_mode = port.port_mode
+        port_dict.port_type = port.port_type
+        port_dict.widget = None
+        ports_data.append(port_dict)
+
+        for connection_id in canvas.port_connections[port_id]:
+            conn_list_ids[connection_id] = None
+
+    for connection_id in conn_list_ids:
+        connection = canvas.connections[connection_id]
+        connection_dict = connection_dict_t()
+        connection_dict.connection_id = connection.connection_id
+        connection_dict.port_in_id = connection.port_in_id
+        connection_dict.port_out_id = connection.port_out_id
+        connection_dict.widget = None
+        conns_data.append(connection_dict)
+
+    with bulkUpdate():
+        # Step 2 - Remove Item and Children
+        for conn in conns_data:
+            disconnectPorts(conn.connection_id)
 
-    removeGroup(group_id)
+        for port_id in port_list_ids:
+            removePort(port_id)
 
-    # Step 3 - Re-create Item, now together
-    addGroup(group_id, group_name, SPLIT_NO, group_icon)
+        removeGroup(group_id)
 
-    for port in ports_data:
-        addPort(group_id, port.port_id, port.port_name, port.port_mode, port.port_type)
+        # Step 3 - Re-create Item, now together
+        addGroup(group_id, group_name, SPLIT_NO, group_icon)
 
-    for conn in conns_data:
-        connectPorts(conn.connection_id, conn.port_out_id, conn.port_in_id)
+        for port in ports_data:
+            addPort(group_id, port.port_id, port.port_name, port.port_mode, port.port_type)
 
-    QTimer.singleShot(0, canvas.scene.update)
+        for conn in conns_data:
+            connectPorts(conn.connection_id, conn.port_out_id, conn.port_in_id)
 
 def getGroupPos(group_id, port_mode=PORT_MODE_OUTPUT):
     if canvas.debug:
         qDebug("PatchCanvas::getGroupPos(%i, %s)" % (group_id, port_mode2str(port_mode)))
 
-    for group in canvas.group_list:
-        if group.group_id == group_id:
-            if group.split:
-                if port_mode == PORT_MODE_OUTPUT:
-                    return group.widgets[0].pos()
-                elif port_mode == PORT_MODE_INPUT:
-                    return group.widgets[1].pos()
-                else:
-                    return QPointF(0, 0)
-            else:
-                return group.widgets[0].pos()
+    group = canvas.groups.get(group_id)
+
+    if not group:
+        qCritical("PatchCanvas::getGroupPos(%i, %s) - unable to find group" % (group_id, port_mode2str(port_mode)))
+        return QPointF(0, 0)
+
+    if group.widgets[0] in canvas.update_new_boxes or group.widgets[1] in canvas.update_new_boxes:
+        CanvasPlaceNewBoxes()
 
-    qCritical("PatchCanvas::getGroupPos(%i, %s) - unable to find group" % (group_id, port_mode2str(port_mode)))
-    return QPointF(0, 0)
+    if group.split:
+        if port_mode == PORT_MODE_OUTPUT:
+            return group.widgets[0].pos()
+        elif port_mode == PORT_MODE_INPUT:
+            return group.widgets[1].pos()
+        else:
+            return QPointF(0, 0)
+    else:
+        return group.widgets[0].pos()
+
+# Store the current position of a group, only used when the canvas handles group positions
+def saveGroupPos(group_id):
+    if canvas.debug:
+        qDebug("PatchCanvas::saveGroupPos(%i)" % group_id)
+
+    group = canvas.groups.get(group_id)
+
+    if not group:
+        qCritical("PatchCanvas::saveGroupPos(%i) - unable to find group" % group_id)
+        return
+
+    CanvasSaveGroupPos(group)
 
 def setGroupPos(group_id, group_pos_x, group_pos_y):
     setGroupPosFull(group_id, group_pos_x, group_pos_y, group_pos_x, group_pos_y)
@@ -686,56 +836,60 @@ def setGroupPosFull(group_id, group_pos_x_o, group_pos_y_o, group_pos_x_i, group
     if canvas.debug:
         qDebug("PatchCanvas::setGroupPos(%i, %i, %i, %i, %i)" % (group_id, group_pos_x_o, group_pos_y_o, group_pos_x_i, group_pos_y_i))
 
-    for group in canvas.group_list:
-        if group.group_id == group_id:
-            group.widgets[0].setPos(group_pos_x_o, group_pos_y_o)
+    group = canvas.groups.get(group_id)
+
+    if not group:
+        qCritical("PatchCanvas::setGroupPos(%i, %i, %i, %i, %i) - unable to find group to reposition" % (group_id, group_pos_x_o, group_pos_y_o, group_pos_x_i, group_pos_y_i))
+        return
 
-            if group.split and group.widgets[1]:
-                group.widgets[1].setPos(group_pos_x_i, group_pos_y_i)
+    for box in group.widgets:
+        canvas.update_new_boxes.pop(box, None)
 
-            QTimer.singleShot(0, canvas.scene.update)
-            return
+    group.widgets[0].setPos(group_pos_x_o, group_pos_y_o)
+
+    if group.split and group.widgets[1]:
+        group.widgets[1].setPos(group_pos_x_i, group_pos_y_i)
 
-    qCritical("PatchCanvas::setGroupPos(%i, %i, %i, %i, %i) - unable to find group to reposition" % (group_id, group_pos_x_o, group_pos_y_o, group_pos_x_i, group_pos_y_i))
+    CanvasSceneUpdate()
 
 def setGroupIcon(group_id, icon):
     if canvas.debug:
         qDebug("PatchCanvas::setGroupIcon(%i, %s)" % (group_id, icon2str(icon)))
 
-    for group in canvas.group_list:
-        if group.group_id == group_id:
-            group.icon = icon
-            group.widgets[0].setIcon(icon)
+    group = canvas.groups.get(group_id)
 
-            if group.split and group.widgets[1]:
-                group.widgets[1].setIcon(icon)
+    if not group:
+        qCritical("PatchCanvas::setGroupIcon(%i, %s) - unable to find group to change icon" % (group_id, icon2str(icon)))
+        return
 
-            QTimer.singleShot(0, canvas.scene.update)
-            return
+    group.icon = icon
+    group.widgets[0].setIcon(icon)
 
-    qCritical("PatchCanvas::setGroupIcon(%i, %s) - unable to find group to change icon" % (group_id, icon2str(icon)))
+    if group.split and group.widgets[1]:
+        group.widgets[1].setIcon(icon)
+
+    CanvasSceneUpdate()
 
 def addPort(group_id, port_id, port_name, port_mode, port_type):
     if canvas.debug:
         qDebug("PatchCanvas::addPort(%i, %i, %s, %s, %s)" % (group_id, port_id, port_name.encode(), port_mode2str(port_mode), port_type2str(port_type)))
 
-    for port in canvas.port_list:
-        if port.group_id == group_id and port.port_id == port_id:
-            qWarning("PatchCanvas::addPort(%i, %i, %s, %s, %s) - port already exists" % (group_id, port_id, port_name.encode(), port_mode2str(port_mode), port_type2str(port_type)))
-            return
+    if port_id in canvas.ports:
+        qWarning("PatchCanvas::addPort(%i, %i, %s, %s, %s) - port already exists" % (group_id, port_id, port_name.encode(), port_mode2str(port_mode), port_type2str(port_type)))
+        return
 
     box_widget  = None
     port_widget = None
 
-    for group in canvas.group_list:
-        if group.group_id == group_id:
-            if group.split and group.widgets[0].getSplittedMode() != port_mode and group.widgets[1]:
-                n = 1
-            else:
-                n = 0
-            box_widget  = group.widgets[n]
-            port_widget = box_widget.addPortFromGroup(port_id, port_mode, port_type, port_name)
-            break
+    group = canvas.groups.get(group_id)
+
+    if group:
+        if group.split and group.widgets[0].getSplittedMode() != port_mode and group.widgets[1]:
+            n = 1
+        else:
+            n = 0
+        box_widget  = group.widgets[n]
+        port_widget = box_widget.addPortFromGroup(port_id, port_mode, port_type, port_name)
 
     if not (box_widget and port_widget):
         qCritical("PatchCanvas::addPort(%i, %i, %s, %s, %s) - Unable to find parent group" % (group_id, port_id, port_name.encode(), port_mode2str(port_mode), port_type2str(port_type)))
@@ -751,44 +905,54 @@ def addPort(group_id, port_id, port_name, port_mode, port_type):
     port_dict.port_mode = port_mode
     port_dict.port_type = port_type
     port_dict.widget = port_widget
-    canvas.port_list.append(port_dict)
+
+    canvas.ports[port_id] = port_dict
+    canvas.group_ports[group_id][port_id] = None
+    canvas.port_connections[port_id] = OrderedDict()
 
     box_widget.updatePositions()
 
-    QTimer.singleShot(0, canvas.scene.update)
+    CanvasSceneUpdate()
 
 def removePort(port_id):
     if canvas.debug:
         qDebug("PatchCanvas::removePort(%i)" % port_id)
 
-    for port in canvas.port_list:
-        if port.port_id == port_id:
-            item = port.widget
-            item.parentItem().removePortFromGroup(port_id)
-            canvas.scene.removeItem(item)
-            del item
+    port = canvas.ports.get(port_id)
 
-            canvas.port_list.remove(port)
+    if not port:
+        qCritical("PatchCanvas::removePort(%i) - Unable to find port to remove" % port_id)
+        return
 
-            QTimer.singleShot(0, canvas.scene.update)
-            return
+    item = port.widget
+    item.parentItem().removePortFromGroup(port_id)
+    canvas.scene.removeItem(item)
+    del item
+
+    del canvas.ports[port_id]
+    canvas.port_connections.pop(port_id, None)
 
-    qCritical("PatchCanvas::removePort(%i) - Unable to find port to remove" % port_id)
+    group_ports = canvas.group_ports.get(port.group_id)
+    if group_ports is not None:
+        group_ports.pop(port_id, None)
+
+    CanvasSceneUpdate()
 
 def renamePort(port_id, new_port_name):
     if canvas.debug:
         qDebug("PatchCanvas::renamePort(%i, %s)" % (port_id, new_port_name.encode()))
 
-    for port in canvas.port_list:
-        if port.port_id == port_id:
-            port.port_name = new_port_name
-            port.widget.setPortName(new_port_name)
-            port.widget.parentItem().updatePositions()
+    port = canvas.ports.get(port_id)
 
-            QTimer.singleShot(0, canvas.scene.update)
-            return
+    if not port:
+        qCritical("PatchCanvas::renamePort(%i, %s) - Unable to find port to rename" % (port_id, new_port_name.encode()))
+        return
+
+    port.port_name = new_port_name
+    port.widget.setPortName(new_port_name)
+    port.widget.parentItem().updatePositions()
 
-    qCritical("PatchCanvas::renamePort(%i, %s) - Unable to find port to rename" % (port_id, new_port_name.encode()))
+    CanvasSceneUpdate()
 
 def connectPorts(connection_id, port_out_id, port_in_id):
     if canvas.debug:
@@ -799,13 +963,13 @@ def connectPorts(connection_id, port_out_id, port_in_id):
     port_out_parent = None
     port_in_parent  = None
 
-    for port in canvas.port_list:
-        if port.port_id == port_out_id:
-            port_out = port.widget
-            port_out_parent = port_out.parentItem()
-        elif port.port_id == port_in_id:
-            port_in = port.widget
-            port_in_parent = port_in.parentItem()
+    if port_out_id in canvas.ports:
+        port_out = canvas.ports[port_out_id].widget
+        port_out_parent = port_out.parentItem()
+
+    if port_in_id in canvas.ports and port_in_id != port_out_id:
+        port_in = canvas.ports[port_in_id].widget
+        port_in_parent = port_in.parentItem()
 
     # FIXME
     if not (port_out and port_in):
@@ -825,7 +989,8 @@ def connectPorts(connection_id, port_out_id, port_in_id):
     canvas.scene.addItem(connection_dict.widget)
 
     port_out_parent.addLineFromGroup(connection_dict.widget, connection_id)
-    port_in_parent.addLineFromGroup(connection_dict.widget, connection_id)
+    if port_in_parent is not port_out_parent:
+        port_in_parent.addLineFromGroup(connection_dict.widget, connection_id)
 
     canvas.last_z_value += 1
     port_out_parent.setZValue(canvas.last_z_value)
@@ -834,13 +999,15 @@ def connectPorts(connection_id, port_out_id, port_in_id):
     canvas.last_z_value += 1
     connection_dict.widget.setZValue(canvas.last_z_value)
 
-    canvas.connection_list.append(connection_dict)
+    canvas.connections[connection_id] = connection_dict
+    canvas.port_connections[port_out_id][connection_id] = None
+    canvas.port_connections[port_in_id][connection_id] = None
 
     if options.eyecandy == EYECANDY_FULL:
         item = connection_dict.widget
         CanvasItemFX(item, True)
 
-    QTimer.singleShot(0, canvas.scene.update)
+    CanvasSceneUpdate()
 
 def disconnectPorts(connection_id):
     if canvas.debug:
@@ -851,55 +1018,116 @@ def disconnectPorts(connection_id):
     item1 = None
     item2 = None
 
-    for connection in canvas.connection_list:
-        if connection.connection_id == connection_id:
-            port_1_id = connection.port_out_id
-            port_2_id = connection.port_in_id
-            line = connection.widget
-            canvas.connection_list.remove(connection)
-            break
+    connection = canvas.connections.pop(connection_id, None)
+
+    if connection:
+        port_1_id = connection.port_out_id
+        port_2_id = connection.port_in_id
+        line = connection.widget
+
+        for port_id in (port_1_id, port_2_id):
+            port_con_list = canvas.port_connections.get(port_id)
+            if port_con_list is not None:
+                port_con_list.pop(connection_id, None)
 
     if not line:
         qCritical("PatchCanvas::disconnectPorts(%i) - unable to find connection ports" % connection_id)
         return
 
-    for port in canvas.port_list:
-        if port.port_id == port_1_id:
-            item1 = port.widget
-            break
+    canvas.pending_lines.discard(line)
+
+    if port_1_id in canvas.ports:
+        item1 = canvas.ports[port_1_id].widget
 
     if not item1:
         qCritical("PatchCanvas::disconnectPorts(%i) - unable to find output port" % connection_id)
         return
 
-    for port in canvas.port_list:
-        if port.port_id == port_2_id:
-            item2 = port.widget
-            break
+    if port_2_id in canvas.ports:
+        item2 = canvas.ports[port_2_id].widget
 
     if not item2:
         qCritical("PatchCanvas::disconnectPorts(%i) - unable to find input port" % connection_id)
         return
 
     item1.parentItem().removeLineFromGroup(connection_id)
-    item2.parentItem().removeLineFromGroup(connection_id)
+    if item2.parentItem() is not item1.parentItem():
+        item2.parentItem().removeLineFromGroup(connection_id)
 
     if options.eyecandy == EYECANDY_FULL:
         CanvasItemFX(line, False, True)
     else:
         line.deleteFromScene()
 
-    QTimer.singleShot(0, canvas.scene.update)
+    CanvasSceneUpdate()
 
-def arrange():
+def beginUpdate():
     if canvas.debug:
-        qDebug("PatchCanvas::arrange()")
+        qDebug("PatchCanvas::beginUpdate()")
+
+    canvas.update_depth += 1
+
+def endUpdate():
+    if canvas.debug:
+        qDebug("PatchCanvas::endUpdate()")
+
+    if canvas.update_depth == 0:
+        qWarning("PatchCanvas::endUpdate() - called without beginUpdate()")
+        return
+
+    canvas.update_depth -= 1
+
+    if canvas.update_depth > 0:
+        return
+
+    CanvasUpdatePendingBoxes()
+    CanvasPlaceNewBoxes()
+
+    if canvas.update_scene:
+        canvas.update_scene = False
+        QTimer.singleShot(0, canvas.scene.update)
+
+# Same as beginUpdate() and endUpdate(), but the update is ended even if something inside raises
+@contextmanager
+def bulkUpdate():
+    beginUpdate()
+    try:
+        yield
+    finally:
+        endUpdate()
+
+def arrange(selection_only=False):
+    if canvas.debug:
+        qDebug("PatchCanvas::arrange(%s)" % bool2str(selection_only))
+
+    # Boxes with pending layout still have their old size
+    CanvasUpdatePendingBoxes()
+    CanvasPlaceNewBoxes()
+
+    boxes = []
+    for group_id in sorted(canvas.groups):
+        for box in canvas.groups[group_id].widgets:
+            if box and box.isVisible() and (box.isSelected() or not selection_only):
+                boxes.append(box)
+
+    if len(boxes) == 0:
+        return
+
+    positions = CanvasGetArrangedPositions(boxes)
+
+    for box in boxes:
+        box.setPos(positions[box])
+        box.checkItemPos()
+        box.repaintLines()
+        canvas.scene.sceneGroupMoved.emit(box.getGroupId(), box.getSplittedMode(), box.scenePos())
+
+    CanvasSceneUpdate()
 
 def updateZValues():
     if canvas.debug:
         qDebug("PatchCanvas::updateZValues()")
 
-    for group in canvas.group_list:
+    for group in canvas.groups.values():
         group.widgets[0].resetLinesZValue()
 
         if group.split and group.widgets[1]:
@@ -911,9 +1139,10 @@ def CanvasGetGroupName(group_id):
     if canvas.debug:
         qDebug("PatchCanvas::CanvasGetGroupName(%i)" % group_id)
 
-    for group in canvas.group_list:
-        if group.group_id == group_id:
-            return group.group_name
+    group = canvas.groups.get(group_id)
+
+    if group:
+        return group.group_name
 
     qCritical("PatchCanvas::CanvasGetGroupName(%i) - unable to find group" % group_id)
     return ""
@@ -922,50 +1151,239 @@ def CanvasGetGroupPortCount(group_id):
     if canvas.debug:
         qDebug("PatchCanvas::CanvasGetGroupPortCount(%i)" % group_id)
 
-    port_count = 0
-    for port in canvas.port_list:
-        if port.group_id == group_id:
-            port_count += 1
+    return len(canvas.group_ports.get(group_id, []))
 
-    return port_count
+def CanvasSaveGroupPos(group):
+    if not features.handle_group_pos:
+        return
+
+    # Boxes not placed yet have no position to save
+    if group.split:
+        if group.widgets[0] not in canvas.update_new_boxes:
+            canvas.settings.setValue("CanvasPositions/%s_OUTPUT" % group.group_name, group.widgets[0].pos())
+        if group.widgets[1] not in canvas.update_new_boxes:
+            canvas.settings.setValue("CanvasPositions/%s_INPUT" % group.group_name, group.widgets[1].pos())
+        canvas.settings.setValue("CanvasPositions/%s_SPLIT" % group.group_name, SPLIT_YES)
+    else:
+        if group.widgets[0] not in canvas.update_new_boxes:
+            canvas.settings.setValue("CanvasPositions/%s" % group.group_name, group.widgets[0].pos())
+        canvas.settings.setValue("CanvasPositions/%s_SPLIT" % group.group_name, SPLIT_NO)
 
 def CanvasGetNewGroupPos(horizontal=False):
     if canvas.debug:
         qDebug("PatchCanvas::CanvasGetNewGroupPos(%s)" % bool2str(horizontal))
 
+    # Boxes with pending layout still have their old size
+    CanvasUpdatePendingBoxes()
+
     new_pos = QPointF(canvas.initial_pos.x(), canvas.initial_pos.y())
-    items = canvas.scene.items()
-
-    break_loop = False
-    while not break_loop:
-        break_for = False
-        for i in range(len(items)):
-            item = items[i]
-            if item and item.type() == CanvasBoxType:
-                if item.sceneBoundingRect().contains(new_pos):
-                    if horizontal:
-                        new_pos += QPointF(item.boundingRect().width() + 15, 0)
-                    else:
-                        new_pos += QPointF(0, item.boundingRect().height() + 15)
-                    break_for = True
-                    break
 
-            if i >= len(items) - 1 and not break_for:
-                break_loop = True
+    while True:
+        boxes = canvas.box_index.boxesAt(new_pos)
+
+        if not boxes:
+            break
+
+        item = boxes[0]
+        if horizontal:
+            new_pos += QPointF(item.boundingRect().width() + 15, 0)
+        else:
+            new_pos += QPointF(0, item.boundingRect().height() + 15)
 
     return new_pos
 
+# New boxes go to their saved position, or to the first free spot.
+# During a bulk update free spots are searched in endUpdate(), once all boxes have their final size.
+def CanvasSetNewBoxPos(box, settings_key, horizontal=False):
+    if settings_key and features.handle_group_pos and canvas.settings.contains(settings_key):
+        box.setPos(canvas.settings.value(settings_key, type=QPointF))
+    elif canvas.update_depth > 0:
+        canvas.update_new_boxes[box] = horizontal
+    else:
+        box.setPos(CanvasGetNewGroupPos(horizontal))
+
+def CanvasPlaceNewBoxes():
+    if not canvas.update_new_boxes:
+        return
+
+    CanvasUpdatePendingBoxes()
+
+    new_boxes = canvas.update_new_boxes
+    canvas.update_new_boxes = OrderedDict()
+
+    # Not placed yet, they must not take up the free spots
+    for box in new_boxes:
+        canvas.box_index.remove(box)
+
+    for box, horizontal in new_boxes.items():
+        box.setPos(CanvasGetNewGroupPos(horizontal))
+        box.checkItemPos()
+        canvas.box_index.update(box)
+
+# Which side a box should be placed at when arranging, -1 for left, 1 for right and 0 for anywhere
+def CanvasGetBoxSide(box):
+    if box.isSplitted():
+        return -1 if box.getSplittedMode() == PORT_MODE_OUTPUT else 1
+
+    if canvas.groups[box.getGroupId()].icon == ICON_HARDWARE:
+        port_modes = set(canvas.ports[port_id].port_mode for port_id in box.getPortList())
+
+        if port_modes == set((PORT_MODE_OUTPUT,)):
+            return -1
+        if port_modes == set((PORT_MODE_INPUT,)):
+            return 1
+
+    return 0
+
+# Layered graph layout (Sugiyama style), returns new scene positions for 'boxes'
+def CanvasGetArrangedPositions(boxes):
+    box_set = set(boxes)
+
+    # Connections between boxes, as neighbour -> number of connections
+    successors   = dict((box, OrderedDict()) for box in boxes)
+    predecessors = dict((box, OrderedDict()) for box in boxes)
+
+    for connection_id in sorted(canvas.connections):
+        connection = canvas.connections[connection_id]
+        port_out = canvas.ports.get(connection.port_out_id)
+        port_in  = canvas.ports.get(connection.port_in_id)
+
+        if not (port_out and port_in):
+            continue
+
+        box_out = port_out.widget.parentItem()
+        box_in  = port_in.widget.parentItem()
+
+        if box_out is box_in or box_out not in box_set or box_in not in box_set:
+            continue
+
+        successors[box_out][box_in]   = successors[box_out].get(box_in, 0) + 1
+        predecessors[box_in][box_out] = predecessors[box_in].get(box_out, 0) + 1
+
+    sides = dict((box, CanvasGetBoxSide(box)) for box in boxes)
+    free_boxes = [box for box in boxes if sides[box] == 0]
+    has_left   = bool(-1 in sides.values())
+
+    # Break cycles, ignoring connections that go back to a box being visited
+    state = dict((box, 0) for box in free_boxes) # 0 = new, 1 = visiting, 2 = done
+    forward = dict((box, []) for box in free_boxes)
+
+    for root in free_boxes:
+        if state[root] != 0:
+            continue
+
+        state[root] = 1
+        stack = [(root, iter(successors[root]))]
+
+        while stack:
+            box, children = stack[-1]
+            child = next(children, None)
+
+            if child is None:
+                state[box] = 2
+                stack.pop()
+                continue
+
+            if sides[child] != 0 or state[child] == 1:
+                continue
+
+            forward[box].append(child)
+
+            if state[child] == 0:
+                state[child] = 1
+                stack.append((child, iter(successors[child])))
+
+    # Longest path layering
+    first_layer = 1 if has_left else 0
+    layer_of = dict((box, first_layer) for box in free_boxes)
+    in_degree = dict((box, 0) for box in free_boxes)
+
+    for box in free_boxes:
+        for child in forward[box]:
+            in_degree[child] += 1
+
+    queue = [box for box in free_boxes if in_degree[box] == 0]
+
+    while queue:
+        box = queue.pop()
+        for child in forward[box]:
+            layer_of[child] = max(layer_of[child], layer_of[box] + 1)
+            in_degree[child] -= 1
+            if in_degree[child] == 0:
+                queue.append(child)
+
+    last_layer = max(layer_of.values()) + 1 if free_boxes else first_layer
+
+    for box in boxes:
+        if sides[box] == -1:
+            layer_of[box] = 0
+        elif sides[box] == 1:
+            layer_of[box] = last_layer
+
+    layers = [[] for i in range(last_layer + 1)]
+
+    # Start from the current vertical order, so the result stays close to what the user had
+    for box in sorted(boxes, key=lambda box: (box.scenePos().y(), box.scenePos().x())):
+        layers[layer_of[box]].append(box)
+
+    layers = [layer for layer in layers if layer]
+
+    # Reduce crossings, ordering each layer by the average position of its neighbours
+    index_of = {}
+    for layer in layers:
+        for i in range(len(layer)):
+            index_of[layer[i]] = i
+
+    def barycenter(box, neighbours):
+        total  = 0.0
+        weight = 0
+        for neighbour, count in neighbours[box].items():
+            total  += index_of[neighbour] * count
+            weight += count
+        return total / weight if weight else float(index_of[box])
+
+    for sweep in range(ARRANGE_SWEEPS):
+        if sweep % 2 == 0:
+            sweep_layers, neighbours = layers[1:], predecessors
+        else:
+            sweep_layers, neighbours = reversed(layers[:-1]), successors
+
+        for layer in sweep_layers:
+            layer.sort(key=lambda box: barycenter(box, neighbours))
+            for i in range(len(layer)):
+                index_of[layer[i]] = i
+
+    # Final coordinates, layers as columns centered vertically
+    left = min(box.scenePos().x() for box in boxes)
+    top  = min(box.scenePos().y() for box in boxes)
+
+    heights = [sum(box.boundingRect().height() for box in layer) + ARRANGE_SPACING_Y * (len(layer) - 1) for layer in layers]
+    max_height = max(heights)
+
+    positions = {}
+    x = left
+
+    for layer, height in zip(layers, heights):
+        y = top + (max_height - height) / 2
+
+        for box in layer:
+            positions[box] = QPointF(x, y)
+            y += box.boundingRect().height() + ARRANGE_SPACING_Y
+
+        x += max(box.boundingRect().width() for box in layer) + ARRANGE_SPACING_X
+
+    return positions
+
 def CanvasGetFullPortName(port_id):
     if canvas.debug:
         qDebug("PatchCanvas::CanvasGetFullPortName(%i)" % port_id)
 
-    for port in canvas.port_list:
-        if port.port_id == port_id:
-            group_id = port.group_id
-            for group in canvas.group_list:
-                if group.group_id == group_id:
-                    return group.group_name + ":" + port.port_name
-            break
+    port = canvas.ports.get(port_id)
+
+    if port:
+        group = canvas.groups.get(port.group_id)
+        if group:
+            return group.group_name + ":" + port.port_name
 
     qCritical("PatchCanvas::CanvasGetFullPortName(%i) - unable to find port" % port_id)
     return ""
@@ -974,28 +1392,114 @@ def CanvasGetPortConnectionList(port_id):
     if canvas.debug:
         qDebug("PatchCanvas::CanvasGetPortConnectionList(%i)" % port_id)
 
-    port_con_list = []
-
-    for connection in canvas.connection_list:
-        if connection.port_out_id == port_id or connection.port_in_id == port_id:
-            port_con_list.append(connection.connection_id)
-
-    return port_con_list
+    return list(canvas.port_connections.get(port_id, []))
 
 def CanvasGetConnectedPort(connection_id, port_id):
     if canvas.debug:
         qDebug("PatchCanvas::CanvasGetConnectedPort(%i, %i)" % (connection_id, port_id))
 
-    for connection in canvas.connection_list:
-        if connection.connection_id == connection_id:
-            if connection.port_out_id == port_id:
-                return connection.port_in_id
-            else:
-                return connection.port_out_id
+    connection = canvas.connections.get(connection_id)
+
+    if connection:
+        if connection.port_out_id == port_id:
+            return connection.port_in_id
+        else:
+            return connection.port_out_id
 
     qCritical("PatchCanvas::CanvasGetConnectedPort(%i, %i) - unable to find connection" % (connection_id, port_id))
     return 0
 
+def CanvasUpdatePendingBoxes():
+    if not canvas.update_boxes:
+        return
+
+    boxes = canvas.update_boxes
+    canvas.update_boxes = set()
+
+    for box in boxes:
+        box.updatePositions(True)
+
+def CanvasGetTextWidth(font, text):
+    key = (font.key(), text)
+    width = canvas.text_widths.get(key)
+
+    if width is not None:
+        canvas.text_widths.move_to_end(key)
+        return width
+
+    metrics = canvas.font_metrics.get(key[0])
+
+    if metrics is None:
+        metrics = QFontMetrics(font)
+        canvas.font_metrics[key[0]] = metrics
+
+    width = metrics.width(text)
+    canvas.text_widths[key] = width
+
+    if len(canvas.text_widths) > TEXT_WIDTH_CACHE_SIZE:
+        canvas.text_widths.popitem(last=False)
+
+    return width
+
+def CanvasClearTextWidths():
+    canvas.font_metrics.clear()
+    canvas.text_widths.clear()
+
+def CanvasGetLineColor(port_type, selected):
+    if port_type == PORT_TYPE_AUDIO_JACK:
+        return canvas.theme.line_audio_jack_sel if selected else canvas.theme.line_audio_jack
+    elif port_type == PORT_TYPE_MIDI_JACK:
+        return canvas.theme.line_midi_jack_sel if selected else canvas.theme.line_midi_jack
+    elif port_type == PORT_TYPE_MIDI_A2J:
+        return canvas.theme.line_midi_a2j_sel if selected else canvas.theme.line_midi_a2j
+    elif port_type == PORT_TYPE_MIDI_ALSA:
+        return canvas.theme.line_midi_alsa_sel if selected else canvas.theme.line_midi_alsa
+    else:
+        return QColor(0, 0, 0, 0)
+
+# Single colour line pen, used when zoomed out
+def CanvasGetLowDetailPen(port_type, selected):
+    pen = canvas.low_detail_pens.get((port_type, selected))
+
+    if pen is None:
+        pen = QPen(CanvasGetLineColor(port_type, selected), 0)
+        canvas.low_detail_pens[(port_type, selected)] = pen
+
+    return pen
+
+# Gradient stops of a line, 'downwards' tells if the input port is below the output one
+def CanvasGetLineGradientStops(port_type1, port_type2, selected, downwards):
+    key = (port_type1, port_type2, selected, downwards)
+    stops = canvas.line_gradient_stops.get(key)
+
+    if stops is None:
+        color1 = CanvasGetLineColor(port_type1, selected)
+        color2 = CanvasGetLineColor(port_type2, selected)
+        stops = [(0.0, color1), (1.0, color2)] if downwards else [(0.0, color2), (1.0, color1)]
+        canvas.line_gradient_stops[key] = stops
+
+    return stops
+
+# Lines are moved at most once per LINE_UPDATE_INTERVAL, no matter how many mouse events arrive
+def CanvasQueueLineUpdates(lines):
+    canvas.pending_lines.update(lines)
+
+    if canvas.pending_lines:
+        canvas.qobject.startLineTimer()
+
+def CanvasUpdatePendingLines():
+    lines = canvas.pending_lines
+    canvas.pending_lines = set()
+
+    for line in lines:
+        line.updateLinePos()
+
+def CanvasSceneUpdate():
+    if canvas.update_depth > 0:
+        canvas.update_scene = True
+    else:
+        QTimer.singleShot(0, canvas.scene.update)
+
 def CanvasRemoveAnimation(f_animation):
     if canvas.debug:
         qDebug("PatchCanvas::CanvasRemoveAnimation(%s)" % f_animation)
@@ -1080,6 +1584,8 @@ class PatchScene(QGraphicsScene):
         if not self.m_view:
             qFatal("PatchCanvas::PatchScene() - invalid view")
 
+        self.scaleChanged.connect(self.updateDetailLevel)
+
     def addRubberBand(self):
         self.m_rubberband = self.addRect(QRectF(0, 0, 0, 0))
         self.m_rubberband.setZValue(-1)
@@ -1103,7 +1609,27 @@ class PatchScene(QGraphicsScene):
             self.m_view.scale(0.2, 0.2)
         self.scaleChanged.emit(self.m_view.transform().m11())
 
+    def updateDetailLevel(self, scale):
+        low_detail = bool(scale < LOW_DETAIL_SCALE)
+
+        if low_detail == canvas.low_detail:
+            return
+
+        canvas.low_detail = low_detail
+
+        # Shadows are the most expensive part to draw
+        for group in canvas.groups.values():
+            for box in group.widgets:
+                if box and box.shadow:
+                    box.shadow.setEnabled(not low_detail)
+
+        self.update()
+
     def updateTheme(self):
+        CanvasClearTextWidths()
+        canvas.low_detail_pens = {}
+        canvas.line_gradient_stops = {}
+
         self.setBackgroundBrush(canvas.theme.canvas_bg)
         self.m_rubberband.setPen(canvas.theme.rubberband_pen)
         self.m_rubberband.setBrush(canvas.theme.rubberband_brush)
@@ -1224,20 +1750,18 @@ class PatchScene(QGraphicsScene):
 
     def mouseReleaseEvent(self, event):
         if self.m_rubberband_selection:
-            items_list = self.items()
-            if len(items_list) > 0:
-                for item in items_list:
-                    if item and item.isVisible() and item.type() == CanvasBoxType:
-                        item_rect = item.sceneBoundingRect()
-                        item_top_left = QPointF(item_rect.x(), item_rect.y())
-                        item_bottom_right = QPointF(item_rect.x() + item_rect.width(), item_rect.y() + item_rect.height())
+            for item in canvas.box_index.boxesIn(self.m_rubberband.rect()):
+                if item.isVisible():
+                    item_rect = canvas.box_index.boxRect(item)
+                    item_top_left = QPointF(item_rect.x(), item_rect.y())
+                    item_bottom_right = QPointF(item_rect.x() + item_rect.width(), item_rect.y() + item_rect.height())
 
-                        if self.m_rubberband.contains(item_top_left) and self.m_rubberband.contains(item_bottom_right):
-                            item.setSelected(True)
+                    if self.m_rubberband.contains(item_top_left) and self.m_rubberband.contains(item_bottom_right):
+                        item.setSelected(True)
 
-                self.m_rubberband.hide()
-                self.m_rubberband.setRect(0, 0, 0, 0)
-                self.m_rubberband_selection = False
+            self.m_rubberband.hide()
+            self.m_rubberband.setRect(0, 0, 0, 0)
+            self.m_rubberband_selection = False
 
         else:
             items_list = self.selectedItems()
@@ -1323,6 +1847,11 @@ class CanvasLine(QGraphicsLineItem):
         self.m_locked = False
         self.m_lineSelected = False
 
+        # Updated in place, see updateLineGradient()
+        self.m_gradient = QLinearGradient(0, 0, 0, 1)
+        self.m_gradient_stops = None
+        self.m_pen = QPen(self.m_gradient, 2)
+
         self.setGraphicsEffect(None)
         self.updateLinePos()
 
@@ -1367,43 +1896,32 @@ class CanvasLine(QGraphicsLineItem):
         return CanvasLineType
 
     def updateLineGradient(self):
-        pos_top = self.boundingRect().top()
-        pos_bot = self.boundingRect().bottom()
-        if self.item2.scenePos().y() >= self.item1.scenePos().y():
-            pos1 = 0
-            pos2 = 1
-        else:
-            pos1 = 1
-            pos2 = 0
-
-        port_type1 = self.item1.getPortType()
-        port_type2 = self.item2.getPortType()
-        port_gradient = QLinearGradient(0, pos_top, 0, pos_bot)
-
-        if port_type1 == PORT_TYPE_AUDIO_JACK:
-            port_gradient.setColorAt(pos1, canvas.theme.line_audio_jack_sel if self.m_lineSelected else canvas.theme.line_audio_jack)
-        elif port_type1 == PORT_TYPE_MIDI_JACK:
-            port_gradient.setColorAt(pos1, canvas.theme.line_midi_jack_sel if self.m_lineSelected else canvas.theme.line_midi_jack)
-        elif port_type1 == PORT_TYPE_MIDI_A2J:
-            port_gradient.setColorAt(pos1, canvas.theme.line_midi_a2j_sel if self.m_lineSelected else canvas.theme.line_midi_a2j)
-        elif port_type1 == PORT_TYPE_MIDI_ALSA:
-            port_gradient.setColorAt(pos1, canvas.theme.line_midi_alsa_sel if self.m_lineSelected else canvas.theme.line_midi_alsa)
-
-        if port_type2 == PORT_TYPE_AUDIO_JACK:
-            port_gradient.setColorAt(pos2, canvas.theme.line_audio_jack_sel if self.m_lineSelected else canvas.theme.line_audio_jack)
-        elif port_type2 == PORT_TYPE_MIDI_JACK:
-            port_gradient.setColorAt(pos2, canvas.theme.line_midi_jack_sel if self.m_lineSelected else canvas.theme.line_midi_jack)
-        elif port_type2 == PORT_TYPE_MIDI_A2J:
-            port_gradient.setColorAt(pos2, canvas.theme.line_midi_a2j_sel if self.m_lineSelected else canvas.theme.line_midi_a2j)
-        elif port_type2 == PORT_TYPE_MIDI_ALSA:
-            port_gradient.setColorAt(pos2, canvas.theme.line_midi_alsa_sel if self.m_lineSelected else canvas.theme.line_midi_alsa)
-
-        self.setPen(QPen(port_gradient, 2))
+        rect  = self.boundingRect()
+        stops = CanvasGetLineGradientStops(self.item1.getPortType(), self.item2.getPortType(), self.m_lineSelected,
+                                           bool(self.item2.scenePos().y() >= self.item1.scenePos().y()))
+
+        # Stops come from a cache that is reset on theme change, so checking identity is enough
+        if stops is self.m_gradient_stops and rect.top() == self.m_gradient.start().y() and rect.bottom() == self.m_gradient.finalStop().y():
+            return
+
+        self.m_gradient_stops = stops
+        self.m_gradient.setStart(0, rect.top())
+        self.m_gradient.setFinalStop(0, rect.bottom())
+        self.m_gradient.setStops(stops)
+
+        self.m_pen.setBrush(QBrush(self.m_gradient))
+        self.setPen(self.m_pen)
 
     def paint(self, painter, option, widget):
         painter.save()
-        painter.setRenderHint(QPainter.Antialiasing, bool(options.antialiasing))
-        QGraphicsLineItem.paint(self, painter, option, widget)
+
+        if canvas.low_detail:
+            painter.setPen(CanvasGetLowDetailPen(self.item1.getPortType(), self.m_lineSelected))
+            painter.drawLine(self.line())
+        else:
+            painter.setRenderHint(QPainter.Antialiasing, bool(options.antialiasing))
+            QGraphicsLineItem.paint(self, painter, option, widget)
+
         painter.restore()
 
 # ------------------------------------------------------------------------------
@@ -1419,6 +1937,11 @@ class CanvasBezierLine(QGraphicsPathItem):
         self.m_locked = False
         self.m_lineSelected = False
 
+        # Updated in place, see updateLineGradient()
+        self.m_gradient = QLinearGradient(0, 0, 0, 1)
+        self.m_gradient_stops = None
+        self.m_pen = QPen(self.m_gradient, 2)
+
         self.setBrush(QColor(0, 0, 0, 0))
         self.setGraphicsEffect(None)
         self.updateLinePos()
@@ -1474,43 +1997,33 @@ class CanvasBezierLine(QGraphicsPathItem):
         return CanvasBezierLineType
 
     def updateLineGradient(self):
-        pos_top = self.boundingRect().top()
-        pos_bot = self.boundingRect().bottom()
-        if self.item2.scenePos().y() >= self.item1.scenePos().y():
-            pos1 = 0
-            pos2 = 1
-        else:
-            pos1 = 1
-            pos2 = 0
-
-        port_type1 = self.item1.getPortType()
-        port_type2 = self.item2.getPortType()
-        port_gradient = QLinearGradient(0, pos_top, 0, pos_bot)
-
-        if port_type1 == PORT_TYPE_AUDIO_JACK:
-            port_gradient.setColorAt(pos1, canvas.theme.line_audio_jack_sel if self.m_lineSelected else canvas.theme.line_audio_jack)
-        elif port_type1 == PORT_TYPE_MIDI_JACK:
-            port_gradient.setColorAt(pos1, canvas.theme.line_midi_jack_sel if self.m_lineSelected else canvas.theme.line_midi_jack)
-        elif port_type1 == PORT_TYPE_MIDI_A2J:
-            port_gradient.setColorAt(pos1, canvas.theme.line_midi_a2j_sel if self.m_lineSelected else canvas.theme.line_midi_a2j)
-        elif port_type1 == PORT_TYPE_MIDI_ALSA:
-            port_gradient.setColorAt(pos1, canvas.theme.line_midi_alsa_sel if self.m_lineSelected else canvas.theme.line_midi_alsa)
-
-        if port_type2 == PORT_TYPE_AUDIO_JACK:
-            port_gradient.setColorAt(pos2, canvas.theme.line_audio_jack_sel if self.m_lineSelected else canvas.theme.line_audio_jack)
-        elif port_type2 == PORT_TYPE_MIDI_JACK:
-            port_gradient.setColorAt(pos2, canvas.theme.line_midi_jack_sel if self.m_lineSelected else canvas.theme.line_midi_jack)
-        elif port_type2 == PORT_TYPE_MIDI_A2J:
-            port_gradient.setColorAt(pos2, canvas.theme.line_midi_a2j_sel if self.m_lineSelected else canvas.theme.line_midi_a2j)
-        elif port_type2 == PORT_TYPE_MIDI_ALSA:
-            port_gradient.setColorAt(pos2, canvas.theme.line_midi_alsa_sel if self.m_lineSelected else canvas.theme.line_midi_alsa)
-
-        self.setPen(QPen(port_gradient, 2))
+        rect  = self.boundingRect()
+        stops = CanvasGetLineGradientStops(self.item1.getPortType(), self.item2.getPortType(), self.m_lineSelected,
+                                           bool(self.item2.scenePos().y() >= self.item1.scenePos().y()))
+
+        # Stops come from a cache that is reset on theme change, so checking identity is enough
+        if stops is self.m_gradient_stops and rect.top() == self.m_gradient.start().y() and rect.bottom() == self.m_gradient.finalStop().y():
+            return
+
+        self.m_gradient_stops = stops
+        self.m_gradient.setStart(0, rect.top())
+        self.m_gradient.setFinalStop(0, rect.bottom())
+        self.m_gradient.setStops(stops)
+
+        self.m_pen.setBrush(QBrush(self.m_gradient))
+        self.setPen(self.m_pen)
 
     def paint(self, painter, option, widget):
         painter.save()
-        painter.setRenderHint(QPainter.Antialiasing, bool(options.antialiasing))
-        QGraphicsPathItem.paint(self, painter, option, widget)
+
+        if canvas.low_detail:
+            painter.setPen(CanvasGetLowDetailPen(self.item1.getPortType(), self.m_lineSelected))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawPath(self.path())
+        else:
+            painter.setRenderHint(QPainter.Antialiasing, bool(options.antialiasing))
+            QGraphicsPathItem.paint(self, painter, option, widget)
+
         painter.restore()
 
 # ------------------------------------------------------------------------------
@@ -1691,15 +2204,15 @@ class CanvasPort(QGraphicsItem):
         self.update()
 
     def setPortName(self, port_name):
-        if QFontMetrics(self.m_port_font).width(port_name) < QFontMetrics(self.m_port_font).width(self.m_port_name):
-            QTimer.singleShot(0, canvas.scene.update)
+        if CanvasGetTextWidth(self.m_port_font, port_name) < CanvasGetTextWidth(self.m_port_font, self.m_port_name):
+            CanvasSceneUpdate()
 
         self.m_port_name = port_name
         self.update()
 
     def setPortWidth(self, port_width):
         if port_width < self.m_port_width:
-            QTimer.singleShot(0, canvas.scene.update)
+            CanvasSceneUpdate()
 
         self.m_port_width = port_width
         self.update()
@@ -1719,9 +2232,8 @@ class CanvasPort(QGraphicsItem):
                 self.setCursor(QCursor(Qt.CrossCursor))
                 self.m_cursor_moving = True
 
-                for connection in canvas.connection_list:
-                    if connection.port_out_id == self.m_port_id or connection.port_in_id == self.m_port_id:
-                        connection.widget.setLocked(True)
+                for connection_id in canvas.port_connections[self.m_port_id]:
+                    canvas.connections[connection_id].widget.setLocked(True)
 
             if not self.m_line_mov:
                 if options.use_bezier_lines:
@@ -1734,15 +2246,19 @@ class CanvasPort(QGraphicsItem):
                 canvas.last_z_value += 1
                 self.parentItem().setZValue(canvas.last_z_value)
 
+            # Find the port under the cursor, on the top-most box
             item = None
-            items = canvas.scene.items(event.scenePos(), Qt.ContainsItemShape, Qt.AscendingOrder)
-            for i in range(len(items)):
-                if items[i].type() == CanvasPortType:
-                    if items[i] != self:
-                        if not item:
-                            item = items[i]
-                        elif items[i].parentItem().zValue() > item.parentItem().zValue():
-                            item = items[i]
+            scene_pos = event.scenePos()
+            for box in canvas.box_index.boxesAt(scene_pos):
+                if not box.isVisible():
+                    continue
+                if item and box.zValue() <= item.parentItem().zValue():
+                    continue
+                for port_id in box.getPortList():
+                    port_widget = canvas.ports[port_id].widget
+                    if port_widget != self and port_widget.sceneBoundingRect().contains(scene_pos):
+                        item = port_widget
+                        break
 
             if self.m_hover_item and self.m_hover_item != item:
                 self.m_hover_item.setSelected(False)
@@ -1769,13 +2285,14 @@ class CanvasPort(QGraphicsItem):
                 self.m_line_mov.deleteFromScene()
                 self.m_line_mov = None
 
-            for connection in canvas.connection_list:
-                if connection.port_out_id == self.m_port_id or connection.port_in_id == self.m_port_id:
-                    connection.widget.setLocked(False)
+            for connection_id in canvas.port_connections[self.m_port_id]:
+                canvas.connections[connection_id].widget.setLocked(False)
 
             if self.m_hover_item:
                 check = False
-                for connection in canvas.connection_list:
+                # The callback may disconnect right away
+                for connection_id in list(canvas.port_connections[self.m_port_id]):
+                    connection = canvas.connections[connection_id]
                     if ( (connection.port_out_id == self.m_port_id and connection.port_in_id == self.m_hover_item.getPortId()) or
                          (connection.port_out_id == self.m_hover_item.getPortId() and connection.port_in_id == self.m_port_id) ):
                         canvas.callback(ACTION_PORTS_DISCONNECT, connection.connection_id, 0, "")
@@ -1923,6 +2440,18 @@ class CanvasPort(QGraphicsItem):
             qCritical("PatchCanvas::CanvasPort.paint() - invalid port type '%s'" % port_type2str(self.m_port_type))
             return
 
+        if self.isSelected() != self.m_last_selected_state:
+            for connection_id in canvas.port_connections.get(self.m_port_id, ()):
+                canvas.connections[connection_id].widget.setLineSelected(self.isSelected())
+
+        self.m_last_selected_state = self.isSelected()
+
+        if canvas.low_detail:
+            # Plain bar, text would be unreadable anyway
+            painter.fillRect(self.boundingRect(), poly_color)
+            painter.restore()
+            return
+
         polygon  = QPolygonF()
         polygon += QPointF(poly_locx[0], 0)
         polygon += QPointF(poly_locx[1], 0)
@@ -1944,11 +2473,6 @@ class CanvasPort(QGraphicsItem):
         painter.setFont(self.m_port_font)
         painter.drawText(text_pos, self.m_port_name)
 
-        if self.isSelected() != self.m_last_selected_state:
-            for connection in canvas.connection_list:
-                if connection.port_out_id == self.m_port_id or connection.port_in_id == self.m_port_id:
-                    connection.widget.setLineSelected(self.isSelected())
-
         if canvas.theme.idx == Theme.THEME_OOSTUDIO and canvas.theme.port_bg_pixmap:
             painter.setPen(Qt.NoPen)
             painter.setBrush(conn_pen.brush())
@@ -1960,19 +2484,11 @@ class CanvasPort(QGraphicsItem):
 
             painter.drawRect(connRect)
 
-        self.m_last_selected_state = self.isSelected()
-
         painter.restore()
 
 # ------------------------------------------------------------------------------
 # canvasbox.cpp
 
-class cb_line_t(object):
-    __slots__ = [
-        'line',
-        'connection_id'
-    ]
-
 class CanvasBox(QGraphicsItem):
     def __init__(self, group_id, group_name, icon, parent=None):
         QGraphicsItem.__init__(self, parent)
@@ -1994,7 +2510,7 @@ class CanvasBox(QGraphicsItem):
         self.m_mouse_down = False
 
         self.m_port_list_ids = []
-        self.m_connection_lines = []
+        self.m_connection_lines = OrderedDict() # connection_id -> line
 
         # Set Font
         self.m_font_name = QFont(canvas.theme.box_font_name, canvas.theme.box_font_size, canvas.theme.box_font_state)
@@ -2010,12 +2526,13 @@ class CanvasBox(QGraphicsItem):
         if options.eyecandy:
             self.shadow = CanvasBoxShadow(self.toGraphicsObject())
             self.shadow.setFakeParent(self)
+            self.shadow.setEnabled(not canvas.low_detail)
             self.setGraphicsEffect(self.shadow)
         else:
             self.shadow = None
 
         # Final touches
-        self.setFlags(QGraphicsItem.ItemIsMovable | QGraphicsItem.ItemIsSelectable)
+        self.setFlags(QGraphicsItem.ItemIsMovable | QGraphicsItem.ItemIsSelectable | QGraphicsItem.ItemSendsGeometryChanges)
 
         # Wait for at least 1 port
         if options.auto_hide_groups:
@@ -2024,6 +2541,7 @@ class CanvasBox(QGraphicsItem):
         self.updatePositions()
 
         canvas.scene.addItem(self)
+        canvas.box_index.update(self)
 
     def getGroupId(self):
         return self.m_group_id
@@ -2098,16 +2616,11 @@ class CanvasBox(QGraphicsItem):
                     self.setVisible(False)
 
     def addLineFromGroup(self, line, connection_id):
-        new_cbline = cb_line_t()
-        new_cbline.line = line
-        new_cbline.connection_id = connection_id
-        self.m_connection_lines.append(new_cbline)
+        self.m_connection_lines[connection_id] = line
 
     def removeLineFromGroup(self, connection_id):
-        for connection in self.m_connection_lines:
-            if connection.connection_id == connection_id:
-                self.m_connection_lines.remove(connection)
-                return
+        if self.m_connection_lines.pop(connection_id, None) is not None:
+            return
         qCritical("PatchCanvas::CanvasBox.removeLineFromGroup(%i) - unable to find line to remove" % connection_id)
 
     def checkItemPos(self):
@@ -2129,7 +2642,12 @@ class CanvasBox(QGraphicsItem):
         if self.icon_svg:
             canvas.scene.removeItem(self.icon_svg)
 
-    def updatePositions(self):
+    def updatePositions(self, forced=False):
+        if canvas.update_depth > 0 and not forced:
+            # Bulk update in progress, layout once in endUpdate()
+            canvas.update_boxes.add(self)
+            return
+
         self.prepareGeometryChange()
 
         max_in_width  = 0
@@ -2146,22 +2664,21 @@ class CanvasBox(QGraphicsItem):
         self.p_height = canvas.theme.box_header_height + canvas.theme.box_header_spacing + 1
 
         # Check Text Name size
-        app_name_size = QFontMetrics(self.m_font_name).width(self.m_group_name) + 30
+        app_name_size = CanvasGetTextWidth(self.m_font_name, self.m_group_name) + 30
         if app_name_size > self.p_width:
             self.p_width = app_name_size
 
         # Get Port List
         port_list = []
-        for port in canvas.port_list:
-            if port.port_id in self.m_port_list_ids:
-                port_list.append(port)
+        for port_id in self.m_port_list_ids:
+            port_list.append(canvas.ports[port_id])
 
         # Get Max Box Width/Height
         for port in port_list:
             if port.port_mode == PORT_MODE_INPUT:
                 max_in_height += port_spacing
 
-                size = QFontMetrics(self.m_font_port).width(port.port_name)
+                size = CanvasGetTextWidth(self.m_font_port, port.port_name)
                 if size > max_in_width:
                     max_in_width = size
 
@@ -2181,7 +2698,7 @@ class CanvasBox(QGraphicsItem):
             elif port.port_mode == PORT_MODE_OUTPUT:
                 max_out_height += port_spacing
 
-                size = QFontMetrics(self.m_font_port).width(port.port_name)
+                size = CanvasGetTextWidth(self.m_font_port, port.port_name)
                 if size > max_out_width:
                     max_out_width = size
 
@@ -2312,24 +2829,30 @@ class CanvasBox(QGraphicsItem):
                     last_out_pos += port_spacing
                     last_out_type = port.port_type
 
+        canvas.box_index.update(self)
+
         self.repaintLines(True)
         self.update()
 
     def repaintLines(self, forced=False):
-        if self.pos() != self.m_last_pos or forced:
-            for connection in self.m_connection_lines:
-                connection.line.updateLinePos()
+        if forced:
+            for line in self.m_connection_lines.values():
+                line.updateLinePos()
+        elif self.pos() != self.m_last_pos:
+            CanvasQueueLineUpdates(self.m_connection_lines.values())
 
         self.m_last_pos = self.pos()
 
     def resetLinesZValue(self):
-        for connection in canvas.connection_list:
-            if connection.port_out_id in self.m_port_list_ids and connection.port_in_id in self.m_port_list_ids:
+        for connection_id, line in self.m_connection_lines.items():
+            connection = canvas.connections[connection_id]
+
+            if canvas.ports[connection.port_out_id].widget.parentItem() is self and canvas.ports[connection.port_in_id].widget.parentItem() is self:
                 z_value = canvas.last_z_value
             else:
                 z_value = canvas.last_z_value - 1
 
-            connection.widget.setZValue(z_value)
+            line.setZValue(z_value)
 
     def type(self):
         return CanvasBoxType
@@ -2376,12 +2899,12 @@ class CanvasBox(QGraphicsItem):
             act_x_sep1.setVisible(False)
 
         haveIns = haveOuts = False
-        for port in canvas.port_list:
-            if port.port_id in self.m_port_list_ids:
-                if port.port_mode == PORT_MODE_INPUT:
-                    haveIns = True
-                elif port.port_mode == PORT_MODE_OUTPUT:
-                    haveOuts = True
+        for port_id in self.m_port_list_ids:
+            port = canvas.ports[port_id]
+            if port.port_mode == PORT_MODE_INPUT:
+                haveIns = True
+            elif port.port_mode == PORT_MODE_OUTPUT:
+                haveOuts = True
 
         if not (self.m_splitted or bool(haveIns and haveOuts)):
             act_x_sep2.setVisible(False)
@@ -2449,6 +2972,11 @@ class CanvasBox(QGraphicsItem):
         self.m_cursor_moving = False
         QGraphicsItem.mouseReleaseEvent(self, event)
 
+    def itemChange(self, change, value):
+        if change == QGraphicsItem.ItemPositionHasChanged:
+            canvas.box_index.update(self)
+        return QGraphicsItem.itemChange(self, change, value)
+
     def boundingRect(self):
         return QRectF(0, 0, self.p_width, self.p_height)
 
@@ -2462,7 +2990,7 @@ class CanvasBox(QGraphicsItem):
         else:
             painter.setPen(canvas.theme.box_pen)
 
-        if canvas.theme.box_bg_type == Theme.THEME_BG_GRADIENT:
+        if canvas.theme.box_bg_type == Theme.THEME_BG_GRADIENT and not canvas.low_detail:
             box_gradient = QLinearGradient(0, 0, 0, self.p_height)
             box_gradient.setColorAt(0, canvas.theme.box_bg_1)
             box_gradient.setColorAt(1, canvas.theme.box_bg_2)
@@ -2473,7 +3001,7 @@ class CanvasBox(QGraphicsItem):
         painter.drawRect(0, 0, self.p_width, self.p_height)
 
         # Draw pixmap header
-        if canvas.theme.box_header_pixmap:
+        if canvas.theme.box_header_pixmap and not canvas.low_detail:
             painter.setPen(Qt.NoPen)
             painter.setBrush(canvas.theme.box_bg_2)
             painter.drawRect(1, 1, self.p_width-2, canvas.theme.box_header_height)
@@ -2493,7 +3021,7 @@ class CanvasBox(QGraphicsItem):
         if canvas.theme.box_use_icon:
             textPos = QPointF(25, canvas.theme.box_text_ypos)
         else:
-            appNameSize = QFontMetrics(self.m_font_name).width(self.m_group_name)
+            appNameSize = CanvasGetTextWidth(self.m_font_name, self.m_group_name)
             rem = self.p_width - appNameSize
             textPos = QPointF(rem/2, canvas.theme.box_text_ypos)
 
@@ -2586,6 +3114,9 @@ class CanvasIcon(QGraphicsSvgItem):
         return self.p_size
 
     def paint(self, painter, option, widget):
+        if canvas.low_detail:
+            return
+
         if self.m_renderer:
             painter.save()
             painter.setRenderHint(QPainter.Antialiasing, False)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# PatchCanvas benchmark, runs without showing any window
+# Copyright (C) 2010-2013 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the COPYING file
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+import os
+import sys
+from random import Random
+from resource import getrusage, RUSAGE_SELF
+from time import time
+
+# Must be set before the application is created
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt4.QtGui import QApplication, QGraphicsView
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom Stuff)
+
+import patchcanvas
+
+# ------------------------------------------------------------------------------------------------------------
+# Static Variables
+
+PORT_TYPES = (patchcanvas.PORT_TYPE_AUDIO_JACK, patchcanvas.PORT_TYPE_AUDIO_JACK,
+              patchcanvas.PORT_TYPE_MIDI_JACK, patchcanvas.PORT_TYPE_MIDI_A2J, patchcanvas.PORT_TYPE_MIDI_ALSA)
+
+# ------------------------------------------------------------------------------------------------------------
+# Synthetic studio
+
+class SyntheticStudio(object):
+    __slots__ = [
+        'groups',     # (group id, group name, split, icon)
+        'ports',      # (group id, port id, port name, port mode, port type)
+        'connections' # (connection id, output port id, input port id)
+    ]
+
+    def __init__(self, groupCount, portsPerGroup, connectionCount, splitEvery, seed):
+        self.groups      = []
+        self.ports       = []
+        self.connections = []
+
+        random  = Random(seed)
+        outputs = dict((portType, []) for portType in PORT_TYPES)
+        inputs  = dict((portType, []) for portType in PORT_TYPES)
+        portId  = 1
+
+        for i in range(groupCount):
+            groupId = i + 1
+            split   = bool(splitEvery > 0 and i % splitEvery == 0)
+            icon    = patchcanvas.ICON_HARDWARE if split else patchcanvas.ICON_APPLICATION
+
+            self.groups.append((groupId, "group_%i" % groupId, patchcanvas.SPLIT_YES if split else patchcanvas.SPLIT_NO, icon))
+
+            for j in range(portsPerGroup):
+                portType = PORT_TYPES[(i + j // 2) % len(PORT_TYPES)]
+                portMode = patchcanvas.PORT_MODE_INPUT if j % 2 else patchcanvas.PORT_MODE_OUTPUT
+
+                self.ports.append((groupId, portId, "port_%i" % j, portMode, portType))
+
+                if portMode == patchcanvas.PORT_MODE_OUTPUT:
+                    outputs[portType].append(portId)
+                else:
+                    inputs[portType].append(portId)
+
+                portId += 1
+
+        # Only connect ports of the same type, and never the same pair twice
+        portTypes = [portType for portType in PORT_TYPES if outputs[portType] and inputs[portType]]
+        maxConns  = sum(len(outputs[portType]) * len(inputs[portType]) for portType in set(portTypes))
+        usedPairs = set()
+
+        while portTypes and len(self.connections) < min(connectionCount, maxConns):
+            portType = random.choice(portTypes)
+            pair     = (random.choice(outputs[portType]), random.choice(inputs[portType]))
+
+            if pair in usedPairs:
+                continue
+
+            usedPairs.add(pair)
+            self.connections.append((len(self.connections) + 1, pair[0], pair[1]))
+
+# ------------------------------------------------------------------------------------------------------------
+# Benchmark
+
+class PatchCanvasBenchmark(object):
+    def __init__(self, studio):
+        object.__init__(self)
+
+        self.fStudio  = studio
+        self.fResults = []
+
+        self.fView  = QGraphicsView()
+        self.fScene = patchcanvas.PatchScene(None, self.fView)
+        self.fView.setScene(self.fScene)
+
+        # No animations and no saved positions, results must not depend on the user's settings
+        options = patchcanvas.options_t()
+        options.theme_name       = patchcanvas.getDefaultThemeName()
+        options.auto_hide_groups = False
+        options.use_bezier_lines = True
+        options.antialiasing     = patchcanvas.ANTIALIASING_SMALL
+        options.eyecandy         = patchcanvas.EYECANDY_NONE
+
+        features = patchcanvas.features_t()
+        features.group_info   = False
+        features.group_rename = False
+        features.port_info    = False
+        features.port_rename  = False
+        features.handle_group_pos = False
+
+        patchcanvas.setOptions(options)
+        patchcanvas.setFeatures(features)
+        patchcanvas.init("PatchCanvasBenchmark", self.fScene, self.canvasCallback)
+
+    def canvasCallback(self, action, value1, value2, value_str):
+        pass
+
+    # Runs 'func' on each item inside a single canvas update, pending timers and events included
+    def runPhase(self, name, func, items):
+        startTime = time()
+
+        with patchcanvas.bulkUpdate():
+            for item in items:
+                func(*item)
+
+        QApplication.processEvents()
+
+        elapsed = time() - startTime
+        count   = len(items)
+
+        self.fResults.append((name, count, elapsed, count / elapsed if elapsed > 0.0 else 0.0,
+                              len(self.fScene.items()), getrusage(RUSAGE_SELF).ru_maxrss))
+
+    def run(self):
+        studio   = self.fStudio
+        unsplit  = [(group[0],) for group in studio.groups if group[2] == patchcanvas.SPLIT_NO]
+        renames  = [(port[1], port[2] + "_renamed") for port in studio.ports]
+
+        self.runPhase("addGroup", patchcanvas.addGroup, studio.groups)
+        self.runPhase("addPort", patchcanvas.addPort, studio.ports)
+        self.runPhase("connectPorts", patchcanvas.connectPorts, studio.connections)
+        self.runPhase("renamePort", patchcanvas.renamePort, renames)
+        self.runPhase("splitGroup", patchcanvas.splitGroup, unsplit)
+        self.runPhase("joinGroup", patchcanvas.joinGroup, unsplit)
+        self.runPhase("disconnectPorts", patchcanvas.disconnectPorts, [(connection[0],) for connection in studio.connections])
+        self.runPhase("removePort", patchcanvas.removePort, [(port[1],) for port in studio.ports])
+        self.runPhase("removeGroup", patchcanvas.removeGroup, [(group[0],) for group in studio.groups])
+
+        patchcanvas.clear()
+
+        return self.fResults
+
+# ------------------------------------------------------------------------------------------------------------
+# Output
+
+def printResults(studio, results):
+    print("%i groups, %i ports, %i connections" % (len(studio.groups), len(studio.ports), len(studio.connections)))
+    print("%-16s %8s %10s %12s %12s %14s" % ("phase", "count", "time (ms)", "ops/s", "scene items", "peak RSS (KiB)"))
+
+    for name, count, elapsed, rate, itemCount, peakMemory in results:
+        print("%-16s %8i %10.1f %12.0f %12i %14i" % (name, count, elapsed * 1000, rate, itemCount, peakMemory))
+
+    print("%-16s %8s %10.1f" % ("total", "", sum(result[2] for result in results) * 1000))
+
+def printHelp(cmd):
+    print("usage: %s [--groups=N] [--ports=N] [--connections=N] [--split-every=N] [--seed=N] [--max-time=MS]" % cmd)
+    print("")
+    print("  --groups=N       number of groups (default 100)")
+    print("  --ports=N        ports per group, half inputs and half outputs (default 16)")
+    print("  --connections=N  number of connections (default 1000)")
+    print("  --split-every=N  every Nth group is split, 0 for none (default 4)")
+    print("  --seed=N         random seed used for connections (default 0)")
+    print("  --max-time=MS    exit with an error if the total time is above this, for CI use")
+    print("")
+    print("Runs offscreen by default, set QT_QPA_PLATFORM to override (Qt4 builds without QPA need an X server, like xvfb-run).")
+
+#--------------- main ------------------
+if __name__ == '__main__':
+    args = {
+        "groups": 100,
+        "ports": 16,
+        "connections": 1000,
+        "split-every": 4,
+        "seed": 0,
+        "max-time": 0
+    }
+
+    for arg in sys.argv[1:]:
+        if arg in ("-h", "--help"):
+            printHelp(sys.argv[0])
+            sys.exit(0)
+
+        key, sep, value = arg.lstrip("-").partition("=")
+
+        if key not in args or not value.isdigit():
+            printHelp(sys.argv[0])
+            sys.exit(1)
+
+        args[key] = int(value)
+
+    app = QApplication(sys.argv)
+
+    studio  = SyntheticStudio(args["groups"], args["ports"], args["connections"], args["split-every"], args["seed"])
+    results = PatchCanvasBenchmark(studio).run()
+
+    printResults(studio, results)
+
+    if args["max-time"] > 0 and sum(result[2] for result in results) * 1000 > args["max-time"]:
+        print("total time is above %i ms" % args["max-time"])
+        sys.exit(2)
+
+    sys.exit(0)
@@ -19,7 +19,8 @@
 # ------------------------------------------------------------------------------------------------------------
 # Imports (Global)
 
-from PyQt4.QtCore import pyqtSlot, QTimer
+from collections import OrderedDict
+from PyQt4.QtCore import pyqtSlot, QPointF, QTimer
 from PyQt4.QtGui import QCursor, QFontMetrics, QImage, QMainWindow, QMenu, QPainter, QPrinter, QPrintDialog
 
 # ------------------------------------------------------------------------------------------------------------
@@ -48,6 +49,8 @@ TRANSPORT_VIEW_FRAMES = 2
 BUFFER_SIZE_LIST = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
 SAMPLE_RATE_LIST = (22050, 32000, 44100, 48000, 88200, 96000, 192000)
 
+POSITION_JOURNAL_DELAY = 500 # ms
+
 # ------------------------------------------------------------------------------------------------------------
 # Global DBus object
 
@@ -91,6 +94,57 @@ class JackObject(object):
 gJack = JackObject()
 gJack.client = None
 
+# ------------------------------------------------------------------------------------------------------------
+# Canvas position journal
+# Collects group moves and hands them over in a single batch once moving stops for a while
+
+class CanvasPositionJournal(object):
+    def __init__(self, parent, flushCallback, delay=POSITION_JOURNAL_DELAY):
+        object.__init__(self)
+
+        # 'flushCallback' receives a list of (group id, split mode, x, y), oldest move first
+        self.fFlushCallback = flushCallback
+        self.fMoves = OrderedDict()
+
+        self.fTimer = QTimer(parent)
+        self.fTimer.setInterval(delay)
+        self.fTimer.setSingleShot(True)
+        self.fTimer.timeout.connect(self.flush)
+
+    def addMove(self, groupId, splitMode, pos):
+        key = (groupId, splitMode)
+
+        # Only the last position of each box matters
+        self.fMoves.pop(key, None)
+        self.fMoves[key] = (pos.x(), pos.y())
+
+        self.fTimer.start()
+
+    def hasPending(self):
+        return bool(len(self.fMoves) > 0)
+
+    # Forget pending moves, of a single group or all of them
+    def discard(self, groupId=None):
+        if groupId is None:
+            self.fMoves.clear()
+        else:
+            for key in [key for key in self.fMoves if key[0] == groupId]:
+                del self.fMoves[key]
+
+        if not self.fMoves:
+            self.fTimer.stop()
+
+    def flush(self):
+        self.fTimer.stop()
+
+        if not self.fMoves:
+            return
+
+        moves = [(groupId, splitMode, x, y) for (groupId, splitMode), (x, y) in self.fMoves.items()]
+        self.fMoves.clear()
+
+        self.fFlushCallback(moves)
+
 # ------------------------------------------------------------------------------------------------------------
 # Abstract Canvas and JACK Class
 
@@ -115,6 +169,8 @@ class AbstractCanvasJackClass(QMainWindow):
         self.fLogsW = None
         self.scene  = None
 
+        self.fPositionJournal = CanvasPositionJournal(self, self.canvas_saveGroupPositions)
+
     # -----------------------------------------------------------------
     # Abstract calls
 
@@ -124,6 +180,12 @@ class AbstractCanvasJackClass(QMainWindow):
     def jackStopped(self):
         pass
 
+    # Called by the position journal with the latest moves, default stores them via the canvas
+    def canvas_saveGroupPositions(self, moves):
+        for groupId in set(move[0] for move in moves):
+            if groupId in patchcanvas.canvas.groups:
+                patchcanvas.saveGroupPos(groupId)
+
     # -----------------------------------------------------------------
     # JACK Property change calls
 
@@ -452,9 +514,15 @@ class AbstractCanvasJackClass(QMainWindow):
     # -----------------------------------------------------------------
     # Shared Canvas code
 
+    @pyqtSlot(int, int, QPointF)
+    def slot_canvasItemMoved(self, groupId, splitMode, pos):
+        self.fPositionJournal.addMove(groupId, splitMode, pos)
+
     @pyqtSlot()
     def slot_canvasArrange(self):
-        patchcanvas.arrange()
+        # Only arrange the selected boxes, if there's more than one
+        selectedBoxes = [item for item in self.scene.selectedItems() if item.type() == patchcanvas.CanvasBoxType]
+        patchcanvas.arrange(bool(len(selectedBoxes) > 1))
 
     @pyqtSlot()
     def slot_canvasRefresh(self):
@@ -522,7 +590,6 @@ class AbstractCanvasJackClass(QMainWindow):
     # Shared Connections
 
     def setCanvasConnections(self):
-        self.ui.act_canvas_arrange.setEnabled(False) # TODO, later
         self.connect(self.ui.act_canvas_arrange, SIGNAL("triggered()"), SLOT("slot_canvasArrange()"))
         self.connect(self.ui.act_canvas_refresh, SIGNAL("triggered()"), SLOT("slot_canvasRefresh()"))
         self.connect(self.ui.act_canvas_zoom_fit, SIGNAL("triggered()"), SLOT("slot_canvasZoomFit()"))
@@ -536,6 +603,8 @@ class AbstractCanvasJackClass(QMainWindow):
         self.connect(self.ui.b_canvas_zoom_out, SIGNAL("clicked()"), SLOT("slot_canvasZoomOut()"))
         self.connect(self.ui.b_canvas_zoom_100, SIGNAL("clicked()"), SLOT("slot_canvasZoomReset()"))
 
+        self.connect(self.scene, SIGNAL("sceneGroupMoved(int, int, QPointF)"), SLOT("slot_canvasItemMoved(int, int, QPointF)"))
+
     def setJackConnections(self, modes):
         if "jack" in modes:
             self.connect(self.ui.act_jack_clear_xruns, SIGNAL("triggered()"), SLOT("slot_JackClearXruns()"))
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# JACK telemetry recorder, stores DSP load and xruns history on disk
+# Copyright (C) 2010-2013 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the COPYING file
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+import os
+import struct
+from bisect import bisect_left
+from time import time
+
+# ------------------------------------------------------------------------------------------------------------
+# Static Variables
+
+TELEMETRY_MAGIC   = b"CDTM"
+TELEMETRY_VERSION = 1
+
+# time (seconds since epoch), dsp load (%), xruns, buffer size, sample rate, jitter (us, NaN if unknown)
+TELEMETRY_RECORD = struct.Struct("<dfIIIf")
+TELEMETRY_HEADER = struct.Struct("<4sI")
+
+TELEMETRY_FILE_NAME = "telemetry.bin"
+TELEMETRY_FILE_SIZE = 1024*1024 # 1Mb, about 10 hours at 2 samples per second
+TELEMETRY_MAX_FILES = 8
+TELEMETRY_FLUSH_AT  = 10 # records
+
+iTelTime       = 0
+iTelDSPLoad    = 1
+iTelXruns      = 2
+iTelBufferSize = 3
+iTelSampleRate = 4
+iTelJitter     = 5
+
+# ------------------------------------------------------------------------------------------------------------
+# Telemetry Recorder
+
+class TelemetryRecorder(object):
+    def __init__(self, path):
+        object.__init__(self)
+
+        self.fPath = path
+        self.fFile = None
+        self.fUnflushed = 0
+
+    def filename(self, index=0):
+        if index == 0:
+            return os.path.join(self.fPath, TELEMETRY_FILE_NAME)
+        return os.path.join(self.fPath, "%s.%i" % (TELEMETRY_FILE_NAME, index))
+
+    # -----------------------------------------------------------------
+    # Writing
+
+    # Returns the new sample, same format as the ones from query()
+    def addSample(self, dspLoad, xruns, bufferSize, sampleRate, jitter=float("nan"), sampleTime=None):
+        if sampleTime is None:
+            sampleTime = time()
+
+        sample = (float(sampleTime), float(dspLoad), max(0, int(xruns)), int(bufferSize), int(sampleRate), float(jitter))
+
+        if self.fFile is None and not self.openFile():
+            return sample
+
+        self.fFile.write(TELEMETRY_RECORD.pack(*sample))
+        self.fUnflushed += 1
+
+        if self.fFile.tell() >= TELEMETRY_FILE_SIZE:
+            self.rotate()
+        elif self.fUnflushed >= TELEMETRY_FLUSH_AT:
+            self.flush()
+
+        return sample
+
+    def flush(self):
+        if self.fFile is not None:
+            self.fFile.flush()
+            self.fUnflushed = 0
+
+    def close(self):
+        if self.fFile is not None:
+            self.fFile.close()
+            self.fFile = None
+            self.fUnflushed = 0
+
+    def openFile(self):
+        try:
+            if not os.path.exists(self.fPath):
+                os.makedirs(self.fPath)
+
+            self.fFile = open(self.filename(), "ab")
+        except:
+            self.fFile = None
+            return False
+
+        if self.fFile.tell() == 0:
+            self.fFile.write(TELEMETRY_HEADER.pack(TELEMETRY_MAGIC, TELEMETRY_VERSION))
+
+        # Drop partial records left by a crash, so the next ones are aligned
+        else:
+            extra = (self.fFile.tell() - TELEMETRY_HEADER.size) % TELEMETRY_RECORD.size
+            if extra:
+                self.fFile.truncate(self.fFile.tell() - extra)
+                self.fFile.seek(0, os.SEEK_END)
+
+        return True
+
+    def rotate(self):
+        self.close()
+
+        try:
+            if os.path.exists(self.filename(TELEMETRY_MAX_FILES-1)):
+                os.remove(self.filename(TELEMETRY_MAX_FILES-1))
+
+            for i in range(TELEMETRY_MAX_FILES-2, -1, -1):
+                if os.path.exists(self.filename(i)):
+                    os.rename(self.filename(i), self.filename(i+1))
+        except:
+            pass
+
+    def clear(self):
+        self.close()
+
+        for i in range(TELEMETRY_MAX_FILES):
+            try:
+                os.remove(self.filename(i))
+            except:
+                pass
+
+    # -----------------------------------------------------------------
+    # Reading
+
+    def readFile(self, index):
+        try:
+            fileR = open(self.filename(index), "rb")
+            data  = fileR.read()
+            fileR.close()
+        except:
+            return []
+
+        if len(data) < TELEMETRY_HEADER.size:
+            return []
+
+        magic, version = TELEMETRY_HEADER.unpack_from(data)
+
+        if magic != TELEMETRY_MAGIC or version != TELEMETRY_VERSION:
+            return []
+
+        count = (len(data) - TELEMETRY_HEADER.size) // TELEMETRY_RECORD.size
+        return [TELEMETRY_RECORD.unpack_from(data, TELEMETRY_HEADER.size + i*TELEMETRY_RECORD.size) for i in range(count)]
+
+    # Returns samples between 'startTime' and 'endTime' (both inclusive), oldest first
+    def query(self, startTime=0.0, endTime=None):
+        self.flush()
+
+        samples = []
+
+        for i in range(TELEMETRY_MAX_FILES-1, -1, -1):
+            fileSamples = self.readFile(i)
+
+            if not fileSamples:
+                continue
+            if fileSamples[-1][iTelTime] < startTime:
+                continue
+            if endTime is not None and fileSamples[0][iTelTime] > endTime:
+                break
+
+            first = bisect_left(fileSamples, (startTime,))
+            last  = len(fileSamples) if endTime is None else bisect_left(fileSamples, (endTime, float("inf")))
+
+            samples += fileSamples[first:last]
+
+        return samples
+
+# ------------------------------------------------------------------------------------------------------------
+# Query helpers
+
+# Returns the times at which new xruns happened, as (time, number of new xruns)
+def get_xrun_times(samples):
+    xrunTimes = []
+    lastXruns = None
+
+    for sample in samples:
+        xruns = sample[iTelXruns]
+
+        if lastXruns is not None and xruns != lastXruns:
+            # A lower count means the counter was reset
+            newXruns = xruns - lastXruns if xruns > lastXruns else xruns
+
+            if newXruns > 0:
+                xrunTimes.append((sample[iTelTime], newXruns))
+
+        lastXruns = xruns
+
+    return xrunTimes
+
+# Returns (min, average, max) DSP load of samples
+def get_dsp_load_stats(samples):
+    if not samples:
+        return (0.0, 0.0, 0.0)
+
+    loads = [sample[iTelDSPLoad] for sample in samples]
+    return (min(loads), sum(loads)/len(loads), max(loads))
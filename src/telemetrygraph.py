@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Telemetry History Graph, a custom Qt4 widget
+# Copyright (C) 2011-2013 Filipe Coelho <falktx@falktx.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# For a full copy of the GNU General Public License see the COPYING file
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Global)
+
+from time import time
+from PyQt4.QtCore import Qt, QPointF
+from PyQt4.QtGui import QColor, QFrame, QPainter, QPainterPath, QPen
+
+# ------------------------------------------------------------------------------------------------------------
+# Imports (Custom Stuff)
+
+from telemetry import iTelTime, iTelDSPLoad, iTelBufferSize, get_xrun_times
+
+# ------------------------------------------------------------------------------------------------------------
+# Widget Class
+
+class TelemetryGraph(QFrame):
+    def __init__(self, parent):
+        QFrame.__init__(self, parent)
+
+        self.fSamples   = []
+        self.fTimeRange = 600.0 # seconds
+
+        self.fBgColor   = QColor(0, 0, 0)
+        self.fGridPen   = QPen(QColor(60, 60, 60), 1, Qt.DotLine)
+        self.fLoadPen   = QPen(QColor(75, 200, 75), 1)
+        self.fXrunPen   = QPen(QColor(255, 50, 50), 1)
+        self.fBufferPen = QPen(QColor(100, 130, 255), 1, Qt.DashLine)
+        self.fTextPen   = QPen(QColor(200, 200, 200), 1)
+
+        self.setMinimumHeight(100)
+
+    def setTimeRange(self, seconds):
+        self.fTimeRange = float(seconds)
+        self.update()
+
+    def timeRange(self):
+        return self.fTimeRange
+
+    def samples(self):
+        return self.fSamples
+
+    def setSamples(self, samples):
+        self.fSamples = list(samples)
+        self.update()
+
+    def addSample(self, sample):
+        self.fSamples.append(sample)
+
+        # Drop samples that went out of view
+        if self.fSamples[0][iTelTime] < sample[iTelTime] - self.fTimeRange:
+            startTime = sample[iTelTime] - self.fTimeRange
+            self.fSamples = [oldSample for oldSample in self.fSamples if oldSample[iTelTime] >= startTime]
+
+        if self.isVisible():
+            self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect    = self.contentsRect()
+
+        painter.fillRect(rect, self.fBgColor)
+
+        width  = rect.width()
+        height = rect.height()
+
+        if width <= 1 or height <= 1:
+            painter.end()
+            return QFrame.paintEvent(self, event)
+
+        endTime   = time()
+        startTime = endTime - self.fTimeRange
+
+        def posX(sampleTime):
+            return rect.left() + (sampleTime - startTime) * (width - 1) / self.fTimeRange
+
+        def posY(dspLoad):
+            return rect.bottom() - min(dspLoad, 100.0) * (height - 1) / 100.0
+
+        # Grid, every 25%
+        painter.setPen(self.fGridPen)
+        for load in (25.0, 50.0, 75.0):
+            painter.drawLine(QPointF(rect.left(), posY(load)), QPointF(rect.right(), posY(load)))
+
+        samples = [sample for sample in self.fSamples if sample[iTelTime] >= startTime]
+
+        # Buffer size changes
+        painter.setPen(self.fBufferPen)
+        lastBufferSize = None
+        for sample in samples:
+            if lastBufferSize is not None and sample[iTelBufferSize] != lastBufferSize:
+                x = posX(sample[iTelTime])
+                painter.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+                painter.drawText(QPointF(x + 2, rect.top() + painter.fontMetrics().ascent()), str(sample[iTelBufferSize]))
+            lastBufferSize = sample[iTelBufferSize]
+
+        # DSP load, using the peak of each pixel column
+        points = []
+
+        for sample in samples:
+            x = int(posX(sample[iTelTime]))
+            y = posY(sample[iTelDSPLoad])
+
+            if points and points[-1][0] == x:
+                points[-1][1] = min(points[-1][1], y)
+            else:
+                points.append([x, y])
+
+        path = QPainterPath()
+
+        if points:
+            path.moveTo(points[0][0], points[0][1])
+            for x, y in points[1:]:
+                path.lineTo(x, y)
+
+        painter.setPen(self.fLoadPen)
+        painter.drawPath(path)
+
+        # Xruns
+        painter.setPen(self.fXrunPen)
+        for xrunTime, xrunCount in get_xrun_times(samples):
+            x = posX(xrunTime)
+            painter.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+
+        painter.setPen(self.fTextPen)
+        painter.drawText(rect.adjusted(4, 2, -4, -2), Qt.AlignRight|Qt.AlignTop, "100%")
+        painter.drawText(rect.adjusted(4, 2, -4, -2), Qt.AlignRight|Qt.AlignBottom, "0%")
+
+        painter.end()
+
+        QFrame.paintEvent(self, event)